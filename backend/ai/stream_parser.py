@@ -0,0 +1,70 @@
+import json
+from typing import Dict, List
+
+class SuggestionStreamParser:
+    """
+    Pick complete suggestions out of a streamed ``{"suggestions": [...]}`` response
+    
+    Feed text chunks as they arrive; each suggestion object is returned as
+    soon as its closing brace has been seen, before the rest of the response
+    is generated. Text around the JSON (prose, code fences) is ignored.
+    """
+    
+    def __init__(self):
+        self._stack = []  # Open '{' / '[' of the JSON seen so far
+        self._in_string = False
+        self._escaped = False
+        self._current = None  # Characters of the suggestion being read
+        self._key = []  # Last string read directly inside the root object
+        self._in_suggestions = False
+    
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Consume a chunk of the response
+        
+        Returns:
+            Suggestion dicts completed by this chunk (may be empty)
+        """
+        completed = []
+        for char in text:
+            if self._current is not None:
+                self._current.append(char)
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    continue
+                if self._stack == ['{']:
+                    self._key.append(char)
+                continue
+            
+            if char == '"' and self._stack:
+                self._in_string = True
+                if self._stack == ['{']:
+                    self._key = []
+            elif char in '{[':
+                if char == '[' and self._stack == ['{']:
+                    self._in_suggestions = ''.join(self._key) == 'suggestions'
+                # Objects directly inside the root "suggestions" array
+                if char == '{' and self._stack == ['{', '['] and self._in_suggestions:
+                    self._current = [char]
+                self._stack.append(char)
+            elif char in '}]' and self._stack:
+                self._stack.pop()
+                if char == '}' and self._current is not None and self._stack == ['{', '[']:
+                    suggestion = self._parse(''.join(self._current))
+                    if suggestion is not None:
+                        completed.append(suggestion)
+                    self._current = None
+        return completed
+    
+    def _parse(self, text: str):
+        try:
+            suggestion = json.loads(text)
+        except ValueError:
+            return None
+        return suggestion if isinstance(suggestion, dict) else None
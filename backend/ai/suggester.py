@@ -1,25 +1,52 @@
 import json
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import google.generativeai as genai
+from ai.stream_parser import SuggestionStreamParser
 from config import Config
+from models.code import normalize_brand
+from services.metrics import metrics
 
 class AISuggester:
     """Generate AI-powered discount suggestions using Google Gemini"""
     
-    def __init__(self, api_key: str = None):
+    # Fields requested for each suggestion, shared by single and batch prompts
+    SUGGESTION_FIELDS = """For EACH suggestion, provide ALL fields:
+- type: "new_account_trial", "student_discount", "family_plan", "seasonal_sale", "referral", etc.
+- title: Short descriptive title
+- description: How it works (2-3 sentences)
+- estimated_savings: Numeric value (e.g., 14.99)
+- estimated_savings_description: Text like "$14.99 for first month" or "50% off annually"
+- conditions: Requirements (e.g., "First-time users only" or "Requires .edu email")
+- pro_tip: Extra advice to maximize savings
+- risk: ALWAYS use "safe" for legitimate strategies"""
+
+    # Extra prompts sent for brands a batch response left out
+    MAX_BATCH_RETRIES = 2
+    
+    def __init__(self, api_key: str = None, model=None):
+        """
+        Args:
+            api_key: Gemini API key (defaults to Config.GEMINI_API_KEY)
+            model: Object with a Gemini-style ``generate_content(prompt)``,
+                used instead of the Gemini API (e.g. a local fake)
+        """
         self.api_key = api_key or Config.GEMINI_API_KEY
-        self.model = None
-        if self.api_key:
+        self.model = model
+        self.last_batch_stats = {}
+        if self.model is None and self.api_key:
             genai.configure(api_key=self.api_key)
             # Use gemini-2.5-flash (free tier, fast and latest)
             self.model = genai.GenerativeModel('gemini-2.5-flash')
     
-    def get_suggestions(self, brand_name: str) -> List[Dict]:
+    def get_suggestions(self, brand_name: str,
+                        on_suggestion: Callable[[Dict], None] = None) -> List[Dict]:
         """
         Get AI-generated discount suggestions for a brand
         
         Args:
             brand_name: Brand to get suggestions for
+            on_suggestion: If given, the response is streamed and this is
+                called with each suggestion as soon as it is complete
             
         Returns:
             List of suggestion dicts
@@ -32,8 +59,11 @@ class AISuggester:
             prompt = self._build_prompt(brand_name)
             
             print(f"[AI] Generating suggestions for: {brand_name}")
-            response = self.model.generate_content(prompt)
-            content = response.text
+            with metrics.span('gemini.generate_content'):
+                if on_suggestion is None:
+                    content = self.model.generate_content(prompt).text
+                else:
+                    content = self._generate_streaming(prompt, on_suggestion)
             print(f"[AI] Gemini response length: {len(content)} chars")
             print(f"[AI] First 200 chars: {content[:200]}")
             
@@ -62,15 +92,7 @@ ALWAYS include these types if applicable:
 4. Seasonal sales (Black Friday, etc.)
 5. Referral programs
 
-For EACH suggestion, provide ALL fields:
-- type: "new_account_trial", "student_discount", "family_plan", "seasonal_sale", "referral", etc.
-- title: Short descriptive title
-- description: How it works (2-3 sentences)
-- estimated_savings: Numeric value (e.g., 14.99)
-- estimated_savings_description: Text like "$14.99 for first month" or "50% off annually"
-- conditions: Requirements (e.g., "First-time users only" or "Requires .edu email")
-- pro_tip: Extra advice to maximize savings
-- risk: ALWAYS use "safe" for legitimate strategies
+{self.SUGGESTION_FIELDS}
 
 CRITICAL: Return ONLY valid JSON in this EXACT format (no extra text):
 {{
@@ -100,19 +122,175 @@ CRITICAL: Return ONLY valid JSON in this EXACT format (no extra text):
 
 Only suggest legal, ethical strategies. No hacks or exploits. Focus on official promotions."""
     
-    def _parse_ai_response(self, content: str) -> List[Dict]:
-        """Parse AI response into structured suggestions"""
+    def _generate_streaming(self, prompt: str, on_suggestion: Callable[[Dict], None]) -> str:
+        """Stream a response, reporting suggestions as they complete; returns the full text"""
+        parser = SuggestionStreamParser()
+        chunks = []
+        for chunk in self.model.generate_content(prompt, stream=True):
+            chunks.append(chunk.text)
+            for suggestion in parser.feed(chunk.text):
+                on_suggestion(suggestion)
+        return ''.join(chunks)
+    
+    def get_fallback_suggestions(self, brand_name: str) -> List[Dict]:
+        """Generic suggestions to show while AI suggestions are unavailable"""
+        return self._get_mock_suggestions(brand_name)
+    
+    def get_suggestions_batch(self, brand_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get suggestions for several brands from a single prompt
+        
+        The instructions are sent once for all brands. Brands the response
+        leaves out (or can't be parsed for) are asked for again, together,
+        up to MAX_BATCH_RETRIES more times; brands that already have
+        suggestions are never re-requested. Stats for the call are left in
+        ``last_batch_stats``.
+        
+        Args:
+            brand_names: Brands to get suggestions for (keep batches small
+                enough for one response, e.g. Config.SUGGESTION_BATCH_SIZE)
+        
+        Returns:
+            Dict of brand name (as given) -> raw suggestion dicts; brands
+            that still failed after the retries are missing
+        """
+        # One entry per brand key, keeping the first spelling
+        by_key = {}
+        for name in brand_names:
+            by_key.setdefault(normalize_brand(name), name)
+        pending = list(by_key.values())
+        self.last_batch_stats = {
+            'brands': len(pending),
+            'api_calls': 0,
+            'retried': 0,
+            'failed': []
+        }
+        
+        if not self.model:
+            print("Warning: Gemini API key not configured. Returning mock suggestions.")
+            return {name: self._get_mock_suggestions(name) for name in pending}
+        
+        results = {}
+        for attempt in range(1 + self.MAX_BATCH_RETRIES):
+            if not pending:
+                break
+            if attempt:
+                print(f"[AI] Retrying {len(pending)} brand(s) missing from the batch response")
+                self.last_batch_stats['retried'] += len(pending)
+            
+            results.update(self._generate_batch(pending))
+            pending = [name for name in pending if name not in results]
+        
+        if pending:
+            print(f"[AI] ⚠️  No suggestions for {len(pending)} brand(s): {', '.join(pending)}")
+        self.last_batch_stats['failed'] = pending
+        return results
+    
+    def _generate_batch(self, brand_names: List[str]) -> Dict[str, List[Dict]]:
+        """Make one batch prompt call; returns the brands it produced suggestions for"""
+        self.last_batch_stats['api_calls'] += 1
         try:
-            # Try to extract JSON from response
+            print(f"[AI] Generating suggestions for {len(brand_names)} brands in one prompt")
+            with metrics.span('gemini.generate_content'):
+                response = self.model.generate_content(self._build_batch_prompt(brand_names))
+                content = response.text
+            print(f"[AI] Gemini batch response length: {len(content)} chars")
+            return self._parse_batch_response(content, brand_names)
+        
+        except Exception as e:
+            print(f"[AI] ❌ Error getting batch AI suggestions: {e}")
+            return {}
+    
+    def _build_batch_prompt(self, brand_names: List[str]) -> str:
+        """Build one prompt asking for suggestions for every brand in brand_names"""
+        return f"""You are a discount expert. For EACH of the services/products listed below, provide EXACTLY 3-5 legitimate ways users can get the best deals or free access.
+
+Services/products (JSON list):
+{json.dumps(brand_names)}
+
+ALWAYS include these types if applicable:
+1. Free trial for new accounts
+2. Student discount (with .edu email)
+3. Family/group plan sharing
+4. Seasonal sales (Black Friday, etc.)
+5. Referral programs
+
+{self.SUGGESTION_FIELDS}
+
+CRITICAL: Return ONLY valid JSON in this EXACT format (no extra text), with one entry per service/product and "brand" spelled exactly as listed:
+{{
+  "brands": [
+    {{
+      "brand": "Example Service",
+      "suggestions": [
+        {{
+          "type": "new_account_trial",
+          "title": "Free Trial for New Users",
+          "description": "Get 30 days completely free when you sign up. Cancel anytime before trial ends.",
+          "estimated_savings": 15.99,
+          "estimated_savings_description": "$15.99 for first month",
+          "conditions": "New customers only",
+          "pro_tip": "Set a calendar reminder 2 days before trial ends",
+          "risk": "safe"
+        }}
+      ]
+    }}
+  ]
+}}
+
+Only suggest legal, ethical strategies. No hacks or exploits. Focus on official promotions."""
+    
+    def _parse_batch_response(self, content: str, brand_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Split a batch response into per-brand suggestion lists
+        
+        Accepts the requested ``{"brands": [{"brand", "suggestions"}]}`` shape
+        as well as a plain ``{brand: [suggestions]}`` object. Brands are
+        matched on their normalized key; unknown brands and empty lists are
+        ignored.
+        """
+        data = self._extract_json(content)
+        if isinstance(data, dict) and isinstance(data.get('brands'), list):
+            entries = [
+                (entry.get('brand'), entry.get('suggestions'))
+                for entry in data['brands'] if isinstance(entry, dict)
+            ]
+        elif isinstance(data, dict):
+            entries = [
+                (brand, value.get('suggestions') if isinstance(value, dict) else value)
+                for brand, value in data.items()
+            ]
+        else:
+            return {}
+        
+        requested = {normalize_brand(name): name for name in brand_names}
+        results = {}
+        for brand, suggestions in entries:
+            name = requested.get(normalize_brand(brand if isinstance(brand, str) else ''))
+            if name is None or not isinstance(suggestions, list):
+                continue
+            suggestions = [s for s in suggestions if isinstance(s, dict)]
+            if suggestions:
+                results[name] = suggestions
+        return results
+    
+    def _extract_json(self, content: str) -> Optional[Dict]:
+        """Parse the outermost JSON object in a model response, or None"""
+        try:
+            # Models sometimes wrap the JSON in prose or code fences
             start = content.find('{')
             end = content.rfind('}') + 1
             if start >= 0 and end > start:
-                json_str = content[start:end]
-                data = json.loads(json_str)
-                return data.get('suggestions', [])
+                return json.loads(content[start:end])
         except Exception as e:
             print(f"Error parsing AI response: {e}")
-        
+        return None
+    
+    def _parse_ai_response(self, content: str) -> List[Dict]:
+        """Parse AI response into structured suggestions"""
+        data = self._extract_json(content)
+        if isinstance(data, dict):
+            return data.get('suggestions', [])
         return []
     
     def _get_mock_suggestions(self, brand_name: str) -> List[Dict]:
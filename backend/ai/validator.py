@@ -1,4 +1,7 @@
-from typing import Dict, List
+import bisect
+import re
+import string
+from typing import Dict, List, Pattern, Set
 
 class SuggestionValidator:
     """Validate AI-generated suggestions for safety and legality"""
@@ -10,6 +13,21 @@ class SuggestionValidator:
         'bypass payment', 'skip payment', 'avoid paying'
     ]
     
+    # Fields scanned for risky keywords
+    TEXT_FIELDS = ('description', 'title', 'pro_tip')
+    
+    # Keywords only match where the text has no word character just before
+    WORD_CHAR = re.compile(r'\w')
+    WORD_PATTERN = re.compile(r'\w+')
+    
+    # ASCII punctuation (except '_', a word character) and NUL to spaces,
+    # for a fast split into words
+    _SEPARATORS = str.maketrans(dict.fromkeys(string.punctuation.replace('_', '') + '\0', ' '))
+    
+    # Above this many distinct first words, the batch text is split into
+    # words once and only first words that occur are scanned for
+    SCAN_ALL_LIMIT = 24
+    
     # Safe suggestion types
     SAFE_TYPES = {
         'new_account_trial', 'student_discount', 'referral',
@@ -17,6 +35,9 @@ class SuggestionValidator:
         'benefit_stacking', 'long_term_plan', 'free_trial'
     }
     
+    # (RISKY_KEYWORDS it was built from, patterns by first word)
+    _keyword_index = None
+    
     @classmethod
     def validate_suggestion(cls, suggestion: Dict) -> Dict:
         """
@@ -42,20 +63,26 @@ class SuggestionValidator:
         """
         Validate a list of suggestions
         
+        The whole batch is screened for risky keywords at once (see
+        _find_risky), rather than suggestion by suggestion.
+        
         Args:
             suggestions: List of suggestion dicts
             
         Returns:
             List of validated suggestions (only safe ones)
         """
+        risky = cls._find_risky(suggestions)
         validated = []
         
-        for suggestion in suggestions:
-            validated_suggestion = cls.validate_suggestion(suggestion)
+        for index, suggestion in enumerate(suggestions):
+            risk_level = 'high' if index in risky else cls._type_risk(suggestion)
+            suggestion['risk'] = risk_level
+            suggestion['is_safe'] = risk_level == 'safe'
             
             # Only include safe suggestions in MVP
-            if validated_suggestion.get('is_safe', False):
-                validated.append(validated_suggestion)
+            if suggestion['is_safe']:
+                validated.append(suggestion)
         
         return validated
     
@@ -67,25 +94,99 @@ class SuggestionValidator:
         Returns:
             'safe', 'medium', or 'high'
         """
-        # Check type
-        suggestion_type = suggestion.get('type', '').lower()
-        if suggestion_type in cls.SAFE_TYPES:
-            risk = 'safe'
-        else:
-            risk = 'medium'
+        # Check for risky keywords in description, title and pro tip
+        if cls._find_risky([suggestion]):
+            return 'high'
+        return cls._type_risk(suggestion)
+    
+    @classmethod
+    def _type_risk(cls, suggestion: Dict) -> str:
+        """'safe' for known suggestion types, otherwise 'medium'"""
+        suggestion_type = (suggestion.get('type') or '').lower()
+        return 'safe' if suggestion_type in cls.SAFE_TYPES else 'medium'
+    
+    @classmethod
+    def _find_risky(cls, suggestions: List[Dict]) -> Set[int]:
+        """
+        Return the indexes of suggestions containing a risky keyword
+        
+        Keywords match case-insensitively as whole words, so "cheat" matches
+        "Cheat!" but not "cheater". The batch's texts are joined into one
+        string, and each distinct first word of a keyword is located with a
+        str.find scan over it; only those hits are checked against the
+        keyword's anchored pattern. Once a suggestion matches, the scan skips
+        to the next one. With long keyword lists, first words that don't
+        occur in the batch are ruled out by one set intersection instead.
+        """
+        texts = [
+            ' '.join(suggestion.get(field) or '' for field in cls.TEXT_FIELDS).lower()
+            for suggestion in suggestions
+        ]
+        starts = []
+        offset = 0
+        for part in texts:
+            starts.append(offset)
+            offset += len(part) + 1
+        # NUL is neither a word character nor a separator in any keyword, so
+        # no match spans two suggestions
+        text = '\0'.join(texts)
         
-        # Check for risky keywords in description and title
-        text = (
-            suggestion.get('description', '') + ' ' +
-            suggestion.get('title', '') + ' ' +
-            suggestion.get('pro_tip', '')
-        ).lower()
+        keywords = cls._risky_keywords()
+        first_words = keywords.keys()
+        if len(first_words) > cls.SCAN_ALL_LIMIT:
+            first_words = first_words & cls._words(text)
         
-        for keyword in cls.RISKY_KEYWORDS:
-            if keyword in text:
-                return 'high'
+        risky = set()
+        for first_word in first_words:
+            patterns = keywords[first_word]
+            position = text.find(first_word)
+            while position != -1:
+                index = bisect.bisect_right(starts, position) - 1
+                if (index not in risky
+                        and not (position and cls.WORD_CHAR.match(text, position - 1))
+                        and any(pattern.match(text, position) for pattern in patterns)):
+                    risky.add(index)
+                if index in risky:
+                    # Skip the rest of a suggestion that already matched
+                    if index + 1 == len(starts):
+                        break
+                    position = text.find(first_word, starts[index + 1])
+                else:
+                    position = text.find(first_word, position + 1)
+        return risky
+    
+    @classmethod
+    def _words(cls, text: str) -> Set[str]:
+        """Distinct words in text, as WORD_PATTERN would find them"""
+        words = set(text.translate(cls._SEPARATORS).split())
+        # Split the few distinct tokens left with other non-word characters
+        for token in [word for word in words if not word.isalnum()]:
+            words.discard(token)
+            words.update(cls.WORD_PATTERN.findall(token))
+        return words
+    
+    @classmethod
+    def _risky_keywords(cls) -> Dict[str, List[Pattern]]:
+        """
+        Compile RISKY_KEYWORDS for _find_risky
         
-        return risk
+        Returns:
+            Dict of lowercase first word -> anchored patterns for the keywords
+            starting with it. The words of multi-word keywords may be
+            separated by any whitespace or punctuation. Rebuilt only when
+            RISKY_KEYWORDS changes.
+        """
+        keywords = tuple(cls.RISKY_KEYWORDS)
+        index = cls._keyword_index
+        if index is None or index[0] != keywords:
+            patterns = {}
+            for keyword in keywords:
+                words = cls.WORD_PATTERN.findall(keyword.lower())
+                if words:
+                    pattern = r'[^\w\0]+'.join(map(re.escape, words)) + r'(?!\w)'
+                    patterns.setdefault(words[0], []).append(re.compile(pattern))
+            index = cls._keyword_index = (keywords, patterns)
+        return index[1]
     
     @classmethod
     def filter_safe_suggestions(cls, suggestions: List[Dict]) -> List[Dict]:
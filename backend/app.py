@@ -1,18 +1,40 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response
 from flask_cors import CORS
 from models.code import db
+from models.brand import BrandIndex
+from models.lock import GenerationLock
+from models.verification import SuggestionVerification
+from models.schema import upgrade_codes_table, upgrade_suggestions_table
+from models.watermark import ScrapeWatermark
 from routes.search import search_bp
 from routes.scrape import scrape_bp
-from routes.suggestions import suggestions_bp
+from routes.suggestions import suggestions_bp, suggestion_flight, generate_coalesced, prefetch_coalesced
+from services.code_sweeper import CodeSweeper
+from services.copy_counter import CopyCounter
+from services.verification_recorder import VerificationRecorder
+from services.metrics import metrics, instrument_app
+from services.refresh_scheduler import RefreshScheduler
+from services.suggestion_generator import SuggestionGenerator
+from services.response_cache import code_search_cache
+from services.scrape_service import scrape_and_store
+from scrapers.youtube_scraper import YouTubeScraper
 from config import Config
 import os
 
-def create_app():
-    """Create and configure Flask application"""
+def create_app(config_overrides=None):
+    """
+    Create and configure Flask application
+    
+    Args:
+        config_overrides: Optional dict applied on top of Config
+            (e.g. a different SQLALCHEMY_DATABASE_URI for benchmarks)
+    """
     app = Flask(__name__)
     
     # Configuration
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
     
     # Enable CORS for frontend (development + production)
     allowed_origins = [
@@ -34,6 +56,48 @@ def create_app():
     # Initialize database
     db.init_app(app)
     
+    # Background refresh of stale brands
+    app.extensions['refresh_scheduler'] = RefreshScheduler(
+        app,
+        scrape_and_store,
+        max_workers=app.config['REFRESH_MAX_WORKERS'],
+        max_in_flight=app.config['REFRESH_MAX_IN_FLIGHT'],
+        backoff_base=app.config['REFRESH_BACKOFF_BASE'],
+        backoff_max=app.config['REFRESH_BACKOFF_MAX'],
+        min_interval=app.config['REFRESH_MIN_INTERVAL']
+    )
+    
+    # AI suggestion generation off the request thread
+    app.extensions['suggestion_generator'] = SuggestionGenerator(
+        app,
+        generate_coalesced,
+        prefetch_coalesced,
+        max_workers=app.config['SUGGESTION_MAX_WORKERS'],
+        max_in_flight=app.config['SUGGESTION_MAX_IN_FLIGHT']
+    )
+    
+    # Write-behind buffer for copy tracking
+    app.extensions['copy_counter'] = CopyCounter(
+        app,
+        flush_interval=app.config['COPY_FLUSH_INTERVAL']
+    )
+    app.extensions['copy_counter'].start()
+    
+    # Write-behind buffer for suggestion verification votes
+    app.extensions['verification_recorder'] = VerificationRecorder(
+        app,
+        flush_interval=app.config['VERIFICATION_FLUSH_INTERVAL']
+    )
+    app.extensions['verification_recorder'].start()
+    
+    # Moves expired codes out of the searched codes table
+    app.extensions['code_sweeper'] = CodeSweeper(
+        app,
+        interval=app.config['CODE_SWEEP_INTERVAL'],
+        batch_size=app.config['CODE_SWEEP_BATCH_SIZE'],
+        expire_after=app.config['CODE_EXPIRE_AFTER']
+    )
+    
     # Register blueprints
     app.register_blueprint(search_bp)
     app.register_blueprint(scrape_bp)
@@ -42,7 +106,36 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        BrandIndex.install()
+        upgrade_codes_table()
+        upgrade_suggestions_table()
         print("Database tables created successfully!")
+        
+        # Latency histograms for endpoints, upstream calls and DB queries
+        instrument_app(app, db.engine)
+    
+    # Sweep only once the archive table exists
+    app.extensions['code_sweeper'].start()
+    
+    metrics.register_gauges('search_cache', 'Code search response cache counters',
+                            code_search_cache.stats)
+    metrics.register_gauges('refresh', 'Background brand refresh counters',
+                            app.extensions['refresh_scheduler'].stats)
+    metrics.register_gauges('copy_counter', 'Buffered copy tracking counters',
+                            app.extensions['copy_counter'].stats)
+    metrics.register_gauges('verification_recorder', 'Buffered suggestion verification counters',
+                            app.extensions['verification_recorder'].stats)
+    metrics.register_gauges('code_sweeper', 'Expired code archiving progress and table sizes',
+                            app.extensions['code_sweeper'].stats)
+    metrics.register_gauges('suggestion_generation', 'Coalesced AI suggestion generation counters',
+                            suggestion_flight.stats)
+    metrics.register_gauges('suggestion_jobs', 'Background AI suggestion generation counters',
+                            app.extensions['suggestion_generator'].stats)
+    YouTubeScraper.configure_shared_cache(app.config['YOUTUBE_CACHE_PATH'])
+    youtube_cache = YouTubeScraper.shared_cache()
+    if youtube_cache is not None:
+        metrics.register_gauges('youtube_cache', 'On-disk YouTube API response cache counters',
+                                youtube_cache.stats)
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -52,6 +145,11 @@ def create_app():
             'message': 'Voucher Scraper API is running'
         })
     
+    # Prometheus metrics endpoint
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     # Root endpoint
     @app.route('/', methods=['GET'])
     def root():
@@ -60,10 +158,15 @@ def create_app():
             'version': '1.0.0',
             'endpoints': {
                 'search': '/api/codes/search?brand=<brand_name>',
+                'search_batch': 'POST /api/codes/search/batch {brands: [...]}',
                 'scrape': '/api/scrape?brand=<brand_name>',
+                'scrape_stream': '/api/scrape/stream?brand=<brand_name>&format=ndjson|sse',
                 'suggestions': '/api/suggestions?brand=<brand_name>',
+                'archive': '/api/codes/archive?brand=<brand_name>',
                 'copy_tracking': '/api/codes/copy',
                 'verify_suggestion': '/api/suggestions/verify',
+                'suggestion_prefetch': '/api/suggestions/prefetch',
+                'metrics': '/api/metrics',
                 'health': '/api/health'
             }
         })
@@ -0,0 +1,158 @@
+"""
+Benchmark the read endpoints through the Flask test client
+
+Seeds a temporary SQLite database with a synthetic catalog of codes (and
+cached AI suggestions), then measures /api/codes/search with a cold and a
+warm response cache, and /api/suggestions on its cached path.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api [--sizes 10000,100000] [--iterations 200]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from models.brand import BrandIndex
+from models.code import db, Code, normalize_brand
+from models.suggestion import AISuggestion
+from services.response_cache import code_search_cache
+from benchmarks.common import measure, temp_app
+
+CODES_PER_BRAND = 20
+SUGGESTIONS_PER_BRAND = 5
+INSERT_BATCH = 10000
+
+
+def brand_names(count: int) -> List[str]:
+    """Deterministic synthetic brand names"""
+    return [f'Brand {i:07d} Shop' for i in range(count)]
+
+
+def seed_database(codes: int, seed: int = 42) -> List[str]:
+    """
+    Fill the current database with synthetic codes and suggestions
+    
+    Args:
+        codes: Number of code rows
+        seed: Random seed
+    
+    Returns:
+        Brand names that were created
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    brands = brand_names(max(1, codes // CODES_PER_BRAND))
+    
+    rows = []
+    for i in range(codes):
+        brand = brands[i % len(brands)]
+        rows.append({
+            'brand': brand,
+            'brand_key': normalize_brand(brand),
+            'code': f'SYN{i:08d}',
+            'discount_percentage': float(rng.randint(5, 80)) if rng.random() < 0.8 else None,
+            'discount_description': None,
+            'source': rng.choice(['YouTube', 'RetailMeNot', 'CouponDB']),
+            'source_url': f'https://www.youtube.com/watch?v=syn{i}',
+            'source_creator': f'Creator {rng.randint(1, 500)}',
+            'status': 'unverified',
+            'date_found': now,
+            'uses_count': rng.randint(0, 1000),
+            'created_at': now,
+            'last_seen_at': now,
+        })
+        if len(rows) >= INSERT_BATCH:
+            db.session.execute(Code.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Code.__table__.insert(), rows)
+    
+    suggestions = []
+    for brand in brands[:1000]:
+        for j in range(SUGGESTIONS_PER_BRAND):
+            suggestions.append({
+                'brand': brand,
+                'brand_key': normalize_brand(brand),
+                'suggestion_type': 'student_discount',
+                'title': f'Suggestion {j} for {brand}',
+                'description': 'Students with a .edu email get a discount.',
+                'estimated_savings': float(rng.randint(1, 50)),
+                'estimated_savings_description': 'Monthly savings',
+                'conditions': 'Valid .edu email',
+                'pro_tip': 'Check eligibility yearly.',
+                'confidence_score': 50.0,
+                'verification_count': 0,
+                'risk_level': 'safe',
+                'created_at': now,
+            })
+    db.session.execute(AISuggestion.__table__.insert(), suggestions)
+    
+    BrandIndex.register(brands)
+    db.session.commit()
+    return brands
+
+
+def run_size(codes: int, iterations: int) -> Dict:
+    """Seed one database size and measure every endpoint against it"""
+    with temp_app() as app:
+        start = time.perf_counter()
+        brands = seed_database(codes)
+        seed_seconds = time.perf_counter() - start
+        
+        client = app.test_client()
+        rng = random.Random(7)
+        with_suggestions = brands[:1000]
+        
+        def search(query: str, cold: bool):
+            if cold:
+                code_search_cache.clear()
+            response = client.get('/api/codes/search', query_string={'brand': query})
+            assert response.status_code == 200
+        
+        def suggestions():
+            response = client.get('/api/suggestions',
+                                  query_string={'brand': rng.choice(with_suggestions)})
+            assert response.status_code == 200 and response.json['cached']
+        
+        hot_brand = brands[len(brands) // 2]
+        result = {
+            'codes': codes,
+            'brands': len(brands),
+            'seed_seconds': seed_seconds,
+            'search_exact_cold': measure(
+                lambda: search(rng.choice(brands), cold=True), iterations),
+            'search_substring_cold': measure(
+                lambda: search(rng.choice(brands)[6:13], cold=True), iterations),
+            'search_hot_brand_warm': measure(
+                lambda: search(hot_brand, cold=False), iterations),
+            'suggestions_cached': measure(suggestions, iterations),
+        }
+        code_search_cache.clear()
+    return result
+
+
+def run(sizes: List[int] = (10000, 100000), iterations: int = 200) -> Dict:
+    """
+    Run the endpoint benchmarks for each database size
+    
+    Returns:
+        Dict keyed by database size
+    """
+    return {str(size): run_size(size, iterations) for size in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='Comma-separated code counts, e.g. 10000,100000,1000000')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(json.dumps(run(sizes, args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
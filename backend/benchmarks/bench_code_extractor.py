@@ -0,0 +1,188 @@
+"""
+Benchmark CodeExtractor throughput on a synthetic corpus of video descriptions
+
+Compares the single-pass matcher, called per text and through
+extract_code_info_many, against the original implementation, which
+upper-cased each text and ran every pattern as a separate regex scan.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_code_extractor [--texts 5000] [--words 150]
+"""
+import argparse
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from scrapers.code_extractor import CodeExtractor
+
+FILLER_WORDS = (
+    'the best deal this week check out my video about gear tech and more '
+    'subscribe like follow share comment below link in description thanks '
+    'for watching today we review unboxing setup tutorial giveaway'
+).split()
+
+
+def _code_snippet(rng: random.Random) -> str:
+    """Return a random phrase that contains a code or a discount"""
+    n = rng.randint(10, 99)
+    return rng.choice([
+        f'use code SAVE{n}',
+        f'Promo: DEAL{n}',
+        f'coupon code TECH{n} for {n}% off',
+        f'save {n}%',
+        f'{n}% off your first order',
+        f'with NORD{n} at checkout',
+        f'"GEAR{n}" at checkout',
+    ])
+
+
+def generate_corpus(count: int, words: int, seed: int = 42) -> List[str]:
+    """
+    Generate video-description-like texts
+    
+    Args:
+        count: Number of texts
+        words: Approximate number of filler words per text
+        seed: Random seed for reproducible corpora
+    
+    Returns:
+        List of description strings
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        tokens = [rng.choice(FILLER_WORDS) for _ in range(words)]
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens) + 1), _code_snippet(rng))
+        corpus.append(' '.join(tokens))
+    return corpus
+
+
+# Tokens the code and discount patterns are built from, shuffled into word
+# soup so patterns overlap each other and themselves
+FUZZ_TOKENS = (
+    'use code promo coupon discount with using at checkout for off save '
+    'percent x : CODE: PROMO: "ABCD1" 10% 20 20% SAVE10 ABCD1 DEAL99 '
+    'NORDVPN STRASSE ß ſave ﬀ'
+).split()
+
+# Texts where one pattern's match overlaps another match of the same
+# pattern; each pattern only resumes after its own previous match
+OVERLAP_CASES = {
+    'x discount coupon : coupon percent code 20': [],
+    'promo off PROMO: ABCD1 10% CODE: CODE: percent': ['ABCD1'],
+    'use code CODE SAVE10': [],
+    'promo promo: ABCD1 and coupon code DEAL99': ['DEAL99'],
+}
+
+
+def generate_fuzz_corpus(count: int, seed: int = 7) -> List[str]:
+    """Random sequences of FUZZ_TOKENS, for checking against the original implementation"""
+    rng = random.Random(seed)
+    return [
+        ' '.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 12)))
+        for _ in range(count)
+    ]
+
+
+def legacy_extract_code_info(text: str) -> List[Dict]:
+    """Original CodeExtractor.extract_code_info, kept for comparison"""
+    codes = set()
+    if text:
+        text_upper = text.upper()
+        for pattern in CodeExtractor.PATTERNS:
+            for match in re.finditer(pattern, text_upper, re.IGNORECASE):
+                code = match.group(1).strip()
+                if CodeExtractor._is_valid_code(code):
+                    codes.add(code)
+    
+    discount_pct = legacy_extract_discount_percentage(text)
+    return [
+        {'code': code, 'discount_percentage': discount_pct, 'raw_text': text[:200]}
+        for code in codes
+    ]
+
+
+def legacy_extract_discount_percentage(text: str) -> Optional[float]:
+    """Original CodeExtractor.extract_discount_percentage, kept for comparison"""
+    if text:
+        for pattern in CodeExtractor.DISCOUNT_PATTERNS:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def _time(func, corpus: List[str], repeat: int) -> float:
+    """Return the best wall-clock time of func over the corpus"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(corpus)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(texts: int = 5000, words: int = 150, repeat: int = 3) -> Dict:
+    """
+    Run the benchmark
+    
+    Returns:
+        Dict with timings (seconds) and throughput (texts/second)
+    """
+    corpus = generate_corpus(texts, words)
+    
+    # Sanity check: both implementations must agree, including on word soup
+    # where patterns overlap
+    for text, expected in OVERLAP_CASES.items():
+        assert CodeExtractor.extract_codes_from_text(text) == expected, text
+    for text in corpus + generate_fuzz_corpus(texts * 10):
+        legacy = legacy_extract_code_info(text)
+        current = CodeExtractor.extract_code_info(text)
+        assert sorted(c['code'] for c in legacy) == sorted(c['code'] for c in current), text
+        assert legacy_extract_discount_percentage(text) == \
+            CodeExtractor.extract_discount_percentage(text), text
+    fuzz = generate_fuzz_corpus(texts) + list(OVERLAP_CASES) + ['', 'ſave 10%', 'use code ']
+    for batch in (corpus, fuzz):
+        assert CodeExtractor.extract_code_info_many(batch) == \
+            [CodeExtractor.extract_code_info(t) for t in batch]
+    
+    legacy_time = _time(
+        lambda texts: [legacy_extract_code_info(t) for t in texts], corpus, repeat
+    )
+    current_time = _time(
+        lambda texts: [CodeExtractor.extract_code_info(t) for t in texts], corpus, repeat
+    )
+    batch_time = _time(CodeExtractor.extract_code_info_many, corpus, repeat)
+    
+    return {
+        'texts': texts,
+        'legacy_seconds': legacy_time,
+        'current_seconds': current_time,
+        'legacy_texts_per_second': texts / legacy_time,
+        'batch_seconds': batch_time,
+        'current_texts_per_second': texts / current_time,
+        'batch_texts_per_second': texts / batch_time,
+        'speedup': legacy_time / current_time,
+        'batch_speedup': legacy_time / batch_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--texts', type=int, default=5000)
+    parser.add_argument('--words', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    result = run(args.texts, args.words, args.repeat)
+    print(f"Corpus: {result['texts']} descriptions")
+    print(f"Legacy:  {result['legacy_texts_per_second']:,.0f} texts/s")
+    print(f"Current: {result['current_texts_per_second']:,.0f} texts/s")
+    print(f"Batch:   {result['batch_texts_per_second']:,.0f} texts/s")
+    print(f"Speedup: {result['speedup']:.2f}x (batch {result['batch_speedup']:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
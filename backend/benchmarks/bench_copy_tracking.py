@@ -0,0 +1,99 @@
+"""
+Load test /api/codes/copy with and without the write-behind copy buffer
+
+Concurrent clients post copy events for a set of codes through the Flask
+test client against a temporary SQLite database. Reports the sustained
+request rate for each mode and checks that no increments were lost.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_copy_tracking [--clicks 5000] [--threads 8]
+"""
+import argparse
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import func
+
+from models.code import db, Code
+from models.code_store import CodeStore
+from benchmarks.bench_upsert import generate_codes
+from benchmarks.common import temp_app
+
+
+def _load_test(flush_interval: float, clicks: int, threads: int, codes: int) -> Dict:
+    """Run one load test against a fresh database"""
+    with temp_app(COPY_FLUSH_INTERVAL=flush_interval) as app:
+        stored = CodeStore.upsert_codes('bench', [
+            dict(code, uses_count=0) for code in generate_codes(codes)
+        ])
+        db.session.commit()
+        code_ids = [code['id'] for code in stored]
+        
+        errors = []
+        per_thread = clicks // threads
+        
+        def client(offset: int):
+            test_client = app.test_client()
+            for i in range(per_thread):
+                code_id = code_ids[(offset + i) % len(code_ids)]
+                response = test_client.post('/api/codes/copy', json={'code_id': code_id})
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+        
+        workers = [threading.Thread(target=client, args=(t,)) for t in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        
+        counter = app.extensions['copy_counter']
+        counter.stop()
+        stats = counter.stats()
+        total = db.session.query(func.sum(Code.uses_count)).scalar()
+    
+    sent = per_thread * threads
+    return {
+        'flush_interval': flush_interval,
+        'clicks': sent,
+        'seconds': elapsed,
+        'requests_per_second': sent / elapsed,
+        'db_transactions': stats['flushes'],
+        'errors': len(errors),
+        'lost_increments': sent - len(errors) - (total or 0),
+    }
+
+
+def run(clicks: int = 5000, threads: int = 8, codes: int = 50,
+        flush_interval: float = 1.0) -> Dict:
+    """
+    Run the load test in write-through mode and with the buffer
+    
+    Returns:
+        Dict with one result per mode
+    """
+    return {
+        'write_through': _load_test(0, clicks, threads, codes),
+        'buffered': _load_test(flush_interval, clicks, threads, codes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clicks', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--codes', type=int, default=50)
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    args = parser.parse_args()
+    
+    results = run(args.clicks, args.threads, args.codes, args.flush_interval)
+    for mode, result in results.items():
+        print(f"{mode:>13}: {result['requests_per_second']:,.0f} req/s, "
+              f"{result['db_transactions']} write transactions, "
+              f"{result['errors']} errors, {result['lost_increments']} lost increments")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark the coupon site scraper against saved HTML fixtures
+
+Serves benchmarks/fixtures/coupons from a local HTTP server and:
+- checks that every site parser extracts the expected codes from its fixture
+- times parsing a large page with the compiled lxml/XPath site parser
+  versus the same extraction with BeautifulSoup's default html.parser
+  (skipped if beautifulsoup4 isn't installed)
+- times scraping all sites with CouponScraper (shared keep-alive session,
+  sites fetched concurrently) versus one new connection per site, fetched
+  one after another, and counts the TCP connections each opens
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_coupon_sites [--latency 0.05] [--iterations 20]
+"""
+import argparse
+import json
+import os
+from typing import Dict, List
+
+import requests
+from lxml import html as lxml_html
+
+from scrapers.coupon_scraper import CouponScraper
+from scrapers.coupon_sites import CouponSite, CouponDBSite, RetailMeNotSite
+from benchmarks.common import measure
+from benchmarks.fixture_server import FIXTURES_DIR, serve_fixtures
+
+BRAND = 'NordVPN'
+
+# (code, source) pairs scraping the fixtures must yield, in priority order:
+# expired and malformed offers are left out, and CYBER70 (on both sites)
+# is kept from the higher priority site
+EXPECTED_CODES = [
+    ('CYBER70', 'RetailMeNot'),
+    ('SAVE15NOW', 'RetailMeNot'),
+    ('VPNDEAL25', 'CouponDB'),
+]
+
+
+def fixture_sites(base_url: str) -> List[CouponSite]:
+    """Site parsers pointed at the fixture server"""
+    return [RetailMeNotSite(base_url + '/retailmenot'), CouponDBSite(base_url + '/coupondb')]
+
+
+def check_fixtures(base_url: str) -> Dict:
+    """
+    Scrape the fixtures and compare the codes with EXPECTED_CODES
+    
+    Raises:
+        AssertionError: If a parser's output doesn't match its fixture
+    """
+    scraper = CouponScraper(sites=fixture_sites(base_url), session=requests.Session())
+    codes = scraper.scrape_codes(BRAND)
+    found = [(code['code'], code['source']) for code in codes]
+    assert found == EXPECTED_CODES, f'Expected {EXPECTED_CODES}, got {found}'
+    assert all(stats['status'] == 'ok' for stats in scraper.last_scrape_stats.values())
+    
+    cyber70 = next(code for code in codes if code['code'] == 'CYBER70')
+    assert cyber70['source'] == 'RetailMeNot' and cyber70['status'] == 'verified'
+    assert cyber70['discount_percentage'] == 70.0 and cyber70['uses_count'] == 3421
+    
+    # A brand a site doesn't list is a 404, not an error
+    assert scraper.scrape_codes('No Such Brand') == []
+    assert all(stats['status'] == 'ok' for stats in scraper.last_scrape_stats.values())
+    return {'codes': len(codes), 'ok': True}
+
+
+def _large_page(repeat: int) -> bytes:
+    """The RetailMeNot fixture with its offer list repeated"""
+    path = os.path.join(FIXTURES_DIR, 'retailmenot', 'view', 'nordvpn.com.html')
+    with open(path, encoding='utf-8') as f:
+        page = f.read()
+    start = page.index('<ul class="offer-list">') + len('<ul class="offer-list">')
+    end = page.index('</ul>', start)
+    return (page[:start] + page[start:end] * repeat + page[end:]).encode()
+
+
+def bs4_parse(page: bytes) -> List[Dict]:
+    """
+    RetailMeNotSite.parse's extraction written with BeautifulSoup, for comparison
+    
+    Raises:
+        ImportError: If beautifulsoup4 isn't installed
+    """
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(page, 'html.parser')
+    codes = []
+    for offer in soup.select('[data-offer-type="code"][data-code]'):
+        title = offer.select_one('.offer-title')
+        uses = offer.select_one('.offer-uses')
+        codes.append({
+            'code': offer['data-code'].strip().upper(),
+            'discount_description': ' '.join(title.get_text().split()) if title else None,
+            'status': 'verified' if offer.get('data-verified') == 'true' else 'unverified',
+            'uses_count': CouponSite._parse_int(uses.get_text() if uses else ''),
+        })
+    return codes
+
+
+def run(latency: float = 0.05, iterations: int = 20, offers: int = 500) -> Dict:
+    """
+    Run the coupon scraper benchmarks
+    
+    Args:
+        latency: Simulated seconds per page request
+        iterations: Scrapes or parses per measurement
+        offers: Approximate offers on the page used for parse timing
+    
+    Returns:
+        Dict with the fixture check and latency summaries ('parse_bs4' is
+        None if beautifulsoup4 isn't installed)
+    """
+    page = _large_page(max(1, offers // 5))
+    site = RetailMeNotSite()
+    results = {
+        'latency_seconds': latency,
+        'parse_offers': len(site.OFFERS(lxml_html.fromstring(page))),
+        'parse_lxml': measure(lambda: site.parse(page, 'bench'), iterations),
+        'parse_bs4': None,
+    }
+    try:
+        results['parse_bs4'] = measure(lambda: bs4_parse(page), iterations)
+        results['parse_speedup'] = results['parse_bs4']['mean_ms'] / results['parse_lxml']['mean_ms']
+    except ImportError:
+        print("[bench] beautifulsoup4 not installed; skipping the BeautifulSoup comparison")
+    
+    with serve_fixtures(latency=latency) as server:
+        results['fixtures'] = check_fixtures(server.url)
+        sites = fixture_sites(server.url)
+        
+        def unpooled_sequential():
+            for fixture_site in sites:
+                url = fixture_site.url(BRAND)
+                response = requests.get(url, timeout=5, headers={'Connection': 'close'})
+                fixture_site.parse(response.content, url)
+        
+        connections = server.connections
+        results['unpooled_sequential'] = measure(unpooled_sequential, iterations, warmup=1)
+        results['unpooled_connections'] = server.connections - connections
+        
+        scraper = CouponScraper(sites=sites, session=requests.Session())
+        connections = server.connections
+        results['pooled_concurrent'] = measure(lambda: scraper.scrape_codes(BRAND), iterations, warmup=1)
+        results['pooled_connections'] = server.connections - connections
+    
+    results['fetch_speedup'] = (
+        results['unpooled_sequential']['mean_ms'] / results['pooled_concurrent']['mean_ms']
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--offers', type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.latency, args.iterations, args.offers), indent=2))
+
+
+if __name__ == '__main__':
+    main()
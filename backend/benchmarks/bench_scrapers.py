@@ -0,0 +1,95 @@
+"""
+Benchmark the scrapers offline against stub upstreams with simulated latency
+
+Measures YouTubeScraper (against StubYouTubeClient) with and without a warm
+response cache and as incremental refreshes from a high-water mark,
+CouponScraper, and the concurrent ScrapeOrchestrator versus
+running the same sources one by one.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_scrapers [--latency 0.05] [--iterations 10]
+"""
+import argparse
+import json
+import os
+import tempfile
+from typing import Dict
+
+from scrapers.coupon_scraper import CouponScraper
+from scrapers.orchestrator import ScrapeOrchestrator
+from scrapers.youtube_scraper import YouTubeScraper
+from services.disk_cache import DiskCache
+from benchmarks.common import measure
+from benchmarks.stubs import DelayedScraper, StubYouTubeClient
+
+BRAND = 'nordvpn'
+
+
+def run(latency: float = 0.05, iterations: int = 10, max_results: int = 30,
+        new_videos: int = 5) -> Dict:
+    """
+    Run the scraper benchmarks
+
+    Args:
+        latency: Simulated seconds per upstream request
+        iterations: Scrapes per measurement
+        max_results: Videos requested per YouTube scrape
+        new_videos: Uploads per query between incremental refreshes
+
+    Returns:
+        Dict of latency summaries plus YouTube API usage per scrape
+    """
+    youtube = YouTubeScraper(client=StubYouTubeClient(latency=latency), cache=False)
+    coupons = DelayedScraper(CouponScraper(), latency=latency)
+
+    results = {
+        'latency_seconds': latency,
+        'youtube': measure(lambda: youtube.scrape_codes(BRAND, max_results), iterations, warmup=1),
+        'coupons': measure(lambda: coupons.scrape_codes(BRAND), iterations, warmup=1),
+        'sequential_sources': measure(
+            lambda: [youtube.scrape_codes(BRAND), coupons.scrape_codes(BRAND)],
+            iterations, warmup=1
+        ),
+    }
+    results['youtube_api_usage'] = dict(youtube.last_scrape_stats)
+
+    orchestrator = ScrapeOrchestrator([youtube, coupons])
+    results['orchestrated_sources'] = measure(
+        lambda: orchestrator.scrape(BRAND), iterations, warmup=1
+    )
+    
+    # Repeat scrapes served from the on-disk response cache (warmed by warmup)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = DiskCache(os.path.join(tmpdir, 'youtube_cache.db'))
+        cached_youtube = YouTubeScraper(client=StubYouTubeClient(latency=latency), cache=cache)
+        results['youtube_warm_cache'] = measure(
+            lambda: cached_youtube.scrape_codes(BRAND, max_results), iterations, warmup=1
+        )
+        results['youtube_warm_cache_api_usage'] = dict(cached_youtube.last_scrape_stats)
+    
+    # Recurring refreshes from the previous scrape's high-water mark, with a
+    # few new uploads in between
+    client = StubYouTubeClient(latency=latency)
+    incremental = YouTubeScraper(client=client, cache=False)
+    incremental.scrape_codes(BRAND, max_results)
+    
+    def refresh():
+        incremental.watermark = incremental.next_watermark or incremental.watermark
+        client.publish(new_videos)
+        incremental.scrape_codes(BRAND, max_results)
+    
+    results['youtube_incremental'] = measure(refresh, iterations, warmup=1)
+    results['youtube_incremental_api_usage'] = dict(incremental.last_scrape_stats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.latency, args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
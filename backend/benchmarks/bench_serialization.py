@@ -0,0 +1,83 @@
+"""
+Benchmark serializing large code result sets: ORM objects vs Core rows
+
+Seeds a temporary SQLite database and compares, on the same rows:
+- orm: hydrate Code objects, call to_dict() on each, encode with Flask's JSON
+- core: select plain row tuples, zip them into dicts, encode with
+  services.fast_json (orjson when installed)
+- core_stdlib: the core path forced onto the standard library encoder
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization [--rows 100000] [--iterations 5]
+"""
+import argparse
+import json
+from typing import Dict
+
+from flask import current_app
+from sqlalchemy import select
+
+from models.code import db, Code
+from services import fast_json
+from benchmarks.bench_api import seed_database
+from benchmarks.common import measure, temp_app
+
+
+def _orm_body() -> bytes:
+    codes = Code.query.all()
+    body = current_app.json.dumps({'codes': [code.to_dict() for code in codes]})
+    db.session.expunge_all()
+    return body.encode()
+
+
+def _core_body() -> bytes:
+    table = Code.__table__
+    rows = db.session.execute(select(*(table.c[name] for name in Code.API_FIELDS))).all()
+    return fast_json.dumps({'codes': [dict(zip(Code.API_FIELDS, row)) for row in rows]})
+
+
+def run(rows: int = 100000, iterations: int = 5) -> Dict:
+    """
+    Run the serialization benchmark
+    
+    Args:
+        rows: Code rows to seed and serialize per call
+        iterations: Measured calls per path
+    
+    Returns:
+        Dict of latency summaries per path and the core path's speedup
+    """
+    with temp_app() as app:
+        seed_database(rows)
+        
+        # Both paths must produce the same document
+        assert json.loads(_orm_body()) == json.loads(_core_body())
+        
+        results = {
+            'rows': rows,
+            'orjson': fast_json.orjson is not None,
+            'orm': measure(_orm_body, iterations, warmup=1),
+            'core': measure(_core_body, iterations, warmup=1),
+        }
+        
+        orjson, fast_json.orjson = fast_json.orjson, None
+        try:
+            results['core_stdlib'] = measure(_core_body, iterations, warmup=1)
+        finally:
+            fast_json.orjson = orjson
+    
+    results['core_speedup'] = results['orm']['mean_ms'] / results['core']['mean_ms']
+    results['core_stdlib_speedup'] = results['orm']['mean_ms'] / results['core_stdlib']['mean_ms']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
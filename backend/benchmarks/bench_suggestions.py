@@ -0,0 +1,244 @@
+"""
+Benchmark warming AI suggestions one brand per prompt vs batched prompts
+
+Uses a local fake Gemini model (no API calls). The per-brand mode calls
+AISuggester.get_suggestions for each brand; the batch mode runs
+prefetch_suggestions, which sends SUGGESTION_BATCH_SIZE brands per prompt
+and retries only the brands a response left out. Reports prompt calls,
+prompt characters and wall time.
+
+The deadline scenario requests /api/suggestions while a slow, streaming
+model is generating: the request should answer at SUGGESTION_DEADLINE with
+the suggestions streamed so far, and the next request should be served
+from the cache the background job filled.
+
+The cache lookup scenario times the /api/suggestions cache check on a
+table holding many earlier generations per brand, with and without the
+ix_ai_suggestions_brand_key_fresh index.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_suggestions [--brands 200] [--batch-size 10]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+from unittest import mock
+
+from sqlalchemy import func, select, text
+
+from ai.suggester import AISuggester
+from models.brand import BrandIndex
+from models.code import db, normalize_brand
+from models.schema import upgrade_suggestions_table
+from models.suggestion import AISuggestion
+from routes import suggestions as suggestions_routes
+from services.suggestion_service import prefetch_suggestions, store_suggestions
+from benchmarks.common import measure, temp_app
+from benchmarks.stubs import FakeGeminiModel
+
+
+def _warm(brands: int, batch_size: int, skip_every: int, latency: float,
+          latency_per_brand: float, batched: bool) -> Dict:
+    """Warm suggestions for generated brands on a fresh database"""
+    names = [f'Brand {i:05d}' for i in range(brands)]
+    model = FakeGeminiModel(skip_every=skip_every, latency=latency,
+                            latency_per_brand=latency_per_brand)
+    suggester = AISuggester(model=model)
+    
+    with temp_app():
+        start = time.perf_counter()
+        if batched:
+            report = prefetch_suggestions(names, batch_size, suggester)
+        else:
+            for name in names:
+                store_suggestions(name, suggester.get_suggestions(name))
+                db.session.commit()
+            report = {'failed': []}
+        elapsed = time.perf_counter() - start
+        
+        stored_brands = db.session.execute(
+            select(func.count(func.distinct(AISuggestion.brand_key)))
+        ).scalar()
+    
+    return {
+        'api_calls': len(model.prompts),
+        'prompt_chars': sum(len(prompt) for prompt in model.prompts),
+        'seconds': elapsed,
+        'brands_stored': stored_brands,
+        'failed': len(report['failed']),
+    }
+
+
+def run_deadline(latency: float = 1.0, deadline: float = 0.5) -> Dict:
+    """
+    Time a suggestions request whose model call outlives the deadline
+    
+    Args:
+        latency: Simulated seconds for the whole streamed model response
+        deadline: SUGGESTION_DEADLINE for the app
+    
+    Returns:
+        Dict with the first and follow-up request latencies and sources
+    """
+    model = FakeGeminiModel(suggestions_per_brand=5, latency=latency)
+    with temp_app(SUGGESTION_DEADLINE=deadline) as app, \
+            mock.patch.object(suggestions_routes, 'AISuggester', lambda: AISuggester(model=model)):
+        client = app.test_client()
+        
+        start = time.perf_counter()
+        first = client.get('/api/suggestions?brand=Slow Brand').get_json()
+        first_seconds = time.perf_counter() - start
+        
+        # Let the background job finish and store its suggestions
+        while app.extensions['suggestion_generator'].stats()['in_flight']:
+            time.sleep(0.01)
+        
+        start = time.perf_counter()
+        second = client.get('/api/suggestions?brand=Slow Brand').get_json()
+        second_seconds = time.perf_counter() - start
+        jobs = app.extensions['suggestion_generator'].stats()
+    
+    return {
+        'model_seconds': latency,
+        'deadline_seconds': deadline,
+        'first_request': {
+            'seconds': first_seconds,
+            'source': first.get('source'),
+            'pending': first.get('pending', False),
+            'suggestions': len(first['suggestions']),
+        },
+        'next_request': {
+            'seconds': second_seconds,
+            'cached': second['cached'],
+            'suggestions': len(second['suggestions']),
+        },
+        'completed_after_deadline': jobs['completed_after_deadline'],
+    }
+
+
+def run_cache_lookup(brands: int = 1000, generations: int = 50,
+                     iterations: int = 500) -> Dict:
+    """
+    Time the suggestion cache check against a long generation history
+    
+    Args:
+        brands: Brands with suggestions
+        generations: Weekly generations of 4 suggestions stored per brand;
+            only the newest is fresh
+        iterations: Lookups per measurement
+    
+    Returns:
+        Dict with the query plan, query latency and full cache check latency,
+        with and without the index
+    """
+    rng = random.Random(11)
+    names = [f'History Brand {i:05d}' for i in range(brands)]
+    now = datetime.utcnow()
+    with temp_app():
+        table = AISuggestion.__table__
+        for generation in range(generations):
+            created_at = now - timedelta(weeks=generations - 1 - generation, hours=1)
+            db.session.execute(table.insert(), [
+                {
+                    'brand': name,
+                    'brand_key': normalize_brand(name),
+                    'suggestion_type': 'student_discount',
+                    'title': f'Suggestion {j}',
+                    'description': 'Students get a discount.',
+                    'estimated_savings': float(rng.randint(1, 50)),
+                    'confidence_score': float(rng.randint(0, 100)),
+                    'verification_count': 0,
+                    'risk_level': 'safe',
+                    'created_at': created_at,
+                }
+                for name in names for j in range(4)
+            ])
+        BrandIndex.register(names)
+        db.session.commit()
+        
+        # The cache check's query alone, without resolving the brand search
+        query = text(
+            'SELECT * FROM ai_suggestions '
+            'WHERE brand_key = :key AND created_at >= :expiry '
+            'ORDER BY confidence_score DESC, estimated_savings DESC LIMIT 5'
+        )
+        expiry = now - timedelta(weeks=1)
+        
+        def query_only():
+            params = {'key': normalize_brand(rng.choice(names)), 'expiry': expiry}
+            assert db.session.execute(query, params).all()
+        
+        def lookup():
+            assert suggestions_routes._find_cached_suggestions(rng.choice(names))
+        
+        def measure_all() -> Dict:
+            return {
+                'plan': [row[-1] for row in db.session.execute(
+                    text('EXPLAIN QUERY PLAN ' + query.text), {'key': '', 'expiry': expiry}
+                )],
+                'query_only': measure(query_only, iterations),
+                'cache_check': measure(lookup, iterations),
+            }
+        
+        indexed = measure_all()
+        db.session.execute(text('DROP INDEX ix_ai_suggestions_brand_key_fresh'))
+        db.session.commit()
+        # New connections, so no statement prepared against the index is reused
+        db.session.remove()
+        db.engine.dispose()
+        unindexed = measure_all()
+        upgrade_suggestions_table()
+    
+    return {
+        'rows': brands * generations * 4,
+        'indexed': indexed,
+        'brand_key_index_only': unindexed,
+        'query_speedup': unindexed['query_only']['mean_ms'] / indexed['query_only']['mean_ms'],
+    }
+
+
+def run(brands: int = 200, batch_size: int = 10, skip_every: int = 7,
+        latency: float = 0.02, latency_per_brand: float = 0.002) -> Dict:
+    """
+    Run the suggestion warm-up benchmark
+    
+    Args:
+        brands: Brands to warm
+        batch_size: Brands per batch prompt
+        skip_every: The fake model leaves every Nth brand of a batch out once
+        latency: Simulated seconds per model call
+        latency_per_brand: Simulated extra seconds per brand in a response
+    
+    Returns:
+        Dict of results per mode plus call and prompt-size reductions
+    """
+    results = {
+        'brands': brands,
+        'batch_size': batch_size,
+        'per_brand': _warm(brands, batch_size, skip_every, latency, latency_per_brand, batched=False),
+        'batched': _warm(brands, batch_size, skip_every, latency, latency_per_brand, batched=True),
+    }
+    results['call_reduction'] = results['per_brand']['api_calls'] / results['batched']['api_calls']
+    results['prompt_chars_reduction'] = (
+        results['per_brand']['prompt_chars'] / results['batched']['prompt_chars']
+    )
+    results['speedup'] = results['per_brand']['seconds'] / results['batched']['seconds']
+    results['deadline'] = run_deadline()
+    results['cache_lookup'] = run_cache_lookup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--brands', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--skip-every', type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args.brands, args.batch_size, args.skip_every), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark searching a codes table full of dead codes, before and after a sweep
+
+Seeds the bench_api catalog, makes most codes long-unseen, and measures
+cold /api/codes/search latency, then runs the CodeSweeper (reporting its
+time and throughput) and measures the same searches on the swept table.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sweeper [--codes 100000] [--dead 0.8]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import func, select
+
+from models.code import db, Code
+from services.response_cache import code_search_cache
+from benchmarks.bench_api import seed_database
+from benchmarks.common import measure, temp_app
+
+
+def run(codes: int = 100000, dead: float = 0.8, iterations: int = 200,
+        batch_size: int = 500) -> Dict:
+    """
+    Run the benchmark
+    
+    Args:
+        codes: Codes in the catalog
+        dead: Fraction of codes last seen before the expiry cutoff
+        iterations: Searches per measurement
+        batch_size: Rows per sweep transaction
+    
+    Returns:
+        Dict with search latency before and after the sweep and sweep stats
+    """
+    with temp_app(CODE_SWEEP_BATCH_SIZE=batch_size) as app:
+        brands = seed_database(codes)
+        table = Code.__table__
+        long_ago = datetime.utcnow() - timedelta(hours=app.config['CODE_EXPIRE_AFTER'] + 1)
+        db.session.execute(
+            table.update()
+            .where(table.c.id % 100 < int(dead * 100))
+            .values(last_seen_at=long_ago)
+        )
+        db.session.commit()
+        
+        client = app.test_client()
+        
+        def search_cold(rng: random.Random):
+            code_search_cache.clear()
+            response = client.get('/api/codes/search', query_string={'brand': rng.choice(brands)})
+            assert response.status_code == 200
+        
+        rng = random.Random(7)
+        before = measure(lambda: search_cold(rng), iterations)
+        
+        sweeper = app.extensions['code_sweeper']
+        start = time.perf_counter()
+        result = sweeper.sweep()
+        sweep_seconds = time.perf_counter() - start
+        remaining = db.session.execute(select(func.count()).select_from(table)).scalar()
+        
+        rng = random.Random(7)
+        after = measure(lambda: search_cold(rng), iterations)
+    
+    return {
+        'codes': codes,
+        'dead_fraction': dead,
+        'sweep': dict(result, seconds=sweep_seconds, rows_per_second=result['scanned'] / sweep_seconds),
+        'hot_rows_after': remaining,
+        'search_cold_before': before,
+        'search_cold_after': after,
+        'search_speedup': before['mean_ms'] / after['mean_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--codes', type=int, default=100000)
+    parser.add_argument('--dead', type=float, default=0.8)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.dead, args.iterations), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Benchmark storing scraped codes: bulk upsert vs the original per-code loop
+
+Seeds a temporary SQLite database with half of the codes, then stores the
+full batch (so half are updates and half are inserts) with each strategy.
+
+The re-scrape scenario stores a brand's codes again with only a few of them
+changed, once rewriting every row (the upsert before content hashes) and
+once with change detection, and reports time and rows written.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_upsert [--codes 10000]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.code import db, Code
+from models.code_store import CodeStore
+from benchmarks.common import temp_app
+
+
+def generate_codes(count: int, prefix: str = 'BENCH') -> List[Dict]:
+    """Generate scraper-style code dicts"""
+    now = datetime.utcnow()
+    return [
+        {
+            'code': f'{prefix}{i:07d}',
+            'discount_percentage': float(i % 90 + 5),
+            'discount_description': f'{i % 90 + 5}% off',
+            'source': 'YouTube' if i % 2 else 'RetailMeNot',
+            'source_url': f'https://www.youtube.com/watch?v={i}',
+            'source_creator': f'Creator {i % 50}',
+            'status': 'unverified',
+            'date_found': now,
+            'uses_count': i % 100,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_store(brand_name: str, all_codes: List[Dict]) -> List[Dict]:
+    """Original /api/scrape storage loop, kept for comparison"""
+    stored_codes = []
+    for code_data in all_codes:
+        existing_code = Code.query.filter_by(code=code_data['code']).first()
+        if existing_code:
+            existing_code.brand = brand_name
+            existing_code.discount_percentage = code_data.get('discount_percentage')
+            existing_code.discount_description = code_data.get('discount_description')
+            existing_code.source = code_data['source']
+            existing_code.source_url = code_data.get('source_url')
+            existing_code.source_creator = code_data.get('source_creator')
+            existing_code.status = code_data.get('status', 'unverified')
+            existing_code.date_found = code_data.get('date_found', datetime.utcnow())
+            existing_code.uses_count = code_data.get('uses_count', 0)
+            stored_codes.append(existing_code)
+        else:
+            new_code = Code(
+                brand=brand_name,
+                code=code_data['code'],
+                discount_percentage=code_data.get('discount_percentage'),
+                discount_description=code_data.get('discount_description'),
+                source=code_data['source'],
+                source_url=code_data.get('source_url'),
+                source_creator=code_data.get('source_creator'),
+                status=code_data.get('status', 'unverified'),
+                date_found=code_data.get('date_found', datetime.utcnow()),
+                uses_count=code_data.get('uses_count', 0)
+            )
+            db.session.add(new_code)
+            stored_codes.append(new_code)
+    db.session.commit()
+    return [code.to_dict() for code in stored_codes]
+
+
+def bulk_store(brand_name: str, all_codes: List[Dict]) -> List[Dict]:
+    """Current /api/scrape storage path"""
+    stored = CodeStore.upsert_codes(brand_name, all_codes)
+    db.session.commit()
+    return stored
+
+
+def rewrite_store(brand_name: str, all_codes: List[Dict]) -> List[Dict]:
+    """Bulk upsert that rewrites every existing row, as before content hashes"""
+    rows = CodeStore._prepare_rows(brand_name, all_codes)
+    columns = (
+        'brand', 'brand_key', 'discount_percentage', 'discount_description', 'source',
+        'source_url', 'source_creator', 'status', 'date_found', 'uses_count',
+        'last_seen_at', 'content_hash'
+    )
+    stmt = sqlite_insert(Code)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Code.code],
+        set_={column: stmt.excluded[column] for column in columns}
+    ).returning(*Code.__table__.columns, sort_by_parameter_order=True)
+    stored = []
+    for start in range(0, len(rows), CodeStore.CHUNK_SIZE):
+        result = db.session.execute(stmt, rows[start:start + CodeStore.CHUNK_SIZE])
+        stored.extend(Code.row_to_dict(row) for row in result)
+    db.session.commit()
+    return stored
+
+
+def _rows_written() -> int:
+    """Rows inserted, updated or deleted so far on this session's SQLite connection"""
+    return db.session.connection().connection.driver_connection.total_changes
+
+
+def _time_rescrape(store, codes: List[Dict], changed_every: int) -> Dict:
+    """Time storing a re-scrape of already stored codes"""
+    rescraped = [
+        dict(code, discount_percentage=code['discount_percentage'] + 1) if i % changed_every == 0 else code
+        for i, code in enumerate(codes)
+    ]
+    with temp_app():
+        CodeStore.upsert_codes('bench', codes)
+        db.session.commit()
+        db.session.expunge_all()
+        
+        written_before = _rows_written()
+        start = time.perf_counter()
+        stored = store('bench', rescraped)
+        elapsed = time.perf_counter() - start
+        written = _rows_written() - written_before
+        
+        assert len(stored) == len(codes)
+    return {'seconds': elapsed, 'rows_written': written}
+
+
+def run_rescrape(codes: int = 10000, changed_every: int = 20) -> Dict:
+    """
+    Store a re-scrape in which one code in changed_every has changed
+    
+    Returns:
+        Dict with time and rows written for each strategy
+    """
+    data = generate_codes(codes)
+    rewrite = _time_rescrape(rewrite_store, data, changed_every)
+    detect = _time_rescrape(bulk_store, data, changed_every)
+    return {
+        'codes': codes,
+        'changed': len(range(0, codes, changed_every)),
+        'rewrite_all': rewrite,
+        'change_detecting': detect,
+        'speedup': rewrite['seconds'] / detect['seconds'],
+    }
+
+
+def _time_strategy(store, codes: List[Dict]) -> float:
+    """Time one strategy against a freshly seeded database"""
+    with temp_app():
+        CodeStore.upsert_codes('seed', codes[::2])
+        db.session.commit()
+        db.session.expunge_all()
+        
+        start = time.perf_counter()
+        stored = store('bench', codes)
+        elapsed = time.perf_counter() - start
+        
+        assert len(stored) == len(codes)
+        assert db.session.query(Code).count() == len(codes)
+    return elapsed
+
+
+def run(codes: int = 10000) -> Dict:
+    """
+    Run the benchmark
+    
+    Returns:
+        Dict with timings (seconds) and rows per second for each strategy
+    """
+    data = generate_codes(codes)
+    legacy_time = _time_strategy(legacy_store, data)
+    bulk_time = _time_strategy(bulk_store, data)
+    return {
+        'codes': codes,
+        'legacy_seconds': legacy_time,
+        'bulk_seconds': bulk_time,
+        'legacy_rows_per_second': codes / legacy_time,
+        'bulk_rows_per_second': codes / bulk_time,
+        'speedup': legacy_time / bulk_time,
+        'rescrape': run_rescrape(codes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--codes', type=int, default=10000)
+    args = parser.parse_args()
+    
+    result = run(args.codes)
+    print(f"Upserting {result['codes']} codes (half existing)")
+    print(f"Legacy loop: {result['legacy_seconds']:.2f}s "
+          f"({result['legacy_rows_per_second']:,.0f} rows/s)")
+    print(f"Bulk upsert: {result['bulk_seconds']:.2f}s "
+          f"({result['bulk_rows_per_second']:,.0f} rows/s)")
+    print(f"Speedup: {result['speedup']:.1f}x")
+    
+    rescrape = result['rescrape']
+    print(f"Re-scrape with {rescrape['changed']} of {rescrape['codes']} codes changed")
+    for name in ('rewrite_all', 'change_detecting'):
+        print(f"{name:>16}: {rescrape[name]['seconds']:.2f}s, "
+              f"{rescrape[name]['rows_written']} rows written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark SuggestionValidator keyword screening on large keyword lists
+
+Compares the old per-suggestion substring loop (one ``in`` check per
+keyword) with the indexed whole-word matcher, both per suggestion
+(_assess_risk) and for a whole batch (validate_suggestions), and counts
+suggestions the substring loop flags only because a keyword is part of a
+longer word. One in 20 generated suggestions contains a risky keyword
+(half of them a multi-word one) and one in 20 a harmless look-alike word.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_validator [--suggestions 5000] [--keywords 15 100 200 1000]
+"""
+import argparse
+import json
+import random
+from typing import Dict, List
+
+from ai.validator import SuggestionValidator
+from benchmarks.common import measure
+
+WORDS = (
+    'save', 'plan', 'trial', 'student', 'family', 'annual', 'monthly', 'discount',
+    'offer', 'account', 'members', 'share', 'season', 'sale', 'credit', 'refer',
+    'friends', 'reminder', 'cancel', 'price', 'payment', 'renew', 'the', 'with'
+)
+
+# Harmless words containing a risky keyword
+LOOKALIKES = ('exploited', 'cheater', 'hacker', 'fakes')
+
+
+def _substring_risk(suggestion: Dict, keywords: List[str]) -> str:
+    """SuggestionValidator._assess_risk before the compiled matcher"""
+    suggestion_type = suggestion.get('type', '').lower()
+    risk = 'safe' if suggestion_type in SuggestionValidator.SAFE_TYPES else 'medium'
+    text = (
+        suggestion.get('description', '') + ' ' +
+        suggestion.get('title', '') + ' ' +
+        suggestion.get('pro_tip', '')
+    ).lower()
+    for keyword in keywords:
+        if keyword in text:
+            return 'high'
+    return risk
+
+
+def _substring_validate(suggestions: List[Dict], keywords: List[str]) -> List[Dict]:
+    """SuggestionValidator.validate_suggestions before batch screening"""
+    validated = []
+    for suggestion in suggestions:
+        risk_level = _substring_risk(suggestion, keywords)
+        suggestion['risk'] = risk_level
+        suggestion['is_safe'] = risk_level == 'safe'
+        if suggestion['is_safe']:
+            validated.append(suggestion)
+    return validated
+
+
+def generate_suggestions(count: int, seed: int = 42) -> List[Dict]:
+    """Suggestion dicts with random text, some containing risky words"""
+    rng = random.Random(seed)
+    
+    def sentence(words: int) -> str:
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+    
+    suggestions = []
+    for i in range(count):
+        suggestion = {
+            'type': rng.choice(sorted(SuggestionValidator.SAFE_TYPES)),
+            'title': sentence(4),
+            'description': sentence(30),
+            'pro_tip': sentence(10)
+        }
+        if i % 40 == 0:
+            suggestion['pro_tip'] += ' Use a fake account.'
+        elif i % 40 == 20:
+            suggestion['pro_tip'] += ' Bypass payment with this trick.'
+        elif i % 20 == 1:
+            suggestion['description'] += f' Never get {rng.choice(LOOKALIKES)} again.'
+        suggestions.append(suggestion)
+    return suggestions
+
+
+def _keywords(size: int) -> List[str]:
+    """The real keywords padded with synthetic ones up to size"""
+    keywords = list(SuggestionValidator.RISKY_KEYWORDS)
+    keywords += [f'risky{i:04d}term' for i in range(size - len(keywords))]
+    return keywords
+
+
+def run(suggestions: int = 5000, keyword_sizes: List[int] = (15, 100, 200, 1000),
+        iterations: int = 5) -> Dict:
+    """
+    Run the validator benchmark
+    
+    Returns:
+        Dict keyed by keyword count with ms per batch for each method, the
+        speedup of batch validation and the substring loop's extra flags
+    """
+    batch = generate_suggestions(suggestions)
+    original_keywords = SuggestionValidator.RISKY_KEYWORDS
+    results = {'suggestions': suggestions}
+    try:
+        for size in keyword_sizes:
+            keywords = _keywords(size)
+            SuggestionValidator.RISKY_KEYWORDS = keywords
+            
+            substring = measure(lambda: _substring_validate([dict(s) for s in batch], keywords),
+                                iterations, warmup=1)
+            per_item = measure(lambda: [SuggestionValidator._assess_risk(s) for s in batch],
+                               iterations, warmup=1)
+            batched = measure(lambda: SuggestionValidator.validate_suggestions([dict(s) for s in batch]),
+                              iterations, warmup=1)
+            
+            old_flags = sum(_substring_risk(s, keywords) == 'high' for s in batch)
+            new_flags = sum(SuggestionValidator._assess_risk(s) == 'high' for s in batch)
+            results[f'{size}_keywords'] = {
+                'substring_loop_ms': substring['mean_ms'],
+                'indexed_per_item_ms': per_item['mean_ms'],
+                'indexed_batch_ms': batched['mean_ms'],
+                'batch_speedup': substring['mean_ms'] / batched['mean_ms'],
+                'flagged_substring': old_flags,
+                'flagged_whole_word': new_flags,
+            }
+    finally:
+        SuggestionValidator.RISKY_KEYWORDS = original_keywords
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suggestions', type=int, default=5000)
+    parser.add_argument('--keywords', type=int, nargs='+', default=[15, 100, 200, 1000])
+    args = parser.parse_args()
+    print(json.dumps(run(args.suggestions, args.keywords), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Load test suggestion verification votes: read-modify-write vs event log
+
+Concurrent clients post votes on a few hot suggestions through the Flask
+test client against a temporary SQLite database. The baseline mode serves
+votes with the previous endpoint logic (load the suggestion, change its
+counters in Python, commit per vote); the other modes use
+/api/suggestions/verify, which appends votes to the event table and
+applies them with atomic UPDATEs, written through or buffered. Reports the
+sustained vote rate, write transactions and lost votes per mode.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_verification [--votes 4000] [--threads 8]
+"""
+import argparse
+import threading
+import time
+from typing import Dict
+
+from flask import jsonify, request
+from sqlalchemy import func
+
+from models.code import db
+from models.suggestion import AISuggestion
+from models.verification import SuggestionVerification
+from benchmarks.common import temp_app
+
+
+def _read_modify_write_vote():
+    """The verify endpoint before votes became events, kept as a baseline"""
+    data = request.get_json()
+    suggestion = db.session.get(AISuggestion, data['suggestion_id'])
+    if data.get('worked', True):
+        suggestion.verification_count += 1
+        suggestion.confidence_score = min(100.0, 50.0 + (suggestion.verification_count * 2))
+    else:
+        suggestion.confidence_score = max(0.0, suggestion.confidence_score - 5)
+    db.session.commit()
+    return jsonify({'success': True})
+
+
+def _load_test(mode: str, votes: int, threads: int, suggestions: int,
+               flush_interval: float) -> Dict:
+    """Run one load test against a fresh database"""
+    interval = flush_interval if mode == 'buffered' else 0
+    with temp_app(VERIFICATION_FLUSH_INTERVAL=interval) as app:
+        app.add_url_rule('/bench/verify', 'bench_verify', _read_modify_write_vote, methods=['POST'])
+        url = '/bench/verify' if mode == 'read_modify_write' else '/api/suggestions/verify'
+        
+        rows = [
+            AISuggestion(brand='bench', suggestion_type='other', title=f'Hot suggestion {i}',
+                         description='Benchmark suggestion', confidence_score=50.0,
+                         verification_count=0, failure_count=0)
+            for i in range(suggestions)
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        suggestion_ids = [row.id for row in rows]
+        
+        errors = []
+        per_thread = votes // threads
+        
+        def client(offset: int):
+            test_client = app.test_client()
+            for i in range(per_thread):
+                response = test_client.post(url, json={
+                    'suggestion_id': suggestion_ids[(offset + i) % len(suggestion_ids)],
+                    'worked': i % 4 != 0
+                })
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+        
+        workers = [threading.Thread(target=client, args=(t,)) for t in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        
+        recorder = app.extensions['verification_recorder']
+        recorder.stop()
+        stats = recorder.stats()
+        db.session.expire_all()
+        worked_total = db.session.query(func.sum(AISuggestion.verification_count)).scalar() or 0
+        events = db.session.query(func.count(SuggestionVerification.id)).scalar()
+    
+    sent = per_thread * threads
+    worked_sent = sum(i % 4 != 0 for i in range(per_thread)) * threads
+    return {
+        'mode': mode,
+        'votes': sent,
+        'seconds': elapsed,
+        'votes_per_second': sent / elapsed,
+        'db_transactions': sent - len(errors) if mode == 'read_modify_write' else stats['flushes'],
+        'events_logged': events,
+        'errors': len(errors),
+        'lost_worked_votes': worked_sent - worked_total,
+    }
+
+
+def run(votes: int = 4000, threads: int = 8, suggestions: int = 3,
+        flush_interval: float = 1.0) -> Dict:
+    """
+    Run the load test with the old endpoint, write-through and buffered
+    
+    Returns:
+        Dict with one result per mode
+    """
+    return {
+        mode: _load_test(mode, votes, threads, suggestions, flush_interval)
+        for mode in ('read_modify_write', 'write_through', 'buffered')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--votes', type=int, default=4000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--suggestions', type=int, default=3)
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    args = parser.parse_args()
+    
+    results = run(args.votes, args.threads, args.suggestions, args.flush_interval)
+    for mode, result in results.items():
+        print(f"{mode:>17}: {result['votes_per_second']:,.0f} votes/s, "
+              f"{result['db_transactions']} write transactions, "
+              f"{result['errors']} errors, {result['lost_worked_votes']} lost votes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared helpers for the benchmark suite
+"""
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Iterator
+
+from app import create_app
+from models.code import db
+
+
+@contextlib.contextmanager
+def temp_app(**config) -> Iterator:
+    """
+    Create the Flask app on a throwaway SQLite database
+    
+    Yields the app with an app context pushed. Config keys override Config.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        config.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(tmp, 'bench.db'))
+        config.setdefault('YOUTUBE_CACHE_PATH', os.path.join(tmp, 'youtube_cache.db'))
+        app = create_app(config)
+        try:
+            with app.app_context():
+                yield app
+                db.session.remove()
+                db.engine.dispose()
+        finally:
+            app.extensions['copy_counter'].stop()
+            app.extensions['verification_recorder'].stop()
+            app.extensions['code_sweeper'].stop()
+            app.extensions['refresh_scheduler'].shutdown(wait=True)
+            app.extensions['suggestion_generator'].shutdown(wait=True)
+
+
+def measure(func: Callable[[], object], iterations: int, warmup: int = 3) -> Dict:
+    """
+    Call func repeatedly and summarize per-call latency
+    
+    Returns:
+        Dict with iterations, ops_per_second and mean/p50/p95/p99/max in ms
+    """
+    for _ in range(warmup):
+        func()
+    
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    
+    samples.sort()
+    
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+    
+    return {
+        'iterations': iterations,
+        'ops_per_second': 1000 * len(samples) / sum(samples) if sum(samples) else 0.0,
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': samples[-1],
+    }
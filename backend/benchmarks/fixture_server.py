@@ -0,0 +1,113 @@
+"""
+Serve saved HTML fixtures over HTTP on localhost
+
+Coupon site parsers are exercised against pages saved under
+benchmarks/fixtures/coupons, served by a local keep-alive HTTP server so
+requests go through the real HTTP stack. A request for /site/path is
+answered with fixtures/coupons/site/path.html (404 if there is none).
+
+Usage (from the backend directory):
+    python -m benchmarks.fixture_server [--port 8765] [--latency 0.05]
+"""
+import argparse
+import contextlib
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'coupons')
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """HTTP server for a fixture directory that counts connections and requests"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, root: str, latency: float = 0.0):
+        super().__init__(address, _FixtureHandler)
+        self.root = root
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open, so clients can pool them
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # reused connection waits on the client's delayed ACK for each response
+    disable_nagle_algorithm = True
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=args[2].root, **kwargs)
+    
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+    
+    def translate_path(self, path: str) -> str:
+        return super().translate_path(path.split('?', 1)[0].rstrip('/') + '.html')
+    
+    def send_head(self):
+        self.server.count('requests')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return super().send_head()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_fixtures(root: str = FIXTURES_DIR, latency: float = 0.0, port: int = 0) -> Iterator[FixtureServer]:
+    """
+    Run a FixtureServer in a background thread
+    
+    Args:
+        root: Fixture directory
+        latency: Seconds to wait before answering each request
+        port: Port to listen on (0 picks a free one)
+    
+    Yields:
+        The running server (its base URL is ``server.url``)
+    """
+    server = FixtureServer(('127.0.0.1', port), root, latency)
+    thread = threading.Thread(target=server.serve_forever, name='fixture-server', daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    with serve_fixtures(latency=args.latency, port=args.port) as server:
+        print(f"Serving {FIXTURES_DIR} at {server.url} (Ctrl-C to stop)")
+        for site in sorted(os.listdir(FIXTURES_DIR)):
+            print(f"  {server.url}/{site}/")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
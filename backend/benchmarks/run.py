@@ -0,0 +1,208 @@
+"""
+Run the offline benchmark suite and write machine-readable results
+
+Everything runs locally: upstream APIs are replaced by stubs and the
+database is a temporary SQLite file. Results are written as JSON together
+with the git commit they were measured on, so two runs can be compared.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+    python -m benchmarks.run --only extractor,api --sizes 10000,1000000
+"""
+import argparse
+import contextlib
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+from benchmarks import (
+    bench_api,
+    bench_code_extractor,
+    bench_coupon_sites,
+    bench_copy_tracking,
+    bench_scrapers,
+    bench_serialization,
+    bench_suggestions,
+    bench_sweeper,
+    bench_upsert,
+    bench_validator,
+    bench_verification,
+)
+
+# Benchmark name -> (full run, quick run)
+SUITE = {
+    'extractor': (
+        lambda args: bench_code_extractor.run(texts=5000),
+        lambda args: bench_code_extractor.run(texts=500, repeat=1),
+    ),
+    'scrapers': (
+        lambda args: bench_scrapers.run(latency=args.latency, iterations=10),
+        lambda args: bench_scrapers.run(latency=args.latency, iterations=2),
+    ),
+    'coupon_sites': (
+        lambda args: bench_coupon_sites.run(latency=args.latency, iterations=20),
+        lambda args: bench_coupon_sites.run(latency=args.latency, iterations=3, offers=100),
+    ),
+    'upsert': (
+        lambda args: bench_upsert.run(codes=10000),
+        lambda args: bench_upsert.run(codes=1000),
+    ),
+    'copy_tracking': (
+        lambda args: bench_copy_tracking.run(clicks=5000),
+        lambda args: bench_copy_tracking.run(clicks=500),
+    ),
+    'serialization': (
+        lambda args: bench_serialization.run(rows=100000),
+        lambda args: bench_serialization.run(rows=10000, iterations=2),
+    ),
+    'suggestions': (
+        lambda args: bench_suggestions.run(brands=500),
+        lambda args: bench_suggestions.run(brands=50, latency=0.005),
+    ),
+    'validator': (
+        lambda args: bench_validator.run(suggestions=5000),
+        lambda args: bench_validator.run(suggestions=1000, keyword_sizes=[15, 1000], iterations=2),
+    ),
+    'sweeper': (
+        lambda args: bench_sweeper.run(codes=100000),
+        lambda args: bench_sweeper.run(codes=10000, iterations=20),
+    ),
+    'verification': (
+        lambda args: bench_verification.run(votes=4000),
+        lambda args: bench_verification.run(votes=400),
+    ),
+    'api': (
+        lambda args: bench_api.run(sizes=args.sizes, iterations=200),
+        lambda args: bench_api.run(sizes=[min(args.sizes)], iterations=20),
+    ),
+}
+
+# Metric name suffixes where a higher value is better; all other timing
+# metrics (*_ms, *_seconds) are better when lower
+HIGHER_IS_BETTER = ('per_second', 'speedup')
+LOWER_IS_BETTER = ('_ms', '_seconds')
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return 'unknown'
+
+
+def run_suite(names, args) -> Dict:
+    """
+    Run the selected benchmarks
+    
+    Returns:
+        Dict with 'meta' (commit, time, platform) and 'results' per benchmark
+    """
+    results = {}
+    for name in names:
+        full, quick = SUITE[name]
+        print(f"[bench] {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        # Keep app and scraper log output off stdout, which carries the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results[name] = (quick if args.quick else full)(args)
+        print(f"[bench] {name} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+
+
+def _flatten(data: Dict, prefix: str = '') -> Iterator[Tuple[str, float]]:
+    for key, value in data.items():
+        path = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, float(value)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """
+    Print timing changes between two result files
+    
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Relative change (e.g. 0.1 for 10%) reported as a regression
+    
+    Returns:
+        Number of regressions
+    """
+    old = dict(_flatten(baseline['results']))
+    regressions = 0
+    print(f"Comparing {baseline['meta']['commit']} -> {current['meta']['commit']}")
+    for path, value in _flatten(current['results']):
+        if path not in old or not old[path]:
+            continue
+        if path.endswith(HIGHER_IS_BETTER):
+            change = (value - old[path]) / old[path]
+        elif path.endswith(LOWER_IS_BETTER):
+            change = (old[path] - value) / old[path]
+        else:
+            continue
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change > threshold:
+            flag = '  improved'
+        print(f"{path:<60} {old[path]:>12.3f} -> {value:>12.3f} ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', help=f"Comma-separated subset of: {', '.join(SUITE)}")
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default 0.10)')
+    parser.add_argument('--quick', action='store_true', help='Smaller, faster runs')
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='Code counts for the API benchmark, up to 1000000')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Simulated upstream latency in seconds for scraper stubs')
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(',')]
+    
+    names = args.only.split(',') if args.only else list(SUITE)
+    unknown = [name for name in names if name not in SUITE]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+    
+    report = run_suite(names, args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
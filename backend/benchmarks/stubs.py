@@ -0,0 +1,290 @@
+"""
+Local stand-ins for upstream API clients, so scrapers can run offline in
+the benchmarks and tests
+"""
+import json
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List
+
+from scrapers.base import BaseScraper
+
+
+class _StubRequest:
+    """Mimics a googleapiclient HttpRequest: call execute() to get the response"""
+    
+    def __init__(self, client: 'StubYouTubeClient', response: Dict):
+        self._client = client
+        self._response = response
+    
+    def execute(self) -> Dict:
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        return self._response
+
+
+class _StubResource:
+    def __init__(self, list_func):
+        self.list = list_func
+
+
+class StubYouTubeClient:
+    """
+    Minimal YouTube Data API v3 client serving a plan of search results
+    
+    Supports the subset used by YouTubeScraper: ``search().list(...)`` and
+    ``videos().list(id='a,b,c', ...)``. Every request is recorded in
+    ``calls``; search calls also record the video IDs they returned.
+    Each video's description contains the code ``code_for(video_id)``.
+    
+    Searches with ``order='date'`` return the query's videos newest first,
+    honour ``publishedAfter`` and page through results with ``pageToken``;
+    ``publish()`` simulates new uploads. Searches for queries in
+    ``failing_queries`` raise, as does ``videos().list`` when
+    ``fail_videos`` is set.
+    
+    Args:
+        results: Search query -> video IDs it returns, in relevance order.
+            When omitted, each query gets a generated plan on first search
+        published: Video ID -> publishedAt (default 2024-01-01T00:00:00Z)
+        videos_per_query: Length of each generated plan
+        overlap: Fraction of each generated plan shared with other queries
+        latency: Seconds to sleep per request, to simulate network time
+    """
+    
+    DEFAULT_PUBLISHED = '2024-01-01T00:00:00Z'
+    
+    def __init__(self, results: Dict[str, List[str]] = None, published: Dict[str, str] = None,
+                 videos_per_query: int = 50, overlap: float = 0.3, latency: float = 0.0):
+        self.generate = results is None
+        self.results = {} if results is None else results
+        self.published = published or {}
+        self.videos_per_query = videos_per_query
+        self.overlap = overlap
+        self.latency = latency
+        self.calls: List[Dict] = []
+        self.failing_queries = set()
+        self.fail_videos = False
+        self._uploads = 0
+    
+    def search(self) -> _StubResource:
+        return _StubResource(self._search_list)
+    
+    def videos(self) -> _StubResource:
+        return _StubResource(self._videos_list)
+    
+    @staticmethod
+    def code_for(video_id: str) -> str:
+        """The discount code in a video's description"""
+        return f'SAVE{video_id.upper()}'
+    
+    def published_at(self, video_id: str) -> str:
+        return self.published.get(video_id, self.DEFAULT_PUBLISHED)
+    
+    def calls_to(self, method: str) -> List[Dict]:
+        """Recorded calls of one API method, e.g. 'videos.list'"""
+        return [call for call in self.calls if call['method'] == method]
+    
+    def publish(self, count: int):
+        """Add count new videos to every query searched so far"""
+        for _ in range(count):
+            # A minute apart, after the initial catalog
+            k = self._uploads
+            self._uploads += 1
+            for query, ids in self.results.items():
+                video_id = f'{zlib.crc32(query.encode()) % 10000:04d}n{k:04d}'
+                ids.append(video_id)
+                self.published[video_id] = f'2024-01-02T{k // 60 % 24:02d}:{k % 60:02d}:00Z'
+    
+    def _plan(self, q: str) -> List[str]:
+        """Generated video IDs for a query, with shared IDs spread evenly"""
+        prefix = f'{zlib.crc32(q.encode()) % 10000:04d}'
+        ids = []
+        shared = 0
+        for i in range(self.videos_per_query):
+            # Every prefix of the plan has the overlap fraction of shared IDs
+            if int((i + 1) * self.overlap) > shared:
+                ids.append(f'shared{shared:04d}')
+                shared += 1
+            else:
+                ids.append(f'{prefix}v{i:04d}')
+        return ids
+    
+    def _video(self, video_id: str) -> Dict:
+        return {
+            'id': video_id,
+            'snippet': {
+                'title': f'Video {video_id} review',
+                'description': (
+                    f'Thanks for watching! Use code {self.code_for(video_id)} for 10% off. '
+                    'Like and subscribe, links in the description below.'
+                ),
+                'channelTitle': 'Channel',
+                'publishedAt': self.published_at(video_id),
+            },
+        }
+    
+    def _search_list(self, q: str = '', maxResults: int = 5, order: str = 'relevance',
+                     publishedAfter: str = '', pageToken: str = '', **kwargs) -> _StubRequest:
+        if q not in self.results and self.generate:
+            self.results[q] = self._plan(q)
+        ids = self.results.get(q, [])
+        next_page = None
+        if order == 'date':
+            ids = sorted(ids, key=self.published_at, reverse=True)
+            if publishedAfter:
+                ids = [v for v in ids if self.published_at(v) > publishedAfter]
+            offset = int(pageToken or 0)
+            if offset + maxResults < len(ids):
+                next_page = str(offset + maxResults)
+            ids = ids[offset:offset + maxResults]
+        else:
+            ids = ids[:maxResults]
+        call = {'method': 'search.list', 'q': q, 'maxResults': maxResults, 'order': order,
+                'publishedAfter': publishedAfter, 'pageToken': pageToken, 'returned': [], **kwargs}
+        self.calls.append(call)
+        if q in self.failing_queries:
+            raise RuntimeError(f'search failed for {q!r}')
+        call['returned'] = ids
+        
+        response = {'items': [
+            {'id': {'kind': 'youtube#video', 'videoId': video_id},
+             'snippet': {'publishedAt': self.published_at(video_id)}}
+            for video_id in ids
+        ]}
+        if next_page:
+            response['nextPageToken'] = next_page
+        return _StubRequest(self, response)
+    
+    def _videos_list(self, id: str = '', **kwargs) -> _StubRequest:
+        video_ids = [v for v in id.split(',') if v]
+        self.calls.append({'method': 'videos.list', 'id': id, **kwargs})
+        if self.fail_videos:
+            raise RuntimeError('videos.list failed')
+        return _StubRequest(self, {'items': [self._video(v) for v in video_ids]})
+
+
+class DelayedScraper(BaseScraper):
+    """
+    Wrap a scraper and add a fixed delay, to simulate a slow upstream site
+    
+    Args:
+        scraper: Scraper to delegate to
+        latency: Seconds to sleep before each scrape
+    """
+    
+    def __init__(self, scraper: BaseScraper, latency: float = 0.0):
+        self.scraper = scraper
+        self.latency = latency
+        self.name = scraper.name
+        self.timeout = scraper.timeout
+    
+    def scrape_codes(self, brand_name: str) -> List[Dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.scraper.scrape_codes(brand_name)
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Local stand-in for a Gemini GenerativeModel answering AISuggester prompts
+    
+    Understands both the single-brand prompt and the batch prompt (whose
+    brands are listed as a JSON array) and answers with generated
+    suggestions. ``generate_content(prompt, stream=True)`` returns the
+    response in chunks, spreading the latency across them. Every prompt is
+    recorded in ``prompts`` and its brand list in ``batches``.
+    
+    Batch responses leave out brands in ``missing`` (never answered) and
+    ``drop_once`` (left out of the first response that asks for them). The
+    first ``fail_calls`` calls raise. Clearing ``gate`` blocks calls until
+    it is set again.
+    
+    Args:
+        suggestions_per_brand: Suggestions generated for each brand
+        skip_every: Leave every Nth brand of a batch out of the response the
+            first time it is asked for (0 = never), to exercise retries
+        latency: Seconds to sleep per call, plus latency_per_brand per brand
+        latency_per_brand: Extra seconds per brand, to simulate output tokens
+    """
+    
+    def __init__(self, suggestions_per_brand: int = 3, skip_every: int = 0,
+                 latency: float = 0.0, latency_per_brand: float = 0.0):
+        self.suggestions_per_brand = suggestions_per_brand
+        self.skip_every = skip_every
+        self.latency = latency
+        self.latency_per_brand = latency_per_brand
+        self.prompts: List[str] = []
+        self.batches: List[List[str]] = []
+        self.missing = set()
+        self.drop_once = set()
+        self.fail_calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self._skipped = set()
+        self._lock = threading.Lock()
+    
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.gate.wait(5)
+        batch = re.search(r'^(\[.*\])$', prompt, re.MULTILINE)
+        brands = json.loads(batch.group(1)) if batch else re.findall(r'service/product "([^"]+)"', prompt)[:1]
+        
+        with self._lock:
+            self.prompts.append(prompt)
+            self.batches.append(brands)
+            if len(self.batches) <= self.fail_calls:
+                raise RuntimeError('model unavailable')
+            answered = []
+            for i, brand in enumerate(brands, 1):
+                if batch and (brand in self.missing or brand in self.drop_once):
+                    continue
+                if batch and self.skip_every and i % self.skip_every == 0 and brand not in self._skipped:
+                    self._skipped.add(brand)
+                    continue
+                answered.append(brand)
+            if batch:
+                self.drop_once.difference_update(brands)
+        
+        if not batch:
+            text = json.dumps({'suggestions': self._suggestions(brands[0])}, indent=2)
+        else:
+            text = '```json\n' + json.dumps({'brands': [
+                {'brand': brand, 'suggestions': self._suggestions(brand)} for brand in answered
+            ]}) + '\n```'
+        delay = self.latency + self.latency_per_brand * len(answered)
+        
+        if stream:
+            return self._stream(text, delay)
+        if delay:
+            time.sleep(delay)
+        return _FakeResponse(text)
+    
+    def _stream(self, text: str, delay: float, chunk_size: int = 64):
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay / len(chunks))
+            yield _FakeResponse(chunk)
+    
+    def _suggestions(self, brand: str) -> List[Dict]:
+        types = ['new_account_trial', 'student_discount', 'family_plan', 'seasonal_sale', 'referral']
+        return [
+            {
+                'type': types[i % len(types)],
+                'title': f'{brand} offer {i + 1}',
+                'description': f'Sign up for {brand} and save with official promotion {i + 1}.',
+                'estimated_savings': 5.0 + i,
+                'estimated_savings_description': f'${5 + i} off',
+                'conditions': 'New customers only',
+                'pro_tip': 'Set a reminder before the offer ends',
+                'risk': 'safe'
+            }
+            for i in range(self.suggestions_per_brand)
+        ]
@@ -18,8 +18,71 @@ class Config:
     # Cache settings (in hours)
     CODE_CACHE_DURATION = 24  # Refresh codes after 24 hours
     SUGGESTION_CACHE_DURATION = 168  # Refresh AI suggestions after 7 days (168 hours)
+    CODE_SEARCH_CACHE_SIZE = 1024  # Max cached /api/codes/search responses
+    CODE_SEARCH_BATCH_MAX = 50  # Max brands per /api/codes/search/batch request
+    CODE_SEARCH_DEFAULT_LIMIT = 50  # Page size when a search has a cursor but no limit
+    CODE_SEARCH_MAX_LIMIT = 200  # Largest page a search can request
+    
+    # Coalescing of concurrent AI suggestion generation (in seconds)
+    SUGGESTION_LOCK_TTL = 120  # Lock is considered abandoned after this
+    SUGGESTION_WAIT_TIMEOUT = 60  # Max wait for another worker's result
+    
+    # Background AI suggestion generation: seconds a request waits before
+    # answering with partial, stale or generic suggestions
+    SUGGESTION_DEADLINE = float(os.getenv('SUGGESTION_DEADLINE', 8))
+    SUGGESTION_MAX_WORKERS = 4
+    SUGGESTION_MAX_IN_FLIGHT = 32  # Queued + running generation jobs
+    
+    # Batched suggestion prefetching (/api/suggestions/prefetch)
+    SUGGESTION_BATCH_SIZE = 10  # Brands per AI prompt
+    SUGGESTION_PREFETCH_MAX = 100  # Max brands per prefetch request
+    
+    # Expired codes are moved to the codes_archive table by a background
+    # sweeper. Codes expire when their expiry date passes or when no scrape
+    # has seen them for CODE_EXPIRE_AFTER hours.
+    CODE_EXPIRE_AFTER = CODE_CACHE_DURATION * 30
+    CODE_SWEEP_INTERVAL = float(os.getenv('CODE_SWEEP_INTERVAL', 3600))  # Seconds (0 = off)
+    CODE_SWEEP_BATCH_SIZE = 500  # Rows per sweep transaction
+    
+    # Seconds between flushes of buffered copy counts (0 = write immediately)
+    COPY_FLUSH_INTERVAL = float(os.getenv('COPY_FLUSH_INTERVAL', 5))
+    
+    # Seconds between flushes of buffered suggestion verification votes
+    # (0 = write immediately)
+    VERIFICATION_FLUSH_INTERVAL = float(os.getenv('VERIFICATION_FLUSH_INTERVAL', 5))
+    
+    # Latency histograms served at /api/metrics (off = no timing overhead)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # On-disk cache of YouTube API responses, shared by all worker processes
+    # (empty path disables it)
+    YOUTUBE_CACHE_PATH = os.getenv(
+        'YOUTUBE_CACHE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'youtube_cache.db')
+    )
+    YOUTUBE_CACHE_MAX_MB = 64
+    YOUTUBE_SEARCH_CACHE_TTL = 6  # Hours a search result is reused
+    YOUTUBE_VIDEO_CACHE_TTL = 24  # Hours a video's details are reused
     
     # API rate limits
     MAX_YOUTUBE_RESULTS = 30
     MAX_COUPON_RESULTS = 20
+    
+    # Coupon site scraping (scrapers/coupon_sites.py); off returns demo data
+    COUPON_SITES_ENABLED = os.getenv('COUPON_SITES_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    COUPON_REQUEST_TIMEOUT = 5  # Seconds per page request
+    COUPON_POOL_SIZE = 10  # Keep-alive connections kept per site
+
+    # Scrape orchestration: seconds each source may take before it is skipped
+    SCRAPE_SOURCE_TIMEOUT = float(os.getenv('SCRAPE_SOURCE_TIMEOUT', 10))
+    
+    # Background refresh of stale brands (stale-while-revalidate)
+    REFRESH_MAX_WORKERS = 2
+    REFRESH_MAX_IN_FLIGHT = 8  # Queued + running refreshes
+    REFRESH_BACKOFF_BASE = 60  # Seconds after a brand's first failed refresh
+    REFRESH_BACKOFF_MAX = 3600  # Cap for the exponential backoff
+    # Seconds after a successful refresh before a brand is refreshed again, so
+    # brands that stay stale after a refresh aren't re-scraped by every search
+    # (failed refreshes are retried on the backoff schedule instead)
+    REFRESH_MIN_INTERVAL = CODE_CACHE_DURATION * 3600
 
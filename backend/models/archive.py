@@ -0,0 +1,57 @@
+from datetime import datetime
+from models.code import db
+
+class ArchivedCode(db.Model):
+    """Expired code moved out of the codes table by the CodeSweeper"""
+    __tablename__ = 'codes_archive'
+    __table_args__ = (
+        # Serves a brand's archived codes, most recently archived first
+        db.Index('ix_codes_archive_brand_key_archived_at', 'brand_key', 'archived_at'),
+    )
+    
+    # Columns copied from codes when a row is archived (Code.id -> code_id)
+    COPIED_COLUMNS = (
+        'brand', 'brand_key', 'code', 'discount_percentage', 'discount_description',
+        'source', 'source_url', 'source_creator', 'status', 'date_found', 'expiry_date',
+        'uses_count', 'created_at', 'last_seen_at'
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code_id = db.Column(db.Integer, nullable=False)  # ID the code had in the codes table
+    brand = db.Column(db.String(100), nullable=False)
+    brand_key = db.Column(db.String(100), nullable=False)
+    code = db.Column(db.String(50), nullable=False, index=True)  # Not unique: a code can expire again after being re-found
+    discount_percentage = db.Column(db.Float, nullable=True)
+    discount_description = db.Column(db.String(200), nullable=True)
+    source = db.Column(db.String(50), nullable=False)
+    source_url = db.Column(db.String(500), nullable=True)
+    source_creator = db.Column(db.String(100), nullable=True)
+    status = db.Column(db.String(20), default='expired')
+    date_found = db.Column(db.DateTime, nullable=True)
+    expiry_date = db.Column(db.Date, nullable=True)
+    uses_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, nullable=True)
+    last_seen_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization (Code.to_dict() format plus archived_at)"""
+        return {
+            'id': self.code_id,
+            'brand': self.brand,
+            'code': self.code,
+            'discount_percentage': self.discount_percentage,
+            'discount_description': self.discount_description,
+            'source': self.source,
+            'source_url': self.source_url,
+            'source_creator': self.source_creator,
+            'status': self.status,
+            'date_found': self.date_found.isoformat() if self.date_found else None,
+            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
+            'uses_count': self.uses_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArchivedCode {self.code} for {self.brand}>'
@@ -0,0 +1,208 @@
+from typing import Dict, List, Iterable
+from sqlalchemy import bindparam, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.code import db, normalize_brand
+from models.schema import add_missing_columns
+
+class BrandKey(db.Model):
+    """Distinct brand keys across codes and suggestions, used for substring search"""
+    __tablename__ = 'brand_keys'
+    
+    brand_key = db.Column(db.String(100), primary_key=True)
+    
+    def __repr__(self):
+        return f'<BrandKey {self.brand_key}>'
+
+class BrandIndex:
+    """
+    Resolve a brand search to matching brand keys without scanning codes
+    
+    Exact and prefix lookups use the ``brand_key`` index directly. Substring
+    lookups go through a SQLite FTS5 trigram index over the (small) set of
+    distinct brand keys, or a LIKE over ``brand_keys`` where FTS5 is not
+    available or the query is shorter than a trigram.
+    """
+    
+    MATCH_MODES = ('substring', 'prefix', 'exact')
+    
+    # Set by install() when the FTS5 trigram table exists
+    fts_enabled = False
+    
+    # Tables carrying a brand_key column that feed the index
+    BRAND_TABLES = ('codes', 'ai_suggestions')
+    
+    @classmethod
+    def install(cls):
+        """
+        Add brand_key to existing tables and create the FTS5 index
+        
+        Must run inside an app context after ``db.create_all()``.
+        """
+        migrated = False
+        for table in cls.BRAND_TABLES:
+            if add_missing_columns(table, {'brand_key': 'VARCHAR(100)'}):
+                cls._backfill_brand_key_column(table)
+                migrated = True
+        
+        cls.fts_enabled = False
+        if db.engine.dialect.name == 'sqlite':
+            cls.fts_enabled = cls._create_fts_index()
+        
+        if migrated or not db.session.query(BrandKey).first():
+            cls._backfill_brand_keys()
+        
+        db.session.commit()
+    
+    @classmethod
+    def _backfill_brand_key_column(cls, table: str):
+        """Fill and index brand_key on a table created before it existed"""
+        rows = db.session.execute(text(f'SELECT DISTINCT brand FROM {table}')).all()
+        for (brand,) in rows:
+            db.session.execute(
+                text(f'UPDATE {table} SET brand_key = :key WHERE brand = :brand'),
+                {'key': normalize_brand(brand), 'brand': brand}
+            )
+        db.session.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_brand_key ON {table} (brand_key)'
+        ))
+    
+    @classmethod
+    def _create_fts_index(cls) -> bool:
+        """Create the trigram FTS5 table and its sync triggers (SQLite only)"""
+        try:
+            db.session.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS brand_search "
+                "USING fts5(brand_key, tokenize='trigram')"
+            ))
+        except Exception as e:
+            db.session.rollback()
+            print(f"FTS5 trigram index unavailable, using LIKE for brand search: {e}")
+            return False
+        
+        db.session.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS brand_keys_ai AFTER INSERT ON brand_keys BEGIN "
+            "INSERT INTO brand_search (rowid, brand_key) VALUES (new.rowid, new.brand_key); "
+            "END"
+        ))
+        db.session.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS brand_keys_ad AFTER DELETE ON brand_keys BEGIN "
+            "DELETE FROM brand_search WHERE rowid = old.rowid; "
+            "END"
+        ))
+        return True
+    
+    @classmethod
+    def _backfill_brand_keys(cls):
+        """Register every brand key already present in the brand tables"""
+        keys = set()
+        for table in cls.BRAND_TABLES:
+            rows = db.session.execute(text(
+                f'SELECT DISTINCT brand_key FROM {table} WHERE brand_key IS NOT NULL'
+            ))
+            keys.update(key for (key,) in rows)
+        cls.register(keys)
+    
+    @classmethod
+    def register(cls, brand_names: Iterable[str]):
+        """
+        Record brand names in the brand index (idempotent)
+        
+        Call in the same transaction as the rows that use these brands.
+        
+        Args:
+            brand_names: Raw or normalized brand names
+        """
+        keys = {normalize_brand(name) for name in brand_names}
+        keys.discard('')
+        if not keys:
+            return
+        
+        dialect = db.engine.dialect.name
+        rows = [{'brand_key': key} for key in keys]
+        if dialect in ('sqlite', 'postgresql'):
+            dialect_insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+            db.session.execute(dialect_insert(BrandKey).on_conflict_do_nothing(), rows)
+        else:
+            existing = set(db.session.execute(
+                select(BrandKey.brand_key).where(BrandKey.brand_key.in_(keys))
+            ).scalars())
+            new_rows = [row for row in rows if row['brand_key'] not in existing]
+            if new_rows:
+                db.session.execute(BrandKey.__table__.insert(), new_rows)
+    
+    @classmethod
+    def matching_keys(cls, brand_name: str, match: str = 'substring') -> List[str]:
+        """
+        Find brand keys matching a search term
+        
+        Args:
+            brand_name: Search term as entered by the user
+            match: 'substring' (default), 'prefix' or 'exact'
+        
+        Returns:
+            List of matching brand keys
+        """
+        key = normalize_brand(brand_name)
+        if not key:
+            return []
+        
+        if match == 'exact':
+            return [key]
+        
+        return list(db.session.execute(cls._match_stmt(key, match)).scalars())
+    
+    @classmethod
+    def matching_keys_many(cls, brand_names: Iterable[str],
+                           match: str = 'substring') -> Dict[str, List[str]]:
+        """
+        Find the brand keys matching each of several search terms in one query
+        
+        The per-term lookups of matching_keys are combined with UNION ALL,
+        each tagged with its term's position.
+        
+        Args:
+            brand_names: Search terms as entered by the user
+            match: 'substring' (default), 'prefix' or 'exact'
+        
+        Returns:
+            Dict of normalized search term -> list of matching brand keys
+        """
+        terms = list(dict.fromkeys(normalize_brand(name) for name in brand_names))
+        matches = {term: [] for term in terms}
+        terms = [term for term in terms if term]
+        if match == 'exact':
+            matches.update((term, [term]) for term in terms)
+            return matches
+        if not terms:
+            return matches
+        
+        tagged = []
+        for i, term in enumerate(terms):
+            subquery = cls._match_stmt(term, match).subquery()
+            tagged.append(select(literal(i).label('term'), subquery.c.brand_key))
+        for i, brand_key in db.session.execute(union_all(*tagged)):
+            matches[terms[i]].append(brand_key)
+        return matches
+    
+    @classmethod
+    def _match_stmt(cls, key: str, match: str):
+        """Statement selecting the brand_key of brands matching a normalized, non-exact term"""
+        if match == 'prefix':
+            # Range scan on the primary key instead of LIKE, so it works
+            # with any collation and always uses the index
+            return select(BrandKey.brand_key).where(
+                BrandKey.brand_key >= key,
+                BrandKey.brand_key < key + '\uffff'
+            )
+        
+        if cls.fts_enabled and len(key) >= 3:
+            phrase = '"' + key.replace('"', '""') + '"'
+            return text(
+                'SELECT brand_key FROM brand_search WHERE brand_search MATCH :phrase'
+            ).bindparams(bindparam('phrase', phrase, unique=True)).columns(brand_key=db.String)
+        
+        escaped = key.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return select(BrandKey.brand_key).where(
+            BrandKey.brand_key.like(f'%{escaped}%', escape='\\')
+        )
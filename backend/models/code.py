@@ -3,12 +3,32 @@ from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+def normalize_brand(brand_name: str) -> str:
+    """Normalize a brand name into its lookup key (lowercase, single spaces)"""
+    return ' '.join((brand_name or '').lower().split())
+
+def brand_key_default(context) -> str:
+    """Column default deriving brand_key from the row's brand on insert"""
+    return normalize_brand(context.get_current_parameters().get('brand'))
+
 class Code(db.Model):
     """Model for discount codes"""
     __tablename__ = 'codes'
+    __table_args__ = (
+        # Serves per-brand search in ranking order, including keyset pages
+        db.Index('ix_codes_brand_key_ranking', 'brand_key', 'discount_percentage', 'date_found', 'id'),
+    )
+    
+    # Keys of to_dict(), in order; clients can select a subset with fields=
+    API_FIELDS = (
+        'id', 'brand', 'code', 'discount_percentage', 'discount_description', 'source',
+        'source_url', 'source_creator', 'status', 'date_found', 'expiry_date',
+        'uses_count', 'created_at'
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     brand = db.Column(db.String(100), nullable=False, index=True)
+    brand_key = db.Column(db.String(100), nullable=False, index=True, default=brand_key_default)  # normalize_brand(brand)
     code = db.Column(db.String(50), unique=True, nullable=False)
     discount_percentage = db.Column(db.Float, nullable=True)
     discount_description = db.Column(db.String(200), nullable=True)
@@ -20,23 +40,33 @@ class Code(db.Model):
     expiry_date = db.Column(db.Date, nullable=True)
     uses_count = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # Last time a scrape returned or re-checked this code
+    content_hash = db.Column(db.String(32), nullable=True)  # CodeStore.content_hash of the source fields
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
+        return Code.row_to_dict(self)
+    
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """
+        Convert a Code object or a Core result row with the same column
+        names to a dictionary for JSON serialization
+        """
         return {
-            'id': self.id,
-            'brand': self.brand,
-            'code': self.code,
-            'discount_percentage': self.discount_percentage,
-            'discount_description': self.discount_description,
-            'source': self.source,
-            'source_url': self.source_url,
-            'source_creator': self.source_creator,
-            'status': self.status,
-            'date_found': self.date_found.isoformat() if self.date_found else None,
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
-            'uses_count': self.uses_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'id': row.id,
+            'brand': row.brand,
+            'code': row.code,
+            'discount_percentage': row.discount_percentage,
+            'discount_description': row.discount_description,
+            'source': row.source,
+            'source_url': row.source_url,
+            'source_creator': row.source_creator,
+            'status': row.status,
+            'date_found': row.date_found.isoformat() if row.date_found else None,
+            'expiry_date': row.expiry_date.isoformat() if row.expiry_date else None,
+            'uses_count': row.uses_count,
+            'created_at': row.created_at.isoformat() if row.created_at else None
         }
     
     def __repr__(self):
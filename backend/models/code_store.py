@@ -0,0 +1,243 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import List, Dict, Set
+from sqlalchemy import select, insert, update, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.code import db, Code, normalize_brand
+from models.brand import BrandIndex
+
+class CodeStore:
+    """Bulk write path for scraped codes"""
+    
+    # Rows written per statement; keeps large scrapes within driver limits
+    CHUNK_SIZE = 500
+    
+    # Columns that come from the source; content_hash is computed over them
+    HASH_COLUMNS = (
+        'brand', 'brand_key', 'discount_percentage', 'discount_description', 'source',
+        'source_url', 'source_creator', 'status', 'expiry_date'
+    )
+    
+    # Columns refreshed from the scraper when a code's content changed.
+    # date_found and uses_count are only set on insert: the first sighting
+    # stays the find date, and copies counted since then aren't overwritten.
+    UPDATE_COLUMNS = HASH_COLUMNS + ('content_hash', 'last_seen_at')
+    
+    # Unchanged codes are not written at all, except that their last_seen_at
+    # is refreshed once it is older than this (keeps staleness checks and
+    # expiry accurate to within the resolution)
+    SEEN_RESOLUTION = timedelta(hours=1)
+    
+    @classmethod
+    def upsert_codes(cls, brand_name: str, codes_data: List[Dict],
+                     chunk_size: int = None, counts: Dict = None) -> List[Dict]:
+        """
+        Insert new codes and update changed ones (matched on ``code``)
+        
+        Each chunk's existing rows are prefetched with one ``IN (...)`` query
+        and compared by content hash, so codes a re-scrape finds unchanged
+        are not rewritten. New and changed codes are written on SQLite and
+        PostgreSQL with a single
+        ``INSERT ... ON CONFLICT (code) DO UPDATE ... RETURNING`` statement,
+        elsewhere with bulk INSERT/UPDATE statements. The caller is
+        responsible for committing the session.
+        
+        Args:
+            brand_name: Brand the codes belong to
+            codes_data: Code dicts as returned by the scrapers
+            chunk_size: Rows per statement (defaults to CHUNK_SIZE)
+            counts: Optional dict to which the numbers of 'inserted',
+                'updated' and 'unchanged' codes are added
+        
+        Returns:
+            All given codes as stored, as dicts in ``Code.to_dict()``
+            format, in input order
+        """
+        if counts is None:
+            counts = {}
+        for key in ('inserted', 'updated', 'unchanged'):
+            counts.setdefault(key, 0)
+        
+        rows = cls._prepare_rows(brand_name, codes_data)
+        if not rows:
+            return []
+        
+        BrandIndex.register([brand_name])
+        
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        dialect = db.session.get_bind().dialect.name
+        
+        stored = []
+        for start in range(0, len(rows), chunk_size):
+            stored.extend(cls._upsert_chunk(rows[start:start + chunk_size], dialect, counts))
+        
+        return stored
+    
+    @classmethod
+    def brand_keys_for_codes(cls, codes: List[str]) -> Set[str]:
+        """
+        Look up the brand keys currently stored for the given codes
+        
+        Args:
+            codes: Code strings
+            
+        Returns:
+            Set of brand keys of the codes that already exist
+        """
+        brand_keys = set()
+        for start in range(0, len(codes), cls.CHUNK_SIZE):
+            chunk = codes[start:start + cls.CHUNK_SIZE]
+            brand_keys.update(db.session.execute(
+                select(Code.brand_key).where(Code.code.in_(chunk)).distinct()
+            ).scalars())
+        return brand_keys
+    
+    @classmethod
+    def mark_brand_seen(cls, brand_name: str) -> int:
+        """
+        Set last_seen_at to now for all of a brand's codes
+        
+        Used after incremental scrapes, which only return codes from new
+        content: the brand's existing codes were checked too and are not stale.
+        Codes seen within SEEN_RESOLUTION are left alone. The caller is
+        responsible for committing the session.
+        
+        Returns:
+            Number of codes updated
+        """
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(Code)
+            .where(
+                Code.brand_key == normalize_brand(brand_name),
+                or_(Code.last_seen_at.is_(None), Code.last_seen_at < now - cls.SEEN_RESOLUTION)
+            )
+            .values(last_seen_at=now)
+        )
+        return result.rowcount
+    
+    @classmethod
+    def codes_for_brand(cls, brand_name: str) -> List[Dict]:
+        """Return all of a brand's codes as dicts, best discount first"""
+        result = db.session.execute(
+            select(*Code.__table__.columns)
+            .where(Code.brand_key == normalize_brand(brand_name))
+            .order_by(Code.discount_percentage.desc().nullslast(), Code.date_found.desc())
+        )
+        return [Code.row_to_dict(row) for row in result]
+    
+    @classmethod
+    def _prepare_rows(cls, brand_name: str, codes_data: List[Dict]) -> List[Dict]:
+        """Build column dicts, keeping the last entry for duplicate codes"""
+        now = datetime.utcnow()
+        brand_key = normalize_brand(brand_name)
+        rows = {}
+        for code_data in codes_data:
+            rows[code_data['code']] = {
+                'brand': brand_name,
+                'brand_key': brand_key,
+                'code': code_data['code'],
+                'discount_percentage': code_data.get('discount_percentage'),
+                'discount_description': code_data.get('discount_description'),
+                'source': code_data['source'],
+                'source_url': code_data.get('source_url'),
+                'source_creator': code_data.get('source_creator'),
+                'status': code_data.get('status', 'unverified'),
+                'expiry_date': code_data.get('expiry_date'),
+                'date_found': code_data.get('date_found', now),
+                'uses_count': code_data.get('uses_count', 0),
+                'created_at': now,
+                'last_seen_at': now
+            }
+        for row in rows.values():
+            row['content_hash'] = cls.content_hash(row)
+        return list(rows.values())
+    
+    @classmethod
+    def content_hash(cls, row: Dict) -> str:
+        """Hash of a row's HASH_COLUMNS, to detect codes a scrape found unchanged"""
+        values = json.dumps([row.get(column) for column in cls.HASH_COLUMNS], default=str)
+        return hashlib.blake2b(values.encode(), digest_size=16).hexdigest()
+    
+    @classmethod
+    def _upsert_chunk(cls, chunk: List[Dict], dialect: str, counts: Dict) -> List[Dict]:
+        """Write a chunk's new and changed codes, returning all its codes as dicts"""
+        codes = [row['code'] for row in chunk]
+        existing = {
+            row.code: row for row in db.session.execute(
+                select(*Code.__table__.columns).where(Code.code.in_(codes))
+            )
+        }
+        
+        now = datetime.utcnow()
+        by_code = {}
+        changed = []
+        seen = []
+        for row in chunk:
+            current = existing.get(row['code'])
+            if current is None:
+                counts['inserted'] += 1
+                changed.append(row)
+            elif current.content_hash != row['content_hash']:
+                counts['updated'] += 1
+                changed.append(row)
+            else:
+                counts['unchanged'] += 1
+                by_code[row['code']] = Code.row_to_dict(current)
+                if current.last_seen_at is None or current.last_seen_at < now - cls.SEEN_RESOLUTION:
+                    seen.append(row['code'])
+        
+        if changed:
+            if dialect in ('sqlite', 'postgresql'):
+                written = cls._upsert_native(changed, dialect)
+            else:
+                written = cls._upsert_prefetched(changed, existing)
+            by_code.update((code['code'], code) for code in written)
+        if seen:
+            db.session.execute(
+                update(Code).where(Code.code.in_(seen)).values(last_seen_at=now)
+            )
+        
+        return [by_code[code] for code in codes]
+    
+    @classmethod
+    def _upsert_native(cls, chunk: List[Dict], dialect: str) -> List[Dict]:
+        """Upsert a chunk with a single INSERT ... ON CONFLICT statement"""
+        dialect_insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+        stmt = dialect_insert(Code)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Code.code],
+            set_={column: stmt.excluded[column] for column in cls.UPDATE_COLUMNS}
+        ).returning(*Code.__table__.columns, sort_by_parameter_order=True)
+        
+        # executemany form: SQLAlchemy batches the rows into multi-row
+        # statements and reuses the compiled SQL across chunks
+        result = db.session.execute(stmt, chunk)
+        return [Code.row_to_dict(row) for row in result]
+    
+    @classmethod
+    def _upsert_prefetched(cls, chunk: List[Dict], existing: Dict) -> List[Dict]:
+        """Upsert a chunk with bulk INSERT/UPDATE, given its prefetched rows by code"""
+        codes = [row['code'] for row in chunk]
+        updates = []
+        inserts = []
+        for row in chunk:
+            if row['code'] in existing:
+                values = {column: row[column] for column in cls.UPDATE_COLUMNS}
+                values['id'] = existing[row['code']].id
+                updates.append(values)
+            else:
+                inserts.append(row)
+        
+        if updates:
+            db.session.execute(update(Code), updates)
+        if inserts:
+            db.session.execute(insert(Code), inserts)
+        
+        result = db.session.execute(
+            select(*Code.__table__.columns).where(Code.code.in_(codes))
+        )
+        by_code = {row.code: row for row in result}
+        return [Code.row_to_dict(by_code[code]) for code in codes]
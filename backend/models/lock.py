@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update, delete, select
+from sqlalchemy.exc import IntegrityError
+from models.code import db
+
+class GenerationLock(db.Model):
+    """Cross-process lock row, held while one worker generates data for a key"""
+    __tablename__ = 'generation_locks'
+    
+    key = db.Column(db.String(200), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    @classmethod
+    def acquire(cls, key: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Try to take the lock for key, stealing it if the holder's lease expired
+        
+        Commits the current session so other processes see the lock.
+        
+        Returns:
+            True if the lock is now held by owner
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        try:
+            db.session.add(cls(key=key, owner=owner, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+        
+        # Take over a lock whose holder died without releasing it
+        result = db.session.execute(
+            update(cls)
+            .where(cls.key == key, cls.expires_at < now)
+            .values(owner=owner, expires_at=expires_at)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def renew(cls, key: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Extend owner's lease on the lock by ttl_seconds from now
+        
+        Commits the current session.
+        
+        Returns:
+            False if owner no longer holds the lock (e.g. its lease expired
+            and another worker took it over)
+        """
+        result = db.session.execute(
+            update(cls)
+            .where(cls.key == key, cls.owner == owner)
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds))
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def release(cls, key: str, owner: str):
+        """Release the lock if owner still holds it"""
+        db.session.execute(delete(cls).where(cls.key == key, cls.owner == owner))
+        db.session.commit()
+    
+    @classmethod
+    def is_held(cls, key: str) -> bool:
+        """Check whether an unexpired lock exists for key"""
+        expires_at = db.session.execute(
+            select(cls.expires_at).where(cls.key == key)
+        ).scalar()
+        # End the read transaction so the next poll sees fresh data
+        db.session.commit()
+        return expires_at is not None and expires_at >= datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<GenerationLock {self.key} held by {self.owner}>'
@@ -0,0 +1,92 @@
+import math
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import bindparam, inspect, select, text, update
+from models.code import db
+from models.suggestion import AISuggestion
+from models.verification import SuggestionVerification
+
+def add_missing_columns(table: str, columns: Dict[str, str]) -> List[str]:
+    """
+    Add columns that a table created by an older version is missing
+    
+    ``db.create_all()`` only creates missing tables, so new columns on
+    existing tables are added here. Must run inside an app context.
+    
+    Args:
+        table: Table name
+        columns: Column name -> SQL type, e.g. {'brand_key': 'VARCHAR(100)'}
+        
+    Returns:
+        Names of the columns that were added
+    """
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table)}
+    added = []
+    for name, sql_type in columns.items():
+        if name not in existing:
+            print(f"Adding {name} column to {table}...")
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}'))
+            added.append(name)
+    return added
+
+def upgrade_codes_table():
+    """Add columns and indexes introduced after the codes table was first created"""
+    if 'last_seen_at' in add_missing_columns('codes', {'last_seen_at': 'DATETIME'}):
+        # Older versions never recorded re-scrapes (created_at and date_found
+        # don't change when a code is found again), so existing codes count
+        # as seen now and expire CODE_EXPIRE_AFTER hours after the upgrade
+        db.session.execute(text('UPDATE codes SET last_seen_at = :now'), {'now': datetime.utcnow()})
+        db.session.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_codes_last_seen_at ON codes (last_seen_at)'
+        ))
+    add_missing_columns('codes', {'content_hash': 'VARCHAR(32)'})
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_codes_brand_key_ranking '
+        'ON codes (brand_key, discount_percentage, date_found, id)'
+    ))
+    db.session.commit()
+
+def upgrade_suggestions_table():
+    """Add columns and indexes introduced after the ai_suggestions table was first created"""
+    if 'failure_count' in add_missing_columns('ai_suggestions', {'failure_count': 'INTEGER DEFAULT 0'}):
+        backfill_failure_counts()
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_ai_suggestions_brand_key_fresh '
+        'ON ai_suggestions (brand_key, created_at, confidence_score, estimated_savings)'
+    ))
+    db.session.commit()
+
+def backfill_failure_counts():
+    """
+    Derive failure_count from scores kept by older versions, and rescore
+    
+    Older versions didn't count failed votes. Each "worked" vote set the
+    score to min(100, 50 + 2 * verification_count) and each failed vote
+    then took 5 points off, so the shortfall from that value gives the
+    failed votes since the last "worked" one (earlier ones were
+    overwritten, so this is a lower bound). Voted suggestions are then
+    rescored with SuggestionVerification.confidence, which later votes use.
+    Does not commit.
+    """
+    table = AISuggestion.__table__
+    rows = db.session.execute(
+        select(table.c.id, table.c.verification_count, table.c.confidence_score)
+    ).all()
+    params = []
+    for row in rows:
+        worked = row.verification_count or 0
+        score = row.confidence_score if row.confidence_score is not None else 50.0
+        failed = max(0, math.ceil((min(100.0, 50.0 + 2 * worked) - score) / 5 - 1e-9))
+        if worked or failed:
+            params.append({
+                'suggestion_id': row.id,
+                'failed': failed,
+                'score': SuggestionVerification.confidence(worked, failed)
+            })
+    if params:
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam('suggestion_id'))
+            .values(failure_count=bindparam('failed'), confidence_score=bindparam('score')),
+            params
+        )
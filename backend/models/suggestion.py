@@ -1,12 +1,27 @@
 from datetime import datetime
-from models.code import db
+from models.code import db, brand_key_default
 
 class AISuggestion(db.Model):
     """Model for AI-generated discount suggestions"""
     __tablename__ = 'ai_suggestions'
+    __table_args__ = (
+        # Serves the cache check: a brand's suggestions newer than the cache
+        # duration, carrying the sort keys, so only fresh rows are visited
+        # however many earlier generations the brand has
+        db.Index('ix_ai_suggestions_brand_key_fresh',
+                 'brand_key', 'created_at', 'confidence_score', 'estimated_savings'),
+    )
+    
+    # Keys of to_dict(), in order
+    API_FIELDS = (
+        'id', 'brand', 'suggestion_type', 'title', 'description', 'estimated_savings',
+        'estimated_savings_description', 'conditions', 'pro_tip', 'confidence_score',
+        'verification_count', 'risk_level', 'created_at'
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     brand = db.Column(db.String(100), nullable=False, index=True)
+    brand_key = db.Column(db.String(100), nullable=False, index=True, default=brand_key_default)  # normalize_brand(brand)
     suggestion_type = db.Column(db.String(50), nullable=False)  # "new_account", "student_discount", etc.
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -16,6 +31,7 @@ class AISuggestion(db.Model):
     pro_tip = db.Column(db.Text, nullable=True)
     confidence_score = db.Column(db.Float, default=0.0)  # 0-100
     verification_count = db.Column(db.Integer, default=0)  # How many users verified
+    failure_count = db.Column(db.Integer, default=0)  # How many users said it didn't work
     risk_level = db.Column(db.String(20), default='safe')  # "safe", "medium", "high"
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -0,0 +1,35 @@
+from datetime import datetime
+from models.code import db
+
+class SuggestionVerification(db.Model):
+    """One user vote on whether an AI suggestion worked (append-only)"""
+    __tablename__ = 'suggestion_verifications'
+    
+    # Confidence is the posterior mean of a Beta prior worth PRIOR_VOTES votes
+    # centered on PRIOR_SCORE, so unverified suggestions keep the neutral
+    # score they are created with and a few votes can't swing it to 0 or 100
+    PRIOR_SCORE = 50.0
+    PRIOR_VOTES = 4
+    
+    id = db.Column(db.Integer, primary_key=True)
+    suggestion_id = db.Column(db.Integer, nullable=False, index=True)
+    worked = db.Column(db.Boolean, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def confidence(cls, worked, failed):
+        """
+        Confidence score (0-100) for a suggestion's vote counts
+        
+        Works on numbers and on SQL expressions alike, so the same formula is
+        used in atomic UPDATEs and for estimates in Python.
+        
+        Args:
+            worked: Number of "worked" votes
+            failed: Number of "didn't work" votes
+        """
+        prior_worked = cls.PRIOR_VOTES * cls.PRIOR_SCORE / 100.0
+        return 100.0 * (worked + prior_worked) / (worked + failed + cls.PRIOR_VOTES)
+    
+    def __repr__(self):
+        return f'<SuggestionVerification {self.suggestion_id} worked={self.worked}>'
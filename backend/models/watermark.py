@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.code import db, normalize_brand
+
+class ScrapeWatermark(db.Model):
+    """Per-source, per-brand high-water mark for incremental scraping"""
+    __tablename__ = 'scrape_watermarks'
+    
+    # Most recent video IDs remembered per brand; older videos are excluded
+    # by published_at anyway
+    MAX_SEEN_IDS = 500
+    
+    source = db.Column(db.String(50), primary_key=True)
+    brand_key = db.Column(db.String(100), primary_key=True)
+    published_at = db.Column(db.DateTime, nullable=True)  # Newest item seen
+    seen_ids = db.Column(db.Text, nullable=False, default='[]')  # JSON list, newest first
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def load(cls, source: str, brand_name: str) -> Optional[Dict]:
+        """
+        Return the stored mark for a brand, or None before its first scrape
+        
+        Returns:
+            Dict with 'published_at' (datetime or None) and 'seen_ids' (list)
+        """
+        row = db.session.execute(
+            select(cls.published_at, cls.seen_ids).where(
+                cls.source == source,
+                cls.brand_key == normalize_brand(brand_name)
+            )
+        ).first()
+        if row is None:
+            return None
+        return {
+            'published_at': row.published_at,
+            'seen_ids': json.loads(row.seen_ids or '[]')
+        }
+    
+    @classmethod
+    def save(cls, source: str, brand_name: str, published_at: Optional[datetime],
+             seen_ids: Iterable[str]):
+        """
+        Store a brand's mark, replacing the previous one
+        
+        The caller is responsible for committing the session.
+        
+        Args:
+            source: Scraper name
+            brand_name: Brand the mark belongs to
+            published_at: Newest publish time seen so far
+            seen_ids: Processed item IDs, newest first (truncated to MAX_SEEN_IDS)
+        """
+        values = {
+            'source': source,
+            'brand_key': normalize_brand(brand_name),
+            'published_at': published_at,
+            'seen_ids': json.dumps(list(seen_ids)[:cls.MAX_SEEN_IDS]),
+            'updated_at': datetime.utcnow()
+        }
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+            stmt = insert(cls).values(**values)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['source', 'brand_key'],
+                set_={name: stmt.excluded[name] for name in ('published_at', 'seen_ids', 'updated_at')}
+            ))
+        else:
+            db.session.merge(cls(**values))
+    
+    def __repr__(self):
+        return f'<ScrapeWatermark {self.source}:{self.brand_key} {self.published_at}>'
@@ -1,8 +1,7 @@
-from flask import Blueprint, request, jsonify
-from models.code import db, Code
-from scrapers.youtube_scraper import YouTubeScraper
-from scrapers.coupon_scraper import CouponScraper
-from datetime import datetime
+import json
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from models.code import db
+from services.scrape_service import scrape_and_store, stream_scrape_and_store
 
 scrape_bp = Blueprint('scrape', __name__)
 
@@ -23,62 +22,63 @@ def scrape_codes():
         return jsonify({'error': 'Brand name is required'}), 400
     
     try:
-        all_codes = []
-        
-        # Scrape YouTube
-        youtube_scraper = YouTubeScraper()
-        youtube_codes = youtube_scraper.scrape_codes(brand_name)
-        all_codes.extend(youtube_codes)
-        
-        # Scrape coupon sites
-        coupon_scraper = CouponScraper()
-        coupon_codes = coupon_scraper.scrape_codes(brand_name)
-        all_codes.extend(coupon_codes)
-        
-        # Store codes in database
-        stored_codes = []
-        for code_data in all_codes:
-            # Check if code already exists
-            existing_code = Code.query.filter_by(code=code_data['code']).first()
-            
-            if existing_code:
-                # Update existing code
-                existing_code.brand = brand_name
-                existing_code.discount_percentage = code_data.get('discount_percentage')
-                existing_code.discount_description = code_data.get('discount_description')
-                existing_code.source = code_data['source']
-                existing_code.source_url = code_data.get('source_url')
-                existing_code.source_creator = code_data.get('source_creator')
-                existing_code.status = code_data.get('status', 'unverified')
-                existing_code.date_found = code_data.get('date_found', datetime.utcnow())
-                existing_code.uses_count = code_data.get('uses_count', 0)
-                stored_codes.append(existing_code)
-            else:
-                # Create new code
-                new_code = Code(
-                    brand=brand_name,
-                    code=code_data['code'],
-                    discount_percentage=code_data.get('discount_percentage'),
-                    discount_description=code_data.get('discount_description'),
-                    source=code_data['source'],
-                    source_url=code_data.get('source_url'),
-                    source_creator=code_data.get('source_creator'),
-                    status=code_data.get('status', 'unverified'),
-                    date_found=code_data.get('date_found', datetime.utcnow()),
-                    uses_count=code_data.get('uses_count', 0)
-                )
-                db.session.add(new_code)
-                stored_codes.append(new_code)
-        
-        db.session.commit()
+        result = scrape_and_store(brand_name)
+        stored_codes = result['codes']
         
         return jsonify({
             'success': True,
             'message': f'Scraped {len(stored_codes)} codes for {brand_name}',
-            'codes': [code.to_dict() for code in stored_codes]
+            'codes': stored_codes,
+            'sources': result['sources'],
+            'changes': result['changes'],
+            'api_usage': result['api_usage']
         })
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@scrape_bp.route('/api/scrape/stream', methods=['GET'])
+def stream_scrape_codes():
+    """
+    Scrape codes for a brand, streaming them as each source produces them
+    
+    Query params:
+        brand: Brand name to scrape for (required)
+        format: 'ndjson' (default, one JSON event per line) or 'sse'
+            (Server-Sent Events, named by event type)
+        
+    Returns:
+        Stream of 'codes' events (stored codes), 'source' events (per-source
+        status) and a final 'done' event with totals and API usage
+    """
+    brand_name = request.args.get('brand', '').strip()
+    stream_format = request.args.get('format', 'ndjson')
+    
+    if not brand_name:
+        return jsonify({'error': 'Brand name is required'}), 400
+    
+    if stream_format not in ('ndjson', 'sse'):
+        return jsonify({'error': 'format must be one of ndjson, sse'}), 400
+    
+    def generate():
+        try:
+            for event in stream_scrape_and_store(brand_name):
+                yield _format_event(event, stream_format)
+        except Exception as e:
+            db.session.rollback()
+            yield _format_event({'type': 'error', 'error': str(e)}, stream_format)
+    
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    # Keep proxies from buffering the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _format_event(event: dict, stream_format: str) -> str:
+    """Serialize one stream event as an NDJSON line or an SSE message"""
+    data = json.dumps(event, default=str)
+    if stream_format == 'sse':
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + '\n'
@@ -1,5 +1,14 @@
-from flask import Blueprint, request, jsonify
-from models.code import db, Code
+import base64
+import json
+from typing import List
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import Row, select, func, and_, or_, false
+from models.code import db, Code, normalize_brand
+from models.archive import ArchivedCode
+from models.brand import BrandIndex
+from services.fast_json import dumps, json_response
+from services.metrics import metrics
+from services.response_cache import code_search_cache
 from datetime import datetime, timedelta
 from config import Config
 
@@ -12,51 +21,395 @@ def search_codes():
     
     Query params:
         brand: Brand name to search for (required)
-        
+        match: 'substring' (default), 'prefix' or 'exact'
+        limit: Page size (1 to CODE_SEARCH_MAX_LIMIT); enables pagination
+        cursor: ``next_cursor`` of the previous page
+        fields: Comma-separated code fields to return ('id' is always included)
+    
     Returns:
-        JSON array of codes
+        JSON array of codes. Paginated or projected searches also return
+        ``next_cursor``, which is null on the last page. Expired codes that
+        were archived are not searched (see /api/codes/archive).
     """
     brand_name = request.args.get('brand', '').strip()
+    match = request.args.get('match', 'substring')
     
     if not brand_name:
         return jsonify({'error': 'Brand name is required'}), 400
     
+    if match not in BrandIndex.MATCH_MODES:
+        return jsonify({'error': f"match must be one of {', '.join(BrandIndex.MATCH_MODES)}"}), 400
+    
+    paged = any(name in request.args for name in ('limit', 'cursor', 'fields'))
+    if paged:
+        try:
+            limit, cursor, fields = _page_params(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
     try:
-        # Query database for codes
-        codes = Code.query.filter(
-            Code.brand.ilike(f'%{brand_name}%')
-        ).order_by(
-            Code.discount_percentage.desc().nullslast(),
-            Code.date_found.desc()
-        ).all()
+        # Serve hot brands from the response cache without touching the DB
+        cache_key = (match, normalize_brand(brand_name))
+        if paged:
+            cache_key += (limit, request.args.get('cursor', ''), fields)
+        cached = code_search_cache.get(cache_key)
+        if cached is not None:
+            cached_body, stale_brands = cached
+            _schedule_refresh(stale_brands)
+            return current_app.response_class(cached_body, mimetype='application/json')
         
-        # Check if codes are stale (older than cache duration)
-        if codes:
-            latest_code = max(codes, key=lambda c: c.created_at)
-            cache_expiry = datetime.utcnow() - timedelta(hours=Config.CODE_CACHE_DURATION)
-            
-            if latest_code.created_at < cache_expiry:
-                # Codes are stale, trigger scraping
-                return jsonify({
-                    'codes': [code.to_dict() for code in codes],
-                    'stale': True,
-                    'message': 'Codes may be outdated. Consider running /api/scrape'
-                })
+        version = code_search_cache.version()
+        if paged:
+            payload, ttl_seconds, stale_brands = _search_page(brand_name, match, limit, cursor, fields)
+        else:
+            payload, ttl_seconds, stale_brands = _search_payload(brand_name, match)
+        _schedule_refresh(stale_brands)
+        response = json_response(payload)
+        code_search_cache.set(cache_key, (response.get_data(), stale_brands), ttl_seconds, version)
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@search_bp.route('/api/codes/search/batch', methods=['POST'])
+def search_codes_batch():
+    """
+    Search for discount codes for several brands at once
+    
+    Body:
+        brands: List of brand names (required, at most CODE_SEARCH_BATCH_MAX)
+        match: 'substring' (default), 'prefix' or 'exact'
+    
+    Returns:
+        JSON with 'results' mapping each brand (first spelling of duplicates)
+        to the same body /api/codes/search returns for it
+    """
+    data = request.get_json(silent=True) or {}
+    brand_names = data.get('brands')
+    match = data.get('match', 'substring')
+    
+    if not isinstance(brand_names, list) or not all(isinstance(b, str) for b in brand_names):
+        return jsonify({'error': 'brands must be a list of brand names'}), 400
+    
+    # One entry per normalized brand, keeping the first spelling
+    requested = {}
+    for brand_name in brand_names:
+        brand_name = brand_name.strip()
+        if brand_name:
+            requested.setdefault(normalize_brand(brand_name), brand_name)
+    
+    if not requested:
+        return jsonify({'error': 'At least one brand name is required'}), 400
+    
+    max_brands = current_app.config['CODE_SEARCH_BATCH_MAX']
+    if len(requested) > max_brands:
+        return jsonify({'error': f'At most {max_brands} brands per batch'}), 400
+    
+    if match not in BrandIndex.MATCH_MODES:
+        return jsonify({'error': f"match must be one of {', '.join(BrandIndex.MATCH_MODES)}"}), 400
+    
+    try:
+        # Response bodies per brand key: cached bodies are spliced into the
+        # batch response as they are, without decoding them
+        bodies = {}
+        misses = {}
+        for key, brand_name in requested.items():
+            cached = code_search_cache.get((match, key))
+            if cached is not None:
+                bodies[key], stale_brands = cached
+                _schedule_refresh(stale_brands)
+            else:
+                misses[key] = brand_name
         
-        if not codes:
-            return jsonify({
-                'codes': [],
-                'message': f'No codes found for {brand_name}. Try /api/scrape to fetch new codes.'
-            })
+        if misses:
+            version = code_search_cache.version()
+            keys_by_brand = BrandIndex.matching_keys_many(misses.values(), match)
+            
+            # One query for every missed brand, then split the rows per brand
+            searches_by_key = {}
+            for key, brand_keys in keys_by_brand.items():
+                for brand_key in brand_keys:
+                    searches_by_key.setdefault(brand_key, []).append(key)
+            grouped = {key: [] for key in misses}
+            for code in (_query_codes(list(searches_by_key)) if searches_by_key else []):
+                for key in searches_by_key[code.brand_key]:
+                    grouped[key].append(code)
+            
+            for key, brand_name in misses.items():
+                payload, ttl_seconds, stale_brands = _codes_payload(brand_name, grouped[key])
+                _schedule_refresh(stale_brands)
+                bodies[key] = dumps(payload)
+                # Warm the single-brand cache with the body search_codes would return
+                code_search_cache.set((match, key), (bodies[key], stale_brands), ttl_seconds, version)
         
-        return jsonify({
-            'codes': [code.to_dict() for code in codes],
-            'stale': False
-        })
+        results = b','.join(dumps(brand_name) + b':' + bodies[key] for key, brand_name in requested.items())
+        return current_app.response_class(b'{"results":{' + results + b'}}', mimetype='application/json')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@search_bp.route('/api/codes/cache/stats', methods=['GET'])
+def search_cache_stats():
+    """Counters for the code search cache, background refreshes, copy buffer and sweeper"""
+    return jsonify({
+        'search_cache': code_search_cache.stats(),
+        'refresh': current_app.extensions['refresh_scheduler'].stats(),
+        'copy_counter': current_app.extensions['copy_counter'].stats(),
+        'sweeper': current_app.extensions['code_sweeper'].stats()
+    })
+
+@search_bp.route('/api/codes/archive', methods=['GET'])
+def archived_codes():
+    """
+    List a brand's expired, archived codes, most recently archived first
+    
+    Query params:
+        brand: Brand name (required, exact match)
+        limit: Max codes to return (1 to CODE_SEARCH_MAX_LIMIT, default
+            CODE_SEARCH_DEFAULT_LIMIT)
+    
+    Returns:
+        JSON with archived codes in search format plus archived_at
+    """
+    brand_name = request.args.get('brand', '').strip()
+    if not brand_name:
+        return jsonify({'error': 'Brand name is required'}), 400
+    
+    max_limit = current_app.config['CODE_SEARCH_MAX_LIMIT']
+    try:
+        limit = int(request.args.get('limit', current_app.config['CODE_SEARCH_DEFAULT_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+    
+    try:
+        codes = db.session.execute(
+            select(ArchivedCode)
+            .where(ArchivedCode.brand_key == normalize_brand(brand_name))
+            .order_by(ArchivedCode.archived_at.desc())
+            .limit(limit)
+        ).scalars()
+        return jsonify({'codes': [code.to_dict() for code in codes]})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _schedule_refresh(brand_names):
+    """Enqueue background refreshes for stale brands (deduplicated)"""
+    scheduler = current_app.extensions['refresh_scheduler']
+    for brand_name in brand_names:
+        scheduler.enqueue(brand_name)
+
+def _search_payload(brand_name: str, match: str):
+    """
+    Build the /api/codes/search response body
+    
+    Returns:
+        Tuple of (payload dict, seconds the payload stays accurate,
+        brands to refresh in the background)
+    """
+    # Resolve matching brands through the brand index, then query
+    # codes by the indexed brand_key
+    brand_keys = BrandIndex.matching_keys(brand_name, match)
+    return _codes_payload(brand_name, _query_codes(brand_keys))
+
+def _query_codes(brand_keys) -> List[Row]:
+    """
+    Load the codes of the given brand keys, best discount first
+    
+    Returns plain rows (no ORM objects) with the Code.API_FIELDS columns
+    followed by brand_key and last_seen_at.
+    """
+    table = Code.__table__
+    return db.session.execute(
+        select(
+            *(table.c[name] for name in Code.API_FIELDS),
+            table.c.brand_key,
+            table.c.last_seen_at
+        ).where(
+            table.c.brand_key.in_(brand_keys)
+        ).order_by(
+            table.c.discount_percentage.desc().nullslast(),
+            table.c.date_found.desc()
+        )
+    ).all()
+
+def _codes_payload(brand_name: str, codes: List[Row]):
+    """
+    Build the search response body for one brand's codes
+    
+    Code dicts keep datetime values; services.fast_json encodes them the
+    same way Code.to_dict() does.
+    
+    Returns:
+        Same tuple as _search_payload
+    """
+    if not codes:
+        return {
+            'codes': [],
+            'message': f'No codes found for {brand_name}. Try /api/scrape to fetch new codes.'
+        }, None, ()
+    
+    with metrics.span('serialize.to_dict', model='code'):
+        # zip() stops at the API fields, dropping brand_key and last_seen_at
+        code_dicts = [dict(zip(Code.API_FIELDS, row)) for row in codes]
+    
+    last_seen = max(code.last_seen_at or code.created_at for code in codes)
+    stale_brands = {code.brand_key: code.brand for code in codes}.values()
+    return _with_staleness({'codes': code_dicts}, last_seen, stale_brands)
+
+def _with_staleness(payload: dict, last_seen: datetime, brands):
+    """
+    Add stale/refreshing flags to a search payload
+    
+    Args:
+        payload: Response body so far
+        last_seen: Latest time a scrape saw any of the matched codes
+        brands: Names of the matched brands, refreshed if stale
+    
+    Returns:
+        Same tuple as _search_payload
+    """
+    # Check if codes are stale (not seen by a scrape within cache duration)
+    cache_expiry = datetime.utcnow() - timedelta(hours=Config.CODE_CACHE_DURATION)
+    
+    if last_seen < cache_expiry:
+        # Codes are stale: serve them now and refresh in the background
+        payload.update({
+            'stale': True,
+            'refreshing': True,
+            'message': 'Codes may be outdated. A background refresh has been scheduled.'
+        })
+        return payload, None, tuple(brands)
+    
+    # Fresh results can be cached only until they turn stale
+    payload['stale'] = False
+    fresh_for = (last_seen - cache_expiry).total_seconds()
+    return payload, fresh_for, ()
+
+def _page_params(args):
+    """
+    Parse limit, cursor and fields for a paginated search
+    
+    Returns:
+        Tuple of (limit, decoded cursor or None, tuple of fields or None)
+    
+    Raises:
+        ValueError: With a message for the client
+    """
+    max_limit = current_app.config['CODE_SEARCH_MAX_LIMIT']
+    try:
+        limit = int(args.get('limit', current_app.config['CODE_SEARCH_DEFAULT_LIMIT']))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= max_limit:
+        raise ValueError(f'limit must be between 1 and {max_limit}')
+    
+    cursor = None
+    if args.get('cursor'):
+        cursor = _decode_cursor(args['cursor'])
+    
+    fields = None
+    if 'fields' in args:
+        requested = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = [name for name in requested if name not in Code.API_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        fields = tuple(dict.fromkeys(['id'] + requested))
+    
+    return limit, cursor, fields
+
+def _encode_cursor(row) -> str:
+    """Opaque cursor pointing just past row in ranking order"""
+    date_found = row.date_found.isoformat() if row.date_found else None
+    raw = json.dumps([row.discount_percentage, date_found, row.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    """Inverse of _encode_cursor; returns (discount, date_found, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        discount, date_found, code_id = json.loads(raw)
+        if discount is not None:
+            discount = float(discount)
+        if date_found is not None:
+            date_found = datetime.fromisoformat(date_found)
+        return discount, date_found, int(code_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def _after_desc(column, value):
+    """Rows after value in ``column DESC NULLS LAST`` order"""
+    if value is None:
+        return false()
+    return or_(column < value, column.is_(None))
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+def _search_page(brand_name: str, match: str, limit: int, cursor, fields):
+    """
+    Build one page of a paginated or projected code search
+    
+    Pages use keyset pagination on (discount_percentage, date_found, id), so
+    each page is an index range scan no matter how deep it is. Staleness is
+    computed over all of the brand's codes, not just the page.
+    
+    Returns:
+        Same tuple as _search_payload
+    """
+    table = Code.__table__
+    brand_keys = BrandIndex.matching_keys(brand_name, match)
+    in_brands = table.c.brand_key.in_(brand_keys)
+    
+    # Sort keys are always loaded after the returned fields, to build the
+    # next cursor
+    fields = fields or Code.API_FIELDS
+    names = dict.fromkeys(fields + ('id', 'discount_percentage', 'date_found'))
+    stmt = select(*(table.c[name] for name in names)).where(in_brands)
+    if cursor is not None:
+        discount, date_found, code_id = cursor
+        stmt = stmt.where(or_(
+            _after_desc(table.c.discount_percentage, discount),
+            and_(
+                _equal(table.c.discount_percentage, discount),
+                or_(
+                    _after_desc(table.c.date_found, date_found),
+                    and_(_equal(table.c.date_found, date_found), table.c.id < code_id)
+                )
+            )
+        ))
+    stmt = stmt.order_by(
+        table.c.discount_percentage.desc().nullslast(),
+        table.c.date_found.desc().nullslast(),
+        table.c.id.desc()
+    ).limit(limit + 1)
+    
+    rows = db.session.execute(stmt).all()
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    
+    with metrics.span('serialize.to_dict', model='code'):
+        code_dicts = [dict(zip(fields, row)) for row in rows]
+    payload = {'codes': code_dicts, 'next_cursor': next_cursor}
+    
+    # Latest sighting per matched brand, for the stale flag
+    brands = db.session.execute(
+        select(
+            table.c.brand_key,
+            func.max(table.c.brand),
+            func.max(func.coalesce(table.c.last_seen_at, table.c.created_at))
+        ).where(in_brands).group_by(table.c.brand_key)
+    ).all()
+    
+    if not brands:
+        payload['message'] = f'No codes found for {brand_name}. Try /api/scrape to fetch new codes.'
+        return payload, None, ()
+    
+    last_seen = max(last_seen for _, _, last_seen in brands)
+    return _with_staleness(payload, last_seen, (brand for _, brand, _ in brands))
+
 @search_bp.route('/api/codes/copy', methods=['POST'])
 def track_copy():
     """
@@ -72,18 +425,19 @@ def track_copy():
         if not code_id:
             return jsonify({'error': 'code_id is required'}), 400
         
-        code = Code.query.get(code_id)
+        code = db.session.execute(
+            select(Code.uses_count, Code.brand_key).where(Code.id == code_id)
+        ).first()
         if not code:
             return jsonify({'error': 'Code not found'}), 404
         
-        # Increment uses count
-        code.uses_count += 1
-        db.session.commit()
+        # Increment uses count (buffered and flushed in the background)
+        pending = current_app.extensions['copy_counter'].record(code_id, code.brand_key)
         
         return jsonify({
             'success': True,
             'message': 'Code copy tracked',
-            'uses_count': code.uses_count
+            'uses_count': code.uses_count + pending
         })
     
     except Exception as e:
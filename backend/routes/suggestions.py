@@ -1,18 +1,37 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from models.suggestion import AISuggestion
-from models.code import db
+from models.verification import SuggestionVerification
+from sqlalchemy import select
+from models.code import db, normalize_brand
+from models.brand import BrandIndex
 from ai.suggester import AISuggester
-from ai.validator import SuggestionValidator
 from datetime import datetime, timedelta
+from services.fast_json import json_response
+from services.metrics import metrics
+from services.single_flight import SingleFlight
+from services.suggestion_service import store_suggestions, preview_suggestions, plan_prefetch, prefetch_batch
+from typing import Callable, List, Dict
 from config import Config
 
 suggestions_bp = Blueprint('suggestions', __name__)
 
+# Coalesces concurrent cache misses for the same brand (threads and processes)
+suggestion_flight = SingleFlight(
+    'suggestions',
+    lock_ttl=Config.SUGGESTION_LOCK_TTL,
+    wait_timeout=Config.SUGGESTION_WAIT_TIMEOUT
+)
+
 @suggestions_bp.route('/api/suggestions', methods=['GET'])
 def get_suggestions():
     """
     Get AI-powered discount suggestions for a brand
     
+    Generation runs in the background. If it takes longer than
+    SUGGESTION_DEADLINE seconds the request answers right away with the
+    suggestions streamed so far, older stored suggestions, or generic ones
+    (``pending: true``), and the job stores its results for later requests.
+    
     Query params:
         brand: Brand name (required)
         
@@ -26,61 +45,193 @@ def get_suggestions():
     
     try:
         # Check if suggestions exist in cache
-        cache_expiry = datetime.utcnow() - timedelta(hours=Config.SUGGESTION_CACHE_DURATION)
-        cached_suggestions = AISuggestion.query.filter(
-            AISuggestion.brand.ilike(f'%{brand_name}%'),
-            AISuggestion.created_at >= cache_expiry
-        ).order_by(
-            AISuggestion.confidence_score.desc(),
-            AISuggestion.estimated_savings.desc().nullslast()
-        ).limit(5).all()
-        
+        cached_suggestions = _find_cached_suggestions(brand_name)
         if cached_suggestions:
-            return jsonify({
-                'suggestions': [s.to_dict() for s in cached_suggestions],
+            return json_response({
+                'suggestions': cached_suggestions,
                 'cached': True
             })
         
-        # Generate new suggestions using AI
-        ai_suggester = AISuggester()
-        raw_suggestions = ai_suggester.get_suggestions(brand_name)
-        
-        # Validate suggestions
-        validated_suggestions = SuggestionValidator.validate_suggestions(raw_suggestions)
-        
-        # Store in database
-        stored_suggestions = []
-        for suggestion_data in validated_suggestions:
-            new_suggestion = AISuggestion(
-                brand=brand_name,
-                suggestion_type=suggestion_data.get('type', 'general'),
-                title=suggestion_data.get('title', ''),
-                description=suggestion_data.get('description', ''),
-                estimated_savings=suggestion_data.get('estimated_savings', 0),
-                estimated_savings_description=suggestion_data.get('estimated_savings_description', ''),
-                conditions=suggestion_data.get('conditions', ''),
-                pro_tip=suggestion_data.get('pro_tip', ''),
-                confidence_score=50.0,  # Start with neutral confidence
-                verification_count=0,
-                risk_level=suggestion_data.get('risk', 'safe')
-            )
-            db.session.add(new_suggestion)
-            stored_suggestions.append(new_suggestion)
-        
-        db.session.commit()
+        # Generate new suggestions using AI off the request thread
+        generator = current_app.extensions['suggestion_generator']
+        job = generator.submit(brand_name)
+        if job is not None and job.wait(current_app.config['SUGGESTION_DEADLINE']):
+            if job.error is not None:
+                raise job.error
+            suggestions, coalesced = job.result
+            return json_response({
+                'suggestions': suggestions,
+                'cached': False,
+                'coalesced': coalesced
+            })
         
-        # Return top 3 suggestions
-        top_suggestions = sorted(
-            stored_suggestions,
-            key=lambda s: (s.confidence_score, s.estimated_savings or 0),
-            reverse=True
-        )[:3]
+        # Too slow (or too many jobs): don't hold the worker any longer
+        if job is not None:
+            generator.abandon(job)
+        return json_response(_fallback_payload(brand_name, job))
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@suggestions_bp.route('/api/suggestions/stats', methods=['GET'])
+def suggestion_stats():
+    """Counters for AI suggestion generation and buffered verification votes"""
+    return jsonify({
+        'generation': suggestion_flight.stats(),
+        'jobs': current_app.extensions['suggestion_generator'].stats(),
+        'verifications': current_app.extensions['verification_recorder'].stats()
+    })
+
+def generate_coalesced(brand_name: str, on_suggestion: Callable[[Dict], None] = None):
+    """
+    Generate suggestions once per brand even when many requests miss the cache
+    
+    Runs as a SuggestionGenerator job. Returns the (suggestions, coalesced)
+    tuple from SingleFlight.do.
+    """
+    return suggestion_flight.do(
+        normalize_brand(brand_name),
+        lambda: _generate_suggestions(brand_name, on_suggestion),
+        lambda: _find_cached_suggestions(brand_name)
+    )
+
+def prefetch_coalesced(brand_names: List[str]) -> Dict:
+    """
+    Generate suggestions for a batch of brands with one prompt
+    
+    Runs as a SuggestionGenerator batch job. Holds the suggestion_flight
+    locks of the brands it generates, so requests for them wait for the
+    batch instead of generating too; brands another worker is already
+    generating are left out and reported as 'in_progress'.
+    
+    Returns:
+        The prefetch_batch report plus 'in_progress'
+    """
+    by_key = {normalize_brand(name): name for name in brand_names}
+    with suggestion_flight.claim(list(by_key)) as claimed:
+        report = prefetch_batch([by_key[key] for key in claimed])
+    report['in_progress'] = [name for key, name in by_key.items() if key not in claimed]
+    return report
+
+def _fallback_payload(brand_name: str, job) -> Dict:
+    """
+    Response for a request whose generation missed the deadline
+    
+    Prefers suggestions already streamed by the job, then expired stored
+    suggestions, then generic suggestions.
+    """
+    suggestions = preview_suggestions(brand_name, job.partial()) if job is not None else []
+    source = 'partial'
+    if not suggestions:
+        suggestions = _find_cached_suggestions(brand_name, fresh_only=False)
+        source = 'stale'
+    if not suggestions:
+        generic = AISuggester().get_fallback_suggestions(brand_name)
+        suggestions = preview_suggestions(brand_name, generic)
+        source = 'fallback'
+    
+    return {
+        'suggestions': suggestions[:3] if source != 'stale' else suggestions,
+        'cached': source == 'stale',
+        'pending': job is not None,
+        'source': source
+    }
+
+def _find_cached_suggestions(brand_name: str, fresh_only: bool = True) -> List[Dict]:
+    """
+    Return cached suggestions for a brand as dicts (top 5)
+    
+    Reads plain rows instead of ORM objects; created_at is left as a
+    datetime for services.fast_json to encode.
+    
+    Args:
+        brand_name: Brand to look up
+        fresh_only: Skip suggestions older than SUGGESTION_CACHE_DURATION
+    """
+    brand_keys = BrandIndex.matching_keys(brand_name)
+    table = AISuggestion.__table__
+    conditions = [table.c.brand_key.in_(brand_keys)]
+    if fresh_only:
+        cache_expiry = datetime.utcnow() - timedelta(hours=Config.SUGGESTION_CACHE_DURATION)
+        conditions.append(table.c.created_at >= cache_expiry)
+    rows = db.session.execute(
+        select(*(table.c[name] for name in AISuggestion.API_FIELDS)).where(
+            *conditions
+        ).order_by(
+            table.c.confidence_score.desc(),
+            table.c.estimated_savings.desc().nullslast()
+        ).limit(5)
+    ).all()
+    with metrics.span('serialize.to_dict', model='suggestion'):
+        return [dict(zip(AISuggestion.API_FIELDS, row)) for row in rows]
+
+def _generate_suggestions(brand_name: str, on_suggestion: Callable[[Dict], None] = None) -> List[Dict]:
+    """Generate, validate and store suggestions; return the top 3 as dicts"""
+    ai_suggester = AISuggester()
+    raw_suggestions = ai_suggester.get_suggestions(brand_name, on_suggestion)
+    
+    # Validate and store in database
+    stored_suggestions = store_suggestions(brand_name, raw_suggestions)
+    db.session.commit()
+    
+    # Return top 3 suggestions
+    top_suggestions = sorted(
+        stored_suggestions,
+        key=lambda s: (s.confidence_score, s.estimated_savings or 0),
+        reverse=True
+    )[:3]
+    
+    with metrics.span('serialize.to_dict', model='suggestion'):
+        return [s.to_dict() for s in top_suggestions]
+
+@suggestions_bp.route('/api/suggestions/prefetch', methods=['POST'])
+def prefetch():
+    """
+    Warm the suggestion cache for many brands, several brands per AI prompt
+    
+    The batches are generated by background jobs; the request answers
+    202 once they are queued. Progress shows in /api/suggestions/stats.
+    
+    Body:
+        brands: List of brand names (at most SUGGESTION_PREFETCH_MAX)
+        batch_size: Optional brands per prompt
+    
+    Returns:
+        JSON with the queued batches, brands skipped as already fresh and
+        brands not queued because too many jobs are in flight
+    """
+    data = request.get_json(silent=True) or {}
+    brands = data.get('brands')
+    if not isinstance(brands, list) or not all(isinstance(b, str) for b in brands):
+        return jsonify({'error': 'brands must be a list of brand names'}), 400
+    brands = [b.strip() for b in brands if b.strip()]
+    if not brands:
+        return jsonify({'error': 'At least one brand is required'}), 400
+    
+    max_brands = current_app.config['SUGGESTION_PREFETCH_MAX']
+    if len(brands) > max_brands:
+        return jsonify({'error': f'At most {max_brands} brands per request'}), 400
+    
+    batch_size = data.get('batch_size')
+    if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+    
+    try:
+        batches, skipped_fresh = plan_prefetch(brands, batch_size)
+        generator = current_app.extensions['suggestion_generator']
+        queued, rejected = [], []
+        for batch in batches:
+            if generator.submit_batch(batch) is not None:
+                queued.append(batch)
+            else:
+                rejected.extend(batch)
         
         return jsonify({
-            'suggestions': [s.to_dict() for s in top_suggestions],
-            'cached': False
-        })
-    
+            'queued': queued,
+            'skipped_fresh': skipped_fresh,
+            'rejected': rejected
+        }), 202
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -102,33 +253,26 @@ def verify_suggestion():
         if not suggestion_id:
             return jsonify({'error': 'suggestion_id is required'}), 400
         
-        suggestion = AISuggestion.query.get(suggestion_id)
+        suggestion = db.session.execute(
+            select(AISuggestion.verification_count, AISuggestion.failure_count)
+            .where(AISuggestion.id == suggestion_id)
+        ).first()
         if not suggestion:
             return jsonify({'error': 'Suggestion not found'}), 404
         
-        # Increment verification count
-        if worked:
-            suggestion.verification_count += 1
-            # Update confidence score (simple algorithm)
-            # Start at 50, increase by 2 for each verification, cap at 100
-            suggestion.confidence_score = min(
-                100.0,
-                50.0 + (suggestion.verification_count * 2)
-            )
-        else:
-            # Decrease confidence if it didn't work
-            suggestion.confidence_score = max(
-                0.0,
-                suggestion.confidence_score - 5
-            )
-        
-        db.session.commit()
+        # Append the vote (buffered; counters and confidence are updated
+        # atomically in the background)
+        worked_votes, failed_votes = current_app.extensions['verification_recorder'].record(
+            suggestion_id, bool(worked)
+        )
+        verification_count = (suggestion.verification_count or 0) + worked_votes
+        failure_count = (suggestion.failure_count or 0) + failed_votes
         
         return jsonify({
             'success': True,
             'message': 'Verification recorded',
-            'confidence_score': suggestion.confidence_score,
-            'verification_count': suggestion.verification_count
+            'confidence_score': SuggestionVerification.confidence(verification_count, failure_count),
+            'verification_count': verification_count
         })
     
     except Exception as e:
@@ -0,0 +1,57 @@
+import abc
+from typing import Iterator, List, Dict
+from config import Config
+
+class ScrapeError(Exception):
+    """
+    A source failed part-way through a scrape
+    
+    ``codes`` holds the codes it found before or despite the failure, which
+    the orchestrator still returns while reporting the source as failed.
+    """
+    
+    def __init__(self, message: str, codes: List[Dict] = None):
+        super().__init__(message)
+        self.codes = codes or []
+
+class BaseScraper(abc.ABC):
+    """
+    Common interface for code sources used by the scrape orchestrator
+    
+    Subclasses set ``name`` and implement ``scrape_codes``. Each returned code
+    dict must at least contain 'code' and 'source'. Sources that can produce
+    codes incrementally also override ``iter_codes``, which streaming scrapes
+    consume.
+    """
+    
+    # Short identifier used in per-source status reports
+    name = 'base'
+    
+    # Seconds the orchestrator waits for this source before giving up on it
+    timeout = Config.SCRAPE_SOURCE_TIMEOUT
+    
+    @abc.abstractmethod
+    def scrape_codes(self, brand_name: str) -> List[Dict]:
+        """
+        Scrape codes for a brand
+        
+        Args:
+            brand_name: Brand to search for
+        
+        Returns:
+            List of code information dicts
+        """
+    
+    def iter_codes(self, brand_name: str) -> Iterator[List[Dict]]:
+        """
+        Scrape codes for a brand, yielding batches as they are found
+        
+        The default yields everything from ``scrape_codes`` as one batch.
+        
+        Args:
+            brand_name: Brand to search for
+        
+        Yields:
+            Lists of code information dicts
+        """
+        yield self.scrape_codes(brand_name)
@@ -1,5 +1,23 @@
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+
+def _compile_matcher(patterns: List[str], leading_chars: str) -> 're.Pattern':
+    """
+    Fuse patterns into one case-insensitive matcher for candidate positions
+
+    The matcher is zero-width: it reports every position where at least one
+    pattern matches, without consuming text, so a match of one pattern never
+    hides a match of another. CodeExtractor._find then applies each pattern
+    at those positions with its own non-overlapping ``finditer`` semantics.
+    """
+    # The leading character class lets the regex engine skip positions where
+    # no pattern can start without trying every alternative.
+    return re.compile(
+        f'(?=[{leading_chars}])(?=' + '|'.join(f'(?:{p})' for p in patterns) + ')',
+        re.IGNORECASE
+    )
+
 
 class CodeExtractor:
     """Extract discount codes from text using regex patterns"""
@@ -21,32 +39,153 @@ class CodeExtractor:
         r'(\d+)\s+percent\s+off',
     ]
     
+    # Characters any of the patterns above can start with (case-insensitive).
+    # Keep in sync when adding patterns.
+    LEADING_CHARS = r'UPCDWS"\d'
+    
+    # Single precompiled matcher for candidate positions of all patterns,
+    # plus each pattern compiled on its own to match at those positions
+    _MATCHER = _compile_matcher(PATTERNS + DISCOUNT_PATTERNS, LEADING_CHARS)
+    _CODE_REGEXES = [re.compile(pattern, re.IGNORECASE) for pattern in PATTERNS]
+    _DISCOUNT_REGEXES = [re.compile(pattern, re.IGNORECASE) for pattern in DISCOUNT_PATTERNS]
+    
     @classmethod
-    def extract_codes_from_text(cls, text: str) -> List[str]:
+    def _scan(cls, text: str) -> Tuple[List[str], Optional[float]]:
         """
-        Extract potential discount codes from text
+        Find codes and the discount percentage in one pass over text
+        (two for non-ASCII text)
         
         Args:
-            text: Text to search for codes
+            text: Text to scan
             
         Returns:
-            List of extracted codes (uppercase, deduplicated)
+            Tuple of (codes in first-seen order, discount percentage or None)
         """
         if not text:
+            return [], None
+        
+        if text.isascii():
+            codes, discounts = cls._find([text])[0]
+        else:
+            # Codes are matched against the upper-cased text and discounts
+            # against the original, which only differ outside ASCII
+            # (e.g. 'ß' upper-cases to 'SS')
+            codes, _ = cls._find([text.upper()])[0]
+            _, discounts = cls._find([text])[0]
+        
+        return codes, cls._discount_percentage(discounts)
+    
+    @classmethod
+    def _scan_many(cls, texts: List[str]) -> List[Tuple[List[str], Optional[float]]]:
+        """
+        Like _scan for each text, but with one matcher pass over all the
+        ASCII texts
+        
+        Args:
+            texts: Texts to scan
+            
+        Returns:
+            One (codes, discount percentage) tuple per text, in order
+        """
+        results = [None] * len(texts)
+        batch = []
+        for i, text in enumerate(texts):
+            if text and text.isascii():
+                batch.append(i)
+            else:
+                results[i] = cls._scan(text)
+        
+        found = cls._find([texts[i] for i in batch])
+        for i, (codes, discounts) in zip(batch, found):
+            results[i] = (codes, cls._discount_percentage(discounts))
+        return results
+    
+    @classmethod
+    def _discount_percentage(cls, discounts: Dict[int, str]) -> Optional[float]:
+        """Pick the discount of the earliest discount pattern that matched"""
+        # Earlier discount patterns take priority, regardless of position
+        for i in range(len(cls.DISCOUNT_PATTERNS)):
+            value = discounts.get(i)
+            if value is not None:
+                try:
+                    return float(value)
+                except ValueError:
+                    continue
+        return None
+    
+    @classmethod
+    def _find(cls, texts: List[str]) -> List[Tuple[List[str], Dict[int, str]]]:
+        """
+        Match every pattern against each text, visiting only candidate positions
+        
+        The texts are joined with NUL characters, which no pattern can match,
+        and scanned in one pass. Each code pattern resumes after the end of
+        its own previous match, exactly like a separate ``finditer`` over
+        each text, so a pattern's matches never overlap each other while
+        different patterns may overlap. Only the first match of each
+        discount pattern per text is kept, like a separate ``search``.
+        
+        Args:
+            texts: Texts to scan
+            
+        Returns:
+            One tuple per text of (valid codes in first-seen order,
+            discount pattern index -> first matched value)
+        """
+        found = [({}, {}) for _ in texts]
+        if not texts:
             return []
         
-        codes = set()
-        text_upper = text.upper()
+        joined = '\0'.join(texts)
+        # End offset of each text in the joined string
+        ends = []
+        offset = -1
+        for text in texts:
+            offset += len(text) + 1
+            ends.append(offset)
+        
+        index = 0
+        codes, discounts = found[0]
+        resume_at = [0] * len(cls._CODE_REGEXES)
+        
+        for candidate in cls._MATCHER.finditer(joined):
+            pos = candidate.start()
+            if pos >= ends[index]:
+                # No match spans a NUL, so resume_at needs no reset here
+                while pos >= ends[index]:
+                    index += 1
+                codes, discounts = found[index]
+            for i, regex in enumerate(cls._CODE_REGEXES):
+                if pos < resume_at[i]:
+                    continue
+                match = regex.match(joined, pos)
+                if match:
+                    resume_at[i] = match.end()
+                    code = match.group(1).upper().strip()
+                    # Filter out common false positives
+                    if code not in codes and cls._is_valid_code(code):
+                        codes[code] = None
+            for i, regex in enumerate(cls._DISCOUNT_REGEXES):
+                if i not in discounts:
+                    match = regex.match(joined, pos)
+                    if match:
+                        discounts[i] = match.group(1)
         
-        for pattern in cls.PATTERNS:
-            matches = re.finditer(pattern, text_upper, re.IGNORECASE)
-            for match in matches:
-                code = match.group(1).strip()
-                # Filter out common false positives
-                if cls._is_valid_code(code):
-                    codes.add(code)
+        return [(list(codes), discounts) for codes, discounts in found]
+    
+    @classmethod
+    def extract_codes_from_text(cls, text: str) -> List[str]:
+        """
+        Extract potential discount codes from text
         
-        return list(codes)
+        Args:
+            text: Text to search for codes
+            
+        Returns:
+            List of extracted codes (uppercase, deduplicated)
+        """
+        codes, _ = cls._scan(text)
+        return codes
     
     @classmethod
     def extract_discount_percentage(cls, text: str) -> Optional[float]:
@@ -59,18 +198,8 @@ class CodeExtractor:
         Returns:
             Discount percentage as float, or None if not found
         """
-        if not text:
-            return None
-        
-        for pattern in cls.DISCOUNT_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except (ValueError, IndexError):
-                    continue
-        
-        return None
+        _, discount_pct = cls._scan(text)
+        return discount_pct
     
     @classmethod
     def _is_valid_code(cls, code: str) -> bool:
@@ -114,9 +243,31 @@ class CodeExtractor:
         Returns:
             List of dicts with 'code' and 'discount_percentage' keys
         """
-        codes = cls.extract_codes_from_text(text)
-        discount_pct = cls.extract_discount_percentage(text)
+        codes, discount_pct = cls._scan(text)
+        return cls._code_info(text, codes, discount_pct)
+    
+    @classmethod
+    def extract_code_info_many(cls, texts: List[str]) -> List[List[Dict[str, any]]]:
+        """
+        Extract codes with discount information from many texts at once
+        
+        Scans all the texts in one matcher pass, which avoids the per-call
+        overhead of extract_code_info on large batches of short texts.
         
+        Args:
+            texts: Texts to parse (e.g. video descriptions)
+            
+        Returns:
+            One list of code info dicts per input text, in the same order
+        """
+        return [
+            cls._code_info(text, codes, discount_pct)
+            for text, (codes, discount_pct) in zip(texts, cls._scan_many(texts))
+        ]
+    
+    @staticmethod
+    def _code_info(text: str, codes: List[str], discount_pct: Optional[float]) -> List[Dict[str, any]]:
+        """Build the code info dicts for the codes found in one text"""
         result = []
         for code in codes:
             result.append({
@@ -126,4 +277,3 @@ class CodeExtractor:
             })
         
         return result
-
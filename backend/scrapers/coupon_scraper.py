@@ -1,16 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from typing import Iterator, List, Dict, Tuple
 from datetime import datetime
-from scrapers.code_extractor import CodeExtractor
+from config import Config
+from scrapers.base import BaseScraper, ScrapeError
+from scrapers.coupon_sites import CouponSite, SITES
+from services.metrics import metrics
 
-class CouponScraper:
+class CouponScraper(BaseScraper):
     """Scrape discount codes from coupon websites"""
     
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    name = 'coupons'
+    
+    # requests.Session shared by all scrapers in the process, so connections
+    # to each site are kept alive and reused across scrapes
+    _shared_session = None
+    _shared_session_lock = threading.Lock()
+    
+    def __init__(self, sites: List[CouponSite] = None, session: requests.Session = None):
+        """
+        Args:
+            sites: Site parsers to scrape; defaults to one of each in SITES
+                if Config.COUPON_SITES_ENABLED, otherwise demo data is returned
+            session: HTTP session; None uses the shared pooled session
+        """
+        if sites is None and Config.COUPON_SITES_ENABLED:
+            sites = [site() for site in SITES]
+        self.sites = sites
+        self.session = session or self.shared_session()
+        self._stats_lock = threading.Lock()
+        self.last_scrape_stats = {}
+    
+    @classmethod
+    def shared_session(cls) -> requests.Session:
+        """Return the process-wide keep-alive session, creating it on first use"""
+        with cls._shared_session_lock:
+            if cls._shared_session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = (
+                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                )
+                adapter = HTTPAdapter(pool_connections=len(SITES) * 2,
+                                      pool_maxsize=Config.COUPON_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._shared_session = session
+            return cls._shared_session
     
     def scrape_codes(self, brand_name: str) -> List[Dict]:
         """
@@ -20,26 +58,106 @@ class CouponScraper:
             brand_name: Brand to search for
             
         Returns:
-            List of code information dicts
+            List of code information dicts, in site priority order; a code
+            listed by several sites is kept once, from the first site
+        
+        Raises:
+            ScrapeError: If a site failed, with the other sites' codes
+        """
+        if self.sites is None:
+            return [code for batch in self.iter_codes(brand_name) for code in batch]
+        
+        by_site = dict(self._iter_site_codes(brand_name))
+        codes = {}
+        for site in self.sites:
+            for code in by_site.get(site.name, []):
+                codes.setdefault(code['code'], code)
+        self._raise_for_failures(list(codes.values()))
+        return list(codes.values())
+    
+    def iter_codes(self, brand_name: str) -> Iterator[List[Dict]]:
         """
-        all_codes = []
+        Scrape coupon sites concurrently, yielding each site's codes as it finishes
         
-        # Try RetailMeNot-style scraping
-        codes = self._scrape_retailmenot_style(brand_name)
-        all_codes.extend(codes)
+        Sites that fail are logged and reported in last_scrape_stats; the
+        others' codes are still yielded.
         
-        return all_codes
+        Args:
+            brand_name: Brand to search for
+            
+        Yields:
+            Lists of code information dicts, one per site
+        
+        Raises:
+            ScrapeError: After yielding the other sites' codes, if a site failed
+        """
+        if self.sites is None:
+            print("Warning: Coupon site scraping not enabled. Returning mock data.")
+            codes = self._get_mock_coupon_data(brand_name)
+            if codes:
+                yield codes
+            return
+        
+        for _, codes in self._iter_site_codes(brand_name):
+            if codes:
+                yield codes
+        self._raise_for_failures()
     
-    def _scrape_retailmenot_style(self, brand_name: str) -> List[Dict]:
+    def _raise_for_failures(self, codes: List[Dict] = None):
+        """Raise ScrapeError carrying codes if any site failed in the last scrape"""
+        with self._stats_lock:
+            failures = [
+                f"{name}: {stats['error']}"
+                for name, stats in self.last_scrape_stats.items() if stats['status'] == 'error'
+            ]
+        if failures:
+            raise ScrapeError(f"{len(failures)} coupon site(s) failed: {'; '.join(failures)}", codes)
+    
+    def _iter_site_codes(self, brand_name: str) -> Iterator[Tuple[str, List[Dict]]]:
+        """Fetch all sites concurrently, yielding (site name, codes) as each finishes"""
+        with self._stats_lock:
+            self.last_scrape_stats = {}
+        if not self.sites:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=len(self.sites), thread_name_prefix='coupon-site')
+        futures = {executor.submit(self._scrape_site, site, brand_name): site for site in self.sites}
+        try:
+            for future in as_completed(futures):
+                yield futures[future].name, future.result()
+        finally:
+            # Don't block a caller that stopped early (e.g. on its deadline)
+            executor.shutdown(wait=False)
+    
+    def _scrape_site(self, site: CouponSite, brand_name: str) -> List[Dict]:
         """
-        Scrape RetailMeNot or similar sites
+        Fetch and parse one site's page for a brand
         
-        Note: This is a simplified version for demo purposes.
-        In production, you'd need to handle rate limits, CAPTCHAs, etc.
+        Returns:
+            The site's codes (at most Config.MAX_COUPON_RESULTS); empty if the
+            site doesn't list the brand or the request failed (failures are
+            recorded in last_scrape_stats and raised by the caller)
         """
-        # For MVP/demo, return mock data
-        # In production, implement actual scraping with proper error handling
-        return self._get_mock_coupon_data(brand_name)
+        url = site.url(brand_name)
+        started = time.perf_counter()
+        stats = {'status': 'ok', 'count': 0}
+        codes = []
+        try:
+            with metrics.span('coupons.fetch', site=site.name):
+                response = self.session.get(url, timeout=Config.COUPON_REQUEST_TIMEOUT)
+            stats['http_status'] = response.status_code
+            if response.status_code != 404:
+                response.raise_for_status()
+                codes = site.parse(response.content, url)[:Config.MAX_COUPON_RESULTS]
+        except Exception as e:
+            stats.update(status='error', error=str(e))
+            print(f"Error scraping {site.name}: {e}")
+        
+        stats['count'] = len(codes)
+        stats['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        with self._stats_lock:
+            self.last_scrape_stats[site.name] = stats
+        return codes
     
     def _get_mock_coupon_data(self, brand_name: str) -> List[Dict]:
         """Return mock coupon data for demo"""
@@ -0,0 +1,139 @@
+import re
+from datetime import datetime, date
+from typing import Dict, List, Optional
+from urllib.parse import quote
+from lxml import etree, html as lxml_html
+from models.code import normalize_brand
+from scrapers.code_extractor import CodeExtractor
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+class CouponSite:
+    """
+    Parser plugin for one coupon website, used by CouponScraper
+    
+    Subclasses set ``name`` (stored as the codes' source), ``base_url`` and
+    ``path`` (the brand page, formatted with ``slug``), and the XPath
+    selectors below, compiled once per class. OFFERS selects one element per
+    code offer; the other selectors are evaluated against an offer element.
+    Selectors target the page layout saved in benchmarks/fixtures/coupons;
+    when a site changes its markup, update the plugin and its fixture
+    together.
+    """
+    
+    name = 'site'
+    base_url = ''
+    path = '/{slug}'
+    
+    OFFERS = etree.XPath('/nothing')
+    CODE = etree.XPath('string()')
+    TITLE = etree.XPath('string()')
+    VERIFIED = etree.XPath('false()')
+    USES = etree.XPath("''")
+    EXPIRES = etree.XPath("''")  # ISO date (YYYY-MM-DD) or empty
+    
+    # Codes as stored: letters, digits, '-' and '_', at most the column width
+    CODE_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9_-]{2,49}$')
+    
+    def __init__(self, base_url: str = None):
+        """
+        Args:
+            base_url: Override for the site's base URL, e.g. a local
+                fixture server
+        """
+        self.base_url = (base_url or self.base_url).rstrip('/')
+    
+    def slug(self, brand_name: str) -> str:
+        """Brand name as it appears in the site's brand page URL"""
+        return quote('-'.join(normalize_brand(brand_name).split()))
+    
+    def url(self, brand_name: str) -> str:
+        """URL of the site's page for a brand"""
+        return self.base_url + self.path.format(slug=self.slug(brand_name))
+    
+    def parse(self, page: bytes, url: str) -> List[Dict]:
+        """
+        Extract code offers from a brand page
+        
+        Args:
+            page: Raw HTML
+            url: Address the page was fetched from (stored as source_url)
+        
+        Returns:
+            List of code information dicts, in page order (offers past
+            their expiry date are left out)
+        """
+        root = lxml_html.fromstring(page)
+        now = datetime.utcnow()
+        codes = []
+        for offer in self.OFFERS(root):
+            code = self.CODE(offer).strip().upper()
+            if not self.CODE_PATTERN.match(code):
+                continue
+            expiry_date = self._parse_date(self.EXPIRES(offer))
+            if expiry_date is not None and expiry_date < now.date():
+                continue
+            title = ' '.join(self.TITLE(offer).split())
+            codes.append({
+                'code': code,
+                'discount_percentage': CodeExtractor.extract_discount_percentage(title),
+                'discount_description': title[:200] or None,
+                'source': self.name,
+                'source_url': url,
+                'source_creator': self.name,
+                'status': 'verified' if self.VERIFIED(offer) else 'unverified',
+                'date_found': now,
+                'expiry_date': expiry_date,
+                'uses_count': self._parse_int(self.USES(offer))
+            })
+        return codes
+    
+    @staticmethod
+    def _parse_int(text: str) -> int:
+        """First number in text, ignoring thousands separators (0 if none)"""
+        match = re.search(r'\d[\d,]*', text or '')
+        return int(match.group().replace(',', '')) if match else 0
+    
+    @staticmethod
+    def _parse_date(text: str) -> Optional[date]:
+        """ISO date in text, or None if empty or malformed"""
+        try:
+            return date.fromisoformat(text.strip()) if text and text.strip() else None
+        except ValueError:
+            return None
+
+class RetailMeNotSite(CouponSite):
+    """RetailMeNot-style pages: offers carry their data in data-* attributes"""
+    
+    name = 'RetailMeNot'
+    base_url = 'https://www.retailmenot.com'
+    path = '/view/{slug}.com'
+    
+    OFFERS = etree.XPath('//*[@data-offer-type="code"][@data-code]')
+    CODE = etree.XPath('string(@data-code)')
+    TITLE = etree.XPath(f'string(.//*[{_has_class("offer-title")}])')
+    VERIFIED = etree.XPath('@data-verified = "true"')
+    USES = etree.XPath(f'string(.//*[{_has_class("offer-uses")}])')
+    EXPIRES = etree.XPath('string(@data-expires)')
+    
+    def slug(self, brand_name: str) -> str:
+        return quote(''.join(normalize_brand(brand_name).split()))
+
+class CouponDBSite(CouponSite):
+    """CouponDB-style pages: a table of codes, one row per offer"""
+    
+    name = 'CouponDB'
+    base_url = 'https://www.coupondb.com'
+    path = '/{slug}'
+    
+    OFFERS = etree.XPath(f'//table[{_has_class("coupons")}]/tbody/tr[.//*[{_has_class("code")}]]')
+    CODE = etree.XPath(f'string(.//*[{_has_class("code")}])')
+    TITLE = etree.XPath(f'string(.//td[{_has_class("description")}])')
+    VERIFIED = etree.XPath(f'boolean(.//*[{_has_class("badge-verified")}])')
+    USES = etree.XPath(f'string(.//td[{_has_class("used")}])')
+    EXPIRES = etree.XPath(f'string(.//td[{_has_class("expires")}]/time/@datetime)')
+
+# Sites CouponScraper scrapes by default, in priority order
+SITES = (RetailMeNotSite, CouponDBSite)
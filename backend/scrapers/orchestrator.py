@@ -0,0 +1,206 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Iterator, List, Dict, Optional
+from scrapers.base import BaseScraper, ScrapeError
+from services.metrics import metrics
+
+class ScrapeOrchestrator:
+    """Run several scrapers concurrently, each bounded by its own deadline"""
+    
+    def __init__(self, sources: List[BaseScraper], timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            sources: Scrapers to fan out to, in priority order
+            timeouts: Optional per-source timeout overrides keyed by source name
+        """
+        self.sources = sources
+        self.timeouts = timeouts or {}
+    
+    def scrape(self, brand_name: str) -> Dict:
+        """
+        Scrape all sources for a brand concurrently
+        
+        Sources that fail or miss their deadline are reported in the status map
+        and their codes are left out, except those a ScrapeError carries from a
+        partly failed source; results from the others are still returned.
+        Codes found by several sources are kept once, from the earliest source.
+        
+        Args:
+            brand_name: Brand to search for
+        
+        Returns:
+            Dict with 'codes' (list of code dicts) and 'sources'
+            (source name -> status, count, elapsed_ms and optional error)
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.sources)),
+            thread_name_prefix='scrape'
+        )
+        started = time.monotonic()
+        futures = [
+            executor.submit(self._run_source, source, brand_name)
+            for source in self.sources
+        ]
+        
+        results = []
+        statuses = {}
+        try:
+            for source, future in zip(self.sources, futures):
+                deadline = started + self.timeouts.get(source.name, source.timeout)
+                try:
+                    codes, elapsed = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                    statuses[source.name] = {
+                        'status': 'ok',
+                        'count': len(codes),
+                        'elapsed_ms': round(elapsed * 1000, 1)
+                    }
+                    results.append(codes)
+                except FutureTimeoutError:
+                    future.cancel()
+                    statuses[source.name] = {
+                        'status': 'timeout',
+                        'count': 0,
+                        'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+                    }
+                    print(f"[Scrape] {source.name} timed out for {brand_name}")
+                except ScrapeError as e:
+                    statuses[source.name] = {
+                        'status': 'error',
+                        'count': len(e.codes),
+                        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+                        'error': str(e)
+                    }
+                    results.append(e.codes)
+                    print(f"[Scrape] {source.name} partly failed for {brand_name}: {e}")
+                except Exception as e:
+                    statuses[source.name] = {
+                        'status': 'error',
+                        'count': 0,
+                        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+                        'error': str(e)
+                    }
+                    print(f"[Scrape] {source.name} failed for {brand_name}: {e}")
+        finally:
+            # Don't block on sources that overran their deadline
+            executor.shutdown(wait=False)
+        
+        all_codes = []
+        seen_codes = set()
+        for codes in results:
+            for code_info in codes:
+                if code_info['code'] not in seen_codes:
+                    seen_codes.add(code_info['code'])
+                    all_codes.append(code_info)
+        
+        return {
+            'codes': all_codes,
+            'sources': statuses
+        }
+    
+    @staticmethod
+    def _run_source(source: BaseScraper, brand_name: str):
+        """Run one source and time it"""
+        started = time.monotonic()
+        with metrics.span('scraper', source=source.name):
+            codes = source.scrape_codes(brand_name)
+        return codes, time.monotonic() - started
+    
+    def stream(self, brand_name: str) -> Iterator[Dict]:
+        """
+        Scrape all sources concurrently, yielding codes as sources produce them
+        
+        Each source's ``iter_codes`` runs in its own thread and its batches
+        are passed on as they arrive. Codes already yielded by any source are
+        dropped, so the first source to report a code wins. A source that
+        misses its deadline is reported as timed out; codes it yielded before
+        the deadline have already been passed on.
+        
+        Args:
+            brand_name: Brand to search for
+        
+        Yields:
+            ``{'type': 'codes', 'source', 'codes'}`` for each batch with new
+            codes, and ``{'type': 'source', 'source', 'status', 'count',
+            'elapsed_ms'[, 'error']}`` when a source finishes, fails or times out
+        """
+        events = queue.Queue()
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.sources)),
+            thread_name_prefix='scrape'
+        )
+        started = time.monotonic()
+        deadlines = {}
+        counts = {}
+        for source in self.sources:
+            deadlines[source.name] = started + self.timeouts.get(source.name, source.timeout)
+            counts[source.name] = 0
+            executor.submit(self._pump_source, source, brand_name, events)
+        
+        seen_codes = set()
+        try:
+            while deadlines:
+                try:
+                    name, kind, payload = events.get(
+                        timeout=max(0.0, min(deadlines.values()) - time.monotonic())
+                    )
+                except queue.Empty:
+                    now = time.monotonic()
+                    for name, deadline in list(deadlines.items()):
+                        if deadline <= now:
+                            del deadlines[name]
+                            print(f"[Scrape] {name} timed out for {brand_name}")
+                            yield self._status_event(name, 'timeout', counts[name], now - started)
+                    continue
+                
+                if name not in deadlines:
+                    # Late output from a source that already timed out
+                    continue
+                
+                if kind == 'codes':
+                    counts[name] += len(payload)
+                    new_codes = []
+                    for code_info in payload:
+                        if code_info['code'] not in seen_codes:
+                            seen_codes.add(code_info['code'])
+                            new_codes.append(code_info)
+                    if new_codes:
+                        yield {'type': 'codes', 'source': name, 'codes': new_codes}
+                    continue
+                
+                del deadlines[name]
+                if kind == 'done':
+                    yield self._status_event(name, 'ok', counts[name], payload)
+                else:
+                    print(f"[Scrape] {name} failed for {brand_name}: {payload}")
+                    yield self._status_event(name, 'error', counts[name],
+                                             time.monotonic() - started, str(payload))
+        finally:
+            # Don't block on sources that overran their deadline
+            executor.shutdown(wait=False)
+    
+    @staticmethod
+    def _pump_source(source: BaseScraper, brand_name: str, events: queue.Queue):
+        """Run one source's iter_codes, passing its batches and outcome to events"""
+        started = time.monotonic()
+        try:
+            with metrics.span('scraper', source=source.name):
+                for codes in source.iter_codes(brand_name):
+                    events.put((source.name, 'codes', codes))
+            events.put((source.name, 'done', time.monotonic() - started))
+        except Exception as e:
+            events.put((source.name, 'error', e))
+    
+    @staticmethod
+    def _status_event(name: str, status: str, count: int, elapsed: float,
+                      error: str = None) -> Dict:
+        event = {
+            'type': 'source',
+            'source': name,
+            'status': status,
+            'count': count,
+            'elapsed_ms': round(elapsed * 1000, 1)
+        }
+        if error is not None:
+            event['error'] = error
+        return event
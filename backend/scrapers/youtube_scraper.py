@@ -1,18 +1,62 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 from config import Config
+from scrapers.base import BaseScraper, ScrapeError
 from scrapers.code_extractor import CodeExtractor
-from datetime import datetime
+from services.disk_cache import DiskCache
+from services.metrics import metrics
+from datetime import datetime, timezone
 
-class YouTubeScraper:
+class YouTubeScraper(BaseScraper):
     """Scrape discount codes from YouTube video descriptions"""
     
-    def __init__(self, api_key: str = None):
+    name = 'youtube'
+    
+    # YouTube Data API quota cost per call (units)
+    SEARCH_QUOTA_COST = 100
+    VIDEOS_QUOTA_COST = 1
+    
+    # Maximum number of IDs accepted by a single videos().list call
+    VIDEOS_BATCH_SIZE = 50
+    
+    # Incremental scrapes: results per search page (the API maximum) and
+    # pages followed per query before giving up on reaching seen videos
+    SEARCH_PAGE_SIZE = 50
+    MAX_INCREMENTAL_PAGES = 4
+    
+    _shared_cache = None
+    _shared_cache_path = None
+    _shared_cache_lock = threading.Lock()
+    
+    def __init__(self, api_key: str = None, client=None, cache=None):
+        """
+        Args:
+            api_key: YouTube Data API key (defaults to Config.YOUTUBE_API_KEY)
+            client: Prebuilt API client, e.g. a stub for offline runs
+            cache: DiskCache for API responses; None uses the shared cache
+                (see configure_shared_cache), False disables caching
+        """
         self.api_key = api_key or Config.YOUTUBE_API_KEY
-        self.youtube = None
-        if self.api_key:
+        self.cache = self.shared_cache() if cache is None else (cache or None)
+        self.youtube = client
+        # Clients we build use httplib2, which is not thread-safe: concurrent
+        # requests each get a per-thread Http object instead.
+        self._owns_client = False
+        if self.youtube is None and self.api_key:
             self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+            self._owns_client = True
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.last_scrape_stats = self._new_stats()
+        # High-water mark from the previous scrape of the brand ({'published_at',
+        # 'seen_ids'}), set by the caller; the updated mark is left in
+        # next_watermark after a scrape
+        self.watermark = None
+        self.next_watermark = None
     
     def scrape_codes(self, brand_name: str, max_results: int = 30) -> List[Dict]:
         """
@@ -24,91 +68,367 @@ class YouTubeScraper:
             
         Returns:
             List of dicts containing code information
+        
+        Raises:
+            ScrapeError: If an API request failed, with the codes found anyway
         """
+        codes = []
+        try:
+            for batch in self.iter_codes(brand_name, max_results):
+                codes.extend(batch)
+        except ScrapeError as e:
+            raise ScrapeError(str(e), codes) from e
+        return codes
+    
+    def iter_codes(self, brand_name: str, max_results: int = 30) -> Iterator[List[Dict]]:
+        """
+        Search YouTube for discount codes, yielding them as videos are fetched
+        
+        The search queries run concurrently. Video IDs from all of them are
+        deduplicated and their details fetched in batches, so each video costs
+        at most one share of a videos().list call. Codes are yielded after each
+        batch. API usage is recorded in ``last_scrape_stats``.
+        
+        If ``watermark`` is set, the scrape is incremental: each query asks
+        for videos published since the mark, newest first, following result
+        pages until it reaches an already processed video, and only new
+        videos are fetched and returned. With more than max_results new
+        videos, the oldest are processed first and the rest are left for the
+        next scrape.
+        
+        ``next_watermark`` is set to the mark for the following scrape once
+        the generator is exhausted, but only if every request succeeded and
+        each query's paging reached already processed videos (or the last
+        page). Otherwise it stays None and the previous mark should be kept,
+        so no new video is skipped.
+        
+        Args:
+            brand_name: Brand to search for
+            max_results: Maximum number of videos to check
+            
+        Yields:
+            Lists of code information dicts, each code at most once
+        
+        Raises:
+            ScrapeError: After yielding what was found, if an API request failed
+        """
+        self.last_scrape_stats = self._new_stats()
+        self.next_watermark = None
+        
         if not self.youtube:
             print("Warning: YouTube API key not configured. Returning mock data.")
-            return self._get_mock_data(brand_name)
+            yield self._get_mock_data(brand_name)
+            return
         
-        try:
-            # Search for videos containing discount codes
-            search_queries = [
-                f"{brand_name} discount code",
-                f"{brand_name} coupon code",
-                f"{brand_name} promo code"
-            ]
-            
-            all_codes = []
-            seen_codes = set()
-            
-            for query in search_queries:
-                codes = self._search_videos(query, max_results // len(search_queries))
-                for code_info in codes:
+        # Search for videos containing discount codes
+        search_queries = [
+            f"{brand_name} discount code",
+            f"{brand_name} coupon code",
+            f"{brand_name} promo code"
+        ]
+        
+        watermark = self.watermark
+        incremental = bool(watermark and watermark.get('published_at'))
+        seen_ids = set(watermark['seen_ids']) if incremental else set()
+        per_query = max_results // len(search_queries)
+        self.last_scrape_stats['incremental'] = incremental
+        failures = []
+        
+        def search(query: str) -> Tuple[List[Tuple[str, Optional[str]]], bool]:
+            """Run one query; returns (videos, whether paging completed)"""
+            try:
+                if incremental:
+                    return self._search_new_videos(query, watermark['published_at'], seen_ids)
+                return self._search_videos(query, per_query), True
+            except Exception as e:
+                print(f"Error searching videos: {e}")
+                failures.append(e)
+                return [], False
+        
+        # Collect unique video IDs across all queries, keeping search order
+        with ThreadPoolExecutor(max_workers=len(search_queries)) as executor:
+            search_results = list(executor.map(search, search_queries))
+        
+        found = {}
+        for videos, _ in search_results:
+            for video_id, published_at in videos:
+                if video_id not in seen_ids:
+                    found.setdefault(video_id, published_at)
+        video_ids = list(found)
+        if incremental and len(video_ids) > max_results:
+            # Oldest first: the mark then only moves past processed videos,
+            # and the newer ones are found again by the next scrape
+            video_ids = sorted(video_ids, key=lambda video_id: found[video_id] or '')[:max_results]
+        
+        published = {}
+        seen_codes = set()
+        
+        for videos in self._iter_video_details(video_ids, failures):
+            codes = []
+            for video_id, video_data in videos.items():
+                published[video_id] = video_data.get('snippet', {}).get('publishedAt')
+                for code_info in self._extract_codes(video_id, video_data):
                     code = code_info['code']
                     if code not in seen_codes:
                         seen_codes.add(code)
-                        all_codes.append(code_info)
-            
-            return all_codes
+                        codes.append(code_info)
+            if codes:
+                yield codes
+        
+        stats = self.last_scrape_stats
+        stats['complete'] = all(done for _, done in search_results) and not failures
+        if stats['complete']:
+            self.next_watermark = self._advance_watermark(watermark, published)
         
-        except HttpError as e:
-            print(f"YouTube API error: {e}")
-            return []
-        except Exception as e:
-            print(f"Error scraping YouTube: {e}")
-            return []
+        print(f"[YouTube] {brand_name}: {stats['api_calls']} API calls, "
+              f"{stats['quota_units']} quota units, {stats['videos']} videos")
+        
+        if failures:
+            raise ScrapeError(f"{len(failures)} YouTube API request(s) failed: {failures[0]}")
     
-    def _search_videos(self, query: str, max_results: int) -> List[Dict]:
-        """Search for videos and extract codes from descriptions"""
-        try:
-            # Search for videos
-            search_response = self.youtube.search().list(
-                q=query,
-                part='id,snippet',
-                maxResults=max_results,
-                type='video',
-                order='relevance'
-            ).execute()
+    @classmethod
+    def configure_shared_cache(cls, path: str):
+        """
+        Point the process-wide response cache at path ('' disables it)
+        
+        Until this is called the cache lives at Config.YOUTUBE_CACHE_PATH.
+        """
+        with cls._shared_cache_lock:
+            if cls._shared_cache is not None and cls._shared_cache.path != path:
+                cls._shared_cache = None
+            cls._shared_cache_path = path
+    
+    @classmethod
+    def shared_cache(cls):
+        """Return the process-wide response cache, or None if it is disabled"""
+        with cls._shared_cache_lock:
+            path = Config.YOUTUBE_CACHE_PATH if cls._shared_cache_path is None else cls._shared_cache_path
+            if not path:
+                return None
+            if cls._shared_cache is None:
+                try:
+                    cls._shared_cache = DiskCache(
+                        path,
+                        max_bytes=Config.YOUTUBE_CACHE_MAX_MB * 1024 * 1024
+                    )
+                except Exception as e:
+                    print(f"Warning: YouTube response cache unavailable: {e}")
+                    return None
+            return cls._shared_cache
+    
+    def _new_stats(self) -> Dict:
+        """Return an empty API usage record for one scrape"""
+        return {
+            'api_calls': 0,
+            'quota_units': 0,
+            'search_calls': 0,
+            'videos_calls': 0,
+            'search_cache_hits': 0,
+            'video_cache_hits': 0,
+            'videos': 0,
+            'incremental': False,
+            'complete': False
+        }
+    
+    def _record_cache_hits(self, kind: str, hits: int):
+        """Count API results served from the response cache"""
+        with self._stats_lock:
+            self.last_scrape_stats[f'{kind}_cache_hits'] += hits
+    
+    def _record_call(self, kind: str, quota_cost: int):
+        """Count one API call and its quota cost towards the current scrape"""
+        with self._stats_lock:
+            stats = self.last_scrape_stats
+            stats['api_calls'] += 1
+            stats['quota_units'] += quota_cost
+            stats[f'{kind}_calls'] += 1
+    
+    def _execute(self, request, kind: str) -> Dict:
+        """Execute an API request, safely from any thread"""
+        with metrics.span(f'youtube.{kind}'):
+            if not self._owns_client:
+                return request.execute()
+            http = getattr(self._local, 'http', None)
+            if http is None:
+                http = self._local.http = httplib2.Http()
+            return request.execute(http=http)
+    
+    def _search(self, params: Dict) -> Dict:
+        """
+        Run one search().list call
+        
+        Responses are cached by their parameters for
+        Config.YOUTUBE_SEARCH_CACHE_TTL hours.
+        """
+        cache_key = json.dumps(params, sort_keys=True)
+        search_response = self.cache.get('search', cache_key) if self.cache else None
+        if search_response is not None:
+            self._record_cache_hits('search', 1)
+            return search_response
+        
+        self._record_call('search', self.SEARCH_QUOTA_COST)
+        search_response = self._execute(self.youtube.search().list(**params), 'search')
+        if self.cache:
+            self.cache.set('search', cache_key, search_response,
+                           Config.YOUTUBE_SEARCH_CACHE_TTL * 3600)
+        return search_response
+    
+    @staticmethod
+    def _video_items(search_response: Dict) -> List[Tuple[str, Optional[str]]]:
+        """(video ID, publishedAt) of a search response's videos, in result order"""
+        return [
+            (item['id']['videoId'], item.get('snippet', {}).get('publishedAt'))
+            for item in search_response.get('items', [])
+            if item.get('id', {}).get('videoId')
+        ]
+    
+    def _search_videos(self, query: str, max_results: int) -> List[Tuple[str, Optional[str]]]:
+        """Search for videos in relevance order (see _video_items)"""
+        return self._video_items(self._search({
+            'q': query,
+            'part': 'id,snippet',
+            'maxResults': max_results,
+            'type': 'video',
+            'order': 'relevance'
+        }))
+    
+    def _search_new_videos(self, query: str, published_after: datetime,
+                           seen_ids: Set[str]) -> Tuple[List[Tuple[str, Optional[str]]], bool]:
+        """
+        Search for videos published since a high-water mark, newest first
+        
+        Follows nextPageToken until a page contains an already processed
+        video, there are no more pages, or MAX_INCREMENTAL_PAGES is reached.
+        Request errors are raised.
+        
+        Returns:
+            Tuple of (unseen videos found, see _video_items; True unless
+            paging stopped at MAX_INCREMENTAL_PAGES before reaching seen
+            videos or the last page)
+        """
+        params = {
+            'q': query,
+            'part': 'id,snippet',
+            'maxResults': self.SEARCH_PAGE_SIZE,
+            'type': 'video',
+            'order': 'date',
+            'publishedAfter': published_after.strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
+        new_videos = []
+        for _ in range(self.MAX_INCREMENTAL_PAGES):
+            search_response = self._search(params)
+            for video_id, published_at in self._video_items(search_response):
+                if video_id in seen_ids:
+                    # Results are newest first: the rest were seen too
+                    return new_videos, True
+                new_videos.append((video_id, published_at))
             
-            codes = []
+            page_token = search_response.get('nextPageToken')
+            if not page_token:
+                return new_videos, True
+            params = dict(params, pageToken=page_token)
+        
+        return new_videos, False
+    
+    def _advance_watermark(self, watermark: Optional[Dict],
+                           published: Dict[str, Optional[str]]) -> Dict:
+        """
+        Move a brand's high-water mark past the videos processed in this scrape
+        
+        Args:
+            watermark: Previous mark, or None on a first scrape
+            published: publishedAt of the videos processed by this scrape
+        
+        Returns:
+            Dict with 'published_at' (naive UTC datetime or None) and
+            'seen_ids' (newest first)
+        """
+        published_at = watermark.get('published_at') if watermark else None
+        processed = sorted(published, key=lambda video_id: published[video_id] or '', reverse=True)
+        
+        for video_id in processed:
+            try:
+                video_published = datetime.fromisoformat(published[video_id].replace('Z', '+00:00'))
+            except (AttributeError, ValueError):
+                continue
+            if video_published.tzinfo is not None:
+                video_published = video_published.astimezone(timezone.utc).replace(tzinfo=None)
+            if published_at is None or video_published > published_at:
+                published_at = video_published
+        
+        previous_ids = watermark.get('seen_ids', []) if watermark else []
+        return {
+            'published_at': published_at,
+            'seen_ids': processed + [v for v in previous_ids if v not in published]
+        }
+    
+    def _iter_video_details(self, video_ids: List[str],
+                            failures: List[Exception]) -> Iterator[Dict[str, Dict]]:
+        """
+        Fetch full video details in batches of up to VIDEOS_BATCH_SIZE IDs
+        
+        Videos found in the response cache are not requested again; fetched
+        ones are cached by ID for Config.YOUTUBE_VIDEO_CACHE_TTL hours.
+        
+        Args:
+            video_ids: Unique video IDs
+            failures: List failed requests are appended to; the other
+                batches are still fetched
             
-            for item in search_response.get('items', []):
-                video_id = item['id']['videoId']
-                snippet = item['snippet']
-                
-                # Get full video details including description
-                video_response = self.youtube.videos().list(
-                    id=video_id,
-                    part='snippet,statistics'
-                ).execute()
-                
-                if not video_response.get('items'):
-                    continue
-                
-                video_data = video_response['items'][0]
-                description = video_data['snippet'].get('description', '')
-                title = video_data['snippet'].get('title', '')
-                channel_name = video_data['snippet'].get('channelTitle', '')
-                published_at = video_data['snippet'].get('publishedAt', '')
-                
-                # Extract codes from description
-                extracted = CodeExtractor.extract_code_info(description + ' ' + title)
-                
-                for code_data in extracted:
-                    codes.append({
-                        'code': code_data['code'],
-                        'discount_percentage': code_data['discount_percentage'],
-                        'source': 'YouTube',
-                        'source_url': f'https://www.youtube.com/watch?v={video_id}',
-                        'source_creator': channel_name,
-                        'status': 'unverified',
-                        'date_found': self._parse_youtube_date(published_at)
-                    })
+        Yields:
+            Dicts mapping video ID to its videos().list item: first the
+            cached videos, then one per fetched batch
+        """
+        cached = self.cache.get_many('video', video_ids) if self.cache else {}
+        if cached:
+            self._record_cache_hits('video', len(cached))
+            self.last_scrape_stats['videos'] += len(cached)
+            video_ids = [video_id for video_id in video_ids if video_id not in cached]
+            yield cached
+        
+        for start in range(0, len(video_ids), self.VIDEOS_BATCH_SIZE):
+            batch = video_ids[start:start + self.VIDEOS_BATCH_SIZE]
+            try:
+                self._record_call('videos', self.VIDEOS_QUOTA_COST)
+                video_response = self._execute(self.youtube.videos().list(
+                    id=','.join(batch),
+                    part='snippet,statistics',
+                    maxResults=len(batch)
+                ), 'videos')
+            except Exception as e:
+                print(f"Error fetching video details: {e}")
+                failures.append(e)
+                continue
             
-            return codes
+            fetched = {item['id']: item for item in video_response.get('items', [])}
+            if self.cache:
+                self.cache.set_many('video', fetched, Config.YOUTUBE_VIDEO_CACHE_TTL * 3600)
+            self.last_scrape_stats['videos'] += len(fetched)
+            yield fetched
+    
+    def _extract_codes(self, video_id: str, video_data: Dict) -> List[Dict]:
+        """Extract codes from a single video's description and title"""
+        snippet = video_data.get('snippet', {})
+        description = snippet.get('description', '')
+        title = snippet.get('title', '')
+        channel_name = snippet.get('channelTitle', '')
+        published_at = snippet.get('publishedAt', '')
+        
+        # Extract codes from description
+        extracted = CodeExtractor.extract_code_info(description + ' ' + title)
         
-        except Exception as e:
-            print(f"Error searching videos: {e}")
-            return []
+        return [
+            {
+                'code': code_data['code'],
+                'discount_percentage': code_data['discount_percentage'],
+                'source': 'YouTube',
+                'source_url': f'https://www.youtube.com/watch?v={video_id}',
+                'source_creator': channel_name,
+                'status': 'unverified',
+                'date_found': self._parse_youtube_date(published_at)
+            }
+            for code_data in extracted
+        ]
     
     def _parse_youtube_date(self, date_str: str) -> datetime:
         """Parse YouTube date format"""
@@ -0,0 +1,222 @@
+import atexit
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import select, insert, delete, func, literal, and_, or_
+from models.code import db, Code
+from models.archive import ArchivedCode
+from models.lock import GenerationLock
+from services.response_cache import invalidate_brands
+
+class CodeSweeper:
+    """
+    Move expired codes from the codes table to the codes_archive table
+    
+    A code is expired when its expiry_date has passed, when its status is
+    already 'expired', or when no scrape has seen it for ``expire_after``
+    hours. Each sweep walks the codes table once in primary key order, and
+    every batch's expired rows are copied to the archive (with status
+    'expired') and deleted in one transaction, so searches only scan and
+    sort live codes. Sweeps run periodically in a background thread and
+    take a GenerationLock, so only one process sweeps at a time. The lock's
+    lease is renewed before every batch, however long the sweep runs; a
+    sweep that lost its lock stops.
+    """
+    
+    LOCK_KEY = 'code-sweeper'
+    LOCK_TTL = 900  # Seconds; a sweep's lock lease, renewed per batch
+    
+    def __init__(self, app, interval: float = 3600, batch_size: int = 500,
+                 expire_after: float = 720):
+        """
+        Args:
+            app: Flask app, for the app context sweeps run in
+            interval: Seconds between sweeps; 0 disables background sweeps
+            batch_size: Rows examined per transaction
+            expire_after: Hours after the last sighting that a code expires
+        """
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.expire_after = expire_after
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            'sweeps': 0,
+            'skipped_locked': 0,
+            'lost_lock': 0,
+            'errors': 0,
+            'archived_total': 0,
+            'running': 0,
+            # Progress of the running (or last) sweep
+            'scanned': 0,
+            'to_scan': 0,
+            'batches': 0,
+            'archived': 0,
+            'last_sweep_seconds': 0.0,
+            'last_sweep_at': 0.0,  # Unix time the last sweep finished
+            # Table sizes after the last sweep
+            'hot_rows': 0,
+            'archived_rows': 0
+        }
+    
+    def start(self):
+        """Start sweeping in the background every interval seconds"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._sweep_loop, name='code-sweeper', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+    
+    def stop(self):
+        """Stop the background thread, letting a running batch finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def sweep(self) -> Dict:
+        """
+        Archive all expired codes now
+        
+        Returns:
+            Dict with 'archived' and 'scanned' row counts and 'batches', or
+            ``{'skipped': True}`` if another process holds the sweep lock
+        """
+        with self.app.app_context():
+            try:
+                if not GenerationLock.acquire(self.LOCK_KEY, self.owner, self.LOCK_TTL):
+                    self._count('skipped_locked')
+                    return {'skipped': True}
+                try:
+                    return self._sweep()
+                finally:
+                    GenerationLock.release(self.LOCK_KEY, self.owner)
+            except Exception as e:
+                db.session.rollback()
+                self._count('errors')
+                print(f"[CodeSweeper] Sweep failed: {e}")
+                return {'error': str(e)}
+            finally:
+                with self._lock:
+                    self._stats['running'] = 0
+                db.session.remove()
+    
+    def _sweep(self) -> Dict:
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        unseen_before = now - timedelta(hours=self.expire_after)
+        today = now.date()
+        
+        table = Code.__table__
+        max_id = db.session.execute(select(func.max(table.c.id))).scalar() or 0
+        with self._lock:
+            self._stats.update({
+                'running': 1, 'scanned': 0, 'batches': 0, 'archived': 0,
+                'to_scan': db.session.execute(select(func.count()).select_from(table)).scalar()
+            })
+        db.session.commit()
+        
+        last_id = 0
+        while last_id < max_id and not self._stop.is_set():
+            if not GenerationLock.renew(self.LOCK_KEY, self.owner, self.LOCK_TTL):
+                self._count('lost_lock')
+                print("[CodeSweeper] Lost the sweep lock, stopping")
+                break
+            rows = db.session.execute(
+                select(table.c.id, table.c.brand_key, table.c.status, table.c.expiry_date,
+                       func.coalesce(table.c.last_seen_at, table.c.created_at).label('last_seen'))
+                .where(table.c.id > last_id, table.c.id <= max_id)
+                .order_by(table.c.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            
+            expired = [
+                row for row in rows
+                if row.status == 'expired'
+                or (row.expiry_date is not None and row.expiry_date < today)
+                or (row.last_seen is not None and row.last_seen < unseen_before)
+            ]
+            archived = 0
+            if expired:
+                archived = self._archive([row.id for row in expired], today, unseen_before, now)
+            db.session.commit()
+            if archived:
+                invalidate_brands({row.brand_key for row in expired})
+            
+            with self._lock:
+                self._stats['scanned'] += len(rows)
+                self._stats['batches'] += 1
+                self._stats['archived'] += archived
+                self._stats['archived_total'] += archived
+        
+        hot_rows = db.session.execute(select(func.count()).select_from(table)).scalar()
+        archived_rows = db.session.execute(select(func.count(ArchivedCode.id))).scalar()
+        db.session.commit()
+        
+        with self._lock:
+            self._stats['sweeps'] += 1
+            self._stats['last_sweep_seconds'] = time.perf_counter() - started
+            self._stats['last_sweep_at'] = time.time()
+            self._stats['hot_rows'] = hot_rows
+            self._stats['archived_rows'] = archived_rows
+            return {
+                'archived': self._stats['archived'],
+                'scanned': self._stats['scanned'],
+                'batches': self._stats['batches']
+            }
+    
+    def _archive(self, code_ids: List[int], today, unseen_before: datetime, now: datetime) -> int:
+        """
+        Copy codes to the archive as expired and delete them, without committing
+        
+        Expiry is checked again in SQL, so a code a scrape saw since it was
+        read stays in the codes table.
+        
+        Returns:
+            Number of codes archived
+        """
+        table = Code.__table__
+        still_expired = and_(
+            table.c.id.in_(code_ids),
+            or_(
+                table.c.status == 'expired',
+                table.c.expiry_date < today,
+                func.coalesce(table.c.last_seen_at, table.c.created_at) < unseen_before
+            )
+        )
+        columns = [
+            literal('expired').label('status') if name == 'status' else table.c[name]
+            for name in ArchivedCode.COPIED_COLUMNS
+        ]
+        db.session.execute(
+            insert(ArchivedCode.__table__).from_select(
+                ['code_id', *ArchivedCode.COPIED_COLUMNS, 'archived_at'],
+                select(table.c.id, *columns, literal(now, type_=db.DateTime)).where(still_expired)
+            )
+        )
+        return db.session.execute(delete(table).where(still_expired)).rowcount
+    
+    def _sweep_loop(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def stats(self) -> Dict:
+        """Return sweep counters, the current sweep's progress and table sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['interval'] = self.interval
+        stats['expire_after_hours'] = self.expire_after
+        return stats
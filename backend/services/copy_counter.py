@@ -0,0 +1,84 @@
+from typing import Dict, Optional
+from sqlalchemy import update, bindparam
+from models.code import db, Code
+from services.response_cache import invalidate_brands
+from services.write_behind import WriteBehindBuffer
+
+class CopyCounter(WriteBehindBuffer):
+    """
+    Write-behind buffer for code copy counts
+    
+    Copy events are summed in memory per code ID and flushed periodically in
+    one transaction of atomic ``uses_count = uses_count + n`` updates, so
+    clicks don't each cost a write transaction and concurrent clicks can't
+    lose increments. With a flush interval of 0 every event is written
+    immediately (still atomically).
+    """
+    
+    # Name of the background flusher thread
+    THREAD_NAME = 'copy-counter'
+    
+    def __init__(self, app, flush_interval: float = 5.0):
+        """
+        Args:
+            app: Flask app, for the app context flushes run in
+            flush_interval: Seconds between flushes; 0 disables buffering
+        """
+        super().__init__(app, flush_interval, {'events': 0, 'rows_written': 0})
+        self._pending: Dict[int, list] = {}  # code_id -> [count, brand_key]
+    
+    def record(self, code_id: int, brand_key: str) -> int:
+        """
+        Count one copy of a code
+        
+        Args:
+            code_id: ID of the copied code
+            brand_key: The code's brand key, for search cache invalidation
+        
+        Returns:
+            Number of this code's copies recorded since the last flush,
+            including this one (add it to a uses_count read before the call)
+        """
+        with self._lock:
+            self._stats['events'] += 1
+            entry = self._pending.setdefault(code_id, [0, brand_key])
+            entry[0] += 1
+            pending = entry[0]
+        
+        if self.flush_interval <= 0:
+            self.flush()
+        return pending
+    
+    def _take(self) -> Optional[Dict[int, list]]:
+        pending, self._pending = self._pending, {}
+        return pending or None
+    
+    def _write(self, pending: Dict[int, list]) -> int:
+        params = [
+            {'code_id': code_id, 'n': count}
+            for code_id, (count, _) in pending.items()
+        ]
+        stmt = (
+            update(Code.__table__)
+            .where(Code.__table__.c.id == bindparam('code_id'))
+            .values(uses_count=Code.__table__.c.uses_count + bindparam('n'))
+        )
+        db.session.execute(stmt, params)
+        return len(params)
+    
+    def _restore(self, pending: Dict[int, list]):
+        for code_id, (count, brand_key) in pending.items():
+            entry = self._pending.setdefault(code_id, [0, brand_key])
+            entry[0] += count
+    
+    def _count_flush(self, pending: Dict[int, list], rows: int):
+        self._stats['rows_written'] += rows
+    
+    def _after_flush(self, pending: Dict[int, list]):
+        invalidate_brands({brand_key for _, brand_key in pending.values()})
+    
+    def _pending_stats(self) -> Dict:
+        return {
+            'pending_codes': len(self._pending),
+            'pending_events': sum(count for count, _ in self._pending.values())
+        }
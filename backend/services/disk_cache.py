@@ -0,0 +1,254 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+class DiskCache:
+    """
+    Persistent key/value cache in a SQLite file, shared across processes
+    
+    Entries are JSON values grouped by kind (e.g. 'search', 'video'), each
+    with its own expiry. When the stored size exceeds ``max_bytes`` the least
+    recently used entries are evicted. Cache errors are logged and treated as
+    misses, so a broken cache file never breaks the caller.
+    
+    Reads don't write: access times of hits are buffered in memory and
+    written in one statement with the next write, or once TOUCH_BATCH keys
+    are waiting, so LRU order is approximate. The stored size is tracked
+    as a running estimate and only summed in SQL when the estimate exceeds
+    max_bytes or every SIZE_SYNC_EVERY writes, which picks up writes by
+    other processes.
+    """
+    
+    # Fraction of max_bytes to shrink to when evicting, so eviction doesn't
+    # run on every write once the cache is full
+    EVICT_TO = 0.9
+    
+    # Buffered access times that trigger a write from the read path
+    TOUCH_BATCH = 256
+    
+    # Writes between exact size checks while the estimate is under max_bytes
+    SIZE_SYNC_EVERY = 100
+    
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite file (created with its directory if missing)
+            max_bytes: Upper bound for the total size of stored values
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, str], float] = {}  # (kind, key) -> accessed_at
+        self._size: Optional[int] = None  # Estimated stored bytes; None until summed
+        self._writes_since_sync = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                ' kind TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL,'
+                ' PRIMARY KEY (kind, key))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at '
+                'ON cache_entries (accessed_at)'
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections aren't thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+        return self.get_many(kind, [key]).get(key)
+    
+    def get_many(self, kind: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys of one kind in a single query
+        
+        Returns:
+            Dict of key -> value for the keys that hit; missing and expired
+            keys are left out
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        
+        now = time.time()
+        found = {}
+        try:
+            with self._connect() as conn:
+                # Stay under SQLite's bound parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT key, value FROM cache_entries '
+                        f'WHERE kind = ? AND key IN ({placeholders}) AND expires_at > ?',
+                        [kind, *chunk, now]
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            self._count('errors')
+            print(f"[DiskCache] Read failed: {e}")
+            found = {}
+        
+        with self._lock:
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(keys) - len(found)
+            for key in found:
+                self._touched[(kind, key)] = now
+            flush_touches = len(self._touched) >= self.TOUCH_BATCH
+        
+        if flush_touches:
+            try:
+                with self._connect() as conn:
+                    self._write_touches(conn)
+            except sqlite3.Error as e:
+                self._count('errors')
+                print(f"[DiskCache] Access time update failed: {e}")
+        return found
+    
+    def _write_touches(self, conn: sqlite3.Connection):
+        """Write the buffered access times in the caller's transaction"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            # MAX keeps a newer access time written by another process
+            conn.executemany(
+                'UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?) '
+                'WHERE kind = ? AND key = ?',
+                [(accessed_at, kind, key) for (kind, key), accessed_at in touched.items()]
+            )
+    
+    def set(self, kind: str, key: str, value: Any, ttl_seconds: float):
+        """Store one value for ttl_seconds"""
+        self.set_many(kind, {key: value}, ttl_seconds)
+    
+    def set_many(self, kind: str, values: Dict[str, Any], ttl_seconds: float):
+        """Store several values of one kind in one transaction"""
+        if not values or ttl_seconds <= 0:
+            return
+        
+        now = time.time()
+        rows = []
+        for key, value in values.items():
+            data = json.dumps(value, separators=(',', ':'))
+            rows.append((kind, key, data, len(data), now + ttl_seconds, now))
+        try:
+            with self._connect() as conn:
+                # Pending access times go first, so eviction sees them
+                self._write_touches(conn)
+                conn.executemany(
+                    'INSERT OR REPLACE INTO cache_entries '
+                    '(kind, key, value, size, expires_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                with self._lock:
+                    # Replaced entries are counted twice until the next sync
+                    self._writes_since_sync += 1
+                    if self._size is not None:
+                        self._size += sum(row[3] for row in rows)
+                    check_size = (
+                        self._size is None or self._size > self.max_bytes
+                        or self._writes_since_sync >= self.SIZE_SYNC_EVERY
+                    )
+                if check_size:
+                    self._evict(conn, now)
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"[DiskCache] Write failed: {e}")
+            return
+        
+        with self._lock:
+            self._stats['writes'] += len(rows)
+    
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """
+        Sum the stored size, then drop expired entries and least recently
+        used ones if it is over max_bytes
+        
+        Resets the size estimate to what is left.
+        """
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entries').fetchone()[0]
+        if total <= self.max_bytes:
+            self._set_size(total)
+            return
+        
+        evicted = conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,)).rowcount
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entries').fetchone()[0]
+        target = self.max_bytes * self.EVICT_TO
+        if total > target:
+            # Walk entries oldest-access first until enough bytes are freed
+            excess = total - target
+            doomed = []
+            for kind, key, size in conn.execute(
+                'SELECT kind, key, size FROM cache_entries ORDER BY accessed_at'
+            ):
+                doomed.append((kind, key))
+                excess -= size
+                total -= size
+                if excess <= 0:
+                    break
+            conn.executemany('DELETE FROM cache_entries WHERE kind = ? AND key = ?', doomed)
+            evicted += len(doomed)
+        
+        self._set_size(total)
+        with self._lock:
+            self._stats['evictions'] += evicted
+    
+    def _set_size(self, total: int):
+        with self._lock:
+            self._size = total
+            self._writes_since_sync = 0
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache_entries')
+        with self._lock:
+            self._touched.clear()
+        self._set_size(0)
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def stats(self) -> Dict:
+        """Return this process's cache counters plus the stored entry count and size"""
+        with self._lock:
+            stats = dict(self._stats)
+        try:
+            entries, size = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries'
+            ).fetchone()
+            stats['entries'] = entries
+            stats['size_bytes'] = size
+        except sqlite3.Error:
+            pass
+        stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,30 @@
+import json
+from datetime import date, datetime
+from typing import Any
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the standard library encoder is used instead
+    orjson = None
+
+def _default(value: Any):
+    """Encode values the standard library can't, the way to_dict() does"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize to compact JSON bytes, with orjson when it is installed
+    
+    datetime and date values become ISO 8601 strings, matching to_dict(),
+    so read paths can serialize Core rows without converting them first.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode()
+
+def json_response(payload: Any, status: int = 200):
+    """Build a JSON response like jsonify(), using the fast encoder"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,218 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from flask import g, request
+from sqlalchemy import event
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class _Histogram:
+    """Cumulative latency histogram for one label set"""
+    
+    __slots__ = ('counts', 'total', 'count')
+    
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+class _NoopSpan:
+    """Returned by span() when metrics are disabled"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    """Times a block and records it in a histogram on exit"""
+    
+    __slots__ = ('registry', 'metric', 'labels', 'start')
+    
+    def __init__(self, registry: 'Metrics', metric: str, labels: Tuple):
+        self.registry = registry
+        self.metric = metric
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.metric, self.labels, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """
+    In-process latency histograms and gauges, rendered in Prometheus format
+    
+    When disabled, span() returns a shared no-op context manager and nothing
+    is recorded, so instrumented code pays only an attribute check.
+    """
+    
+    PREFIX = 'voucherfinder'
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[Tuple, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict]]] = {}
+        self._lock = threading.Lock()
+    
+    def describe(self, metric: str, help_text: str):
+        """Set the HELP text for a histogram"""
+        self._help[metric] = help_text
+    
+    def span(self, name: str, **labels):
+        """
+        Time a block of code as an upstream/internal span
+        
+        Usage:
+            with metrics.span('youtube.search'):
+                ...
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, 'span_duration_seconds', (('span', name),) + tuple(sorted(labels.items())))
+    
+    def observe(self, metric: str, labels: Tuple, seconds: float):
+        """Record one duration for a metric and label set"""
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(metric, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(len(self.buckets))
+            if index < len(self.buckets):
+                histogram.counts[index] += 1
+            histogram.total += seconds
+            histogram.count += 1
+    
+    def register_gauges(self, name: str, help_text: str, collect: Callable[[], Dict]):
+        """
+        Export the numeric values of a stats dict as gauges
+        
+        Args:
+            name: Metric name; each key becomes a ``stat`` label. Registering
+                the same name again replaces the previous collector
+            help_text: HELP text
+            collect: Returns the current stats dict (e.g. a cache's stats())
+        """
+        self._gauges[name] = (help_text, collect)
+    
+    def reset(self):
+        """Drop all recorded histograms"""
+        with self._lock:
+            self._histograms.clear()
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            snapshot = {
+                metric: {
+                    labels: (list(h.counts), h.total, h.count)
+                    for labels, h in series.items()
+                }
+                for metric, series in self._histograms.items()
+            }
+        
+        for metric in sorted(snapshot):
+            full_name = f'{self.PREFIX}_{metric}'
+            lines.append(f'# HELP {full_name} {self._help.get(metric, metric)}')
+            lines.append(f'# TYPE {full_name} histogram')
+            for labels, (counts, total, count) in sorted(snapshot[metric].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{full_name}_bucket{_labels(labels, le=_number(bound))} {cumulative}'
+                    )
+                lines.append(f'{full_name}_bucket{_labels(labels, le="+Inf")} {count}')
+                lines.append(f'{full_name}_sum{_labels(labels)} {total!r}')
+                lines.append(f'{full_name}_count{_labels(labels)} {count}')
+        
+        for name, (help_text, collect) in sorted(self._gauges.items()):
+            full_name = f'{self.PREFIX}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} gauge')
+            for stat, value in sorted(collect().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'{full_name}{_labels((("stat", stat),))} {_number(value)}')
+        
+        return '\n'.join(lines) + '\n'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels: Tuple, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+# Process-wide registry; enabled by create_app() when METRICS_ENABLED is set
+metrics = Metrics()
+metrics.describe('span_duration_seconds', 'Duration of instrumented upstream calls and hot-path steps')
+metrics.describe('http_request_duration_seconds', 'Duration of API requests by endpoint')
+
+def instrument_app(app, engine):
+    """
+    Enable metrics and time every request and DB query of an app
+    
+    Does nothing when the app's METRICS_ENABLED setting is off.
+    
+    Args:
+        app: Flask app whose requests are timed per endpoint
+        engine: SQLAlchemy engine whose queries are timed per statement type
+    """
+    metrics.enabled = bool(app.config.get('METRICS_ENABLED'))
+    if not metrics.enabled:
+        return
+    
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+    
+    @app.after_request
+    def _record_request_duration(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe('http_request_duration_seconds', (
+                ('endpoint', endpoint),
+                ('method', request.method),
+                ('status', response.status_code)
+            ), time.perf_counter() - started)
+        return response
+    
+    # Start times live on the statement's execution context, so a
+    # statement that raises (and never reaches after_cursor_execute) leaves
+    # nothing behind. Dialect-internal statements run without a context
+    # are not timed.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _record_query_duration(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        metrics.observe('span_duration_seconds', (
+            ('span', 'db.query'),
+            ('operation', operation)
+        ), time.perf_counter() - started)
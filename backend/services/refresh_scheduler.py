@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from models.code import db, normalize_brand
+
+class RefreshScheduler:
+    """
+    Refresh stale brands in the background (stale-while-revalidate)
+    
+    Searches that find stale codes enqueue the brand here and return the
+    cached codes right away. Jobs are deduplicated per brand, the number of
+    queued plus running refreshes is capped, and brands whose refresh keeps
+    failing are retried with exponential backoff.
+    
+    After a successful refresh a brand is not refreshed again for
+    ``min_interval``: a brand whose codes are no longer found stays stale,
+    and would otherwise be scraped again by every search. Failed refreshes
+    are governed by the backoff alone.
+    """
+    
+    def __init__(self, app, refresh: Callable[[str], Dict], max_workers: int = 2,
+                 max_in_flight: int = 8, backoff_base: float = 60,
+                 backoff_max: float = 3600, min_interval: float = 0):
+        """
+        Args:
+            app: Flask app, for the app context jobs run in
+            refresh: Scrapes and stores a brand; returns the scrape result
+            max_workers: Threads running refreshes
+            max_in_flight: Max queued plus running refreshes
+            backoff_base: Seconds to wait after a brand's first failure
+            backoff_max: Upper bound for the backoff delay
+            min_interval: Seconds after a brand's last successful refresh
+                before it can be refreshed again
+        """
+        self.app = app
+        self.refresh = refresh
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_interval = min_interval
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._last_success: Dict[str, float] = {}
+        self._stats = {
+            'queued': 0,
+            'deduplicated': 0,
+            'rejected_full': 0,
+            'skipped_backoff': 0,
+            'skipped_recent': 0,
+            'succeeded': 0,
+            'failed': 0
+        }
+    
+    def enqueue(self, brand_name: str) -> str:
+        """
+        Schedule a background refresh for a brand
+        
+        Returns:
+            'queued', 'in_progress', 'backoff', 'recent' or 'full'
+        """
+        key = normalize_brand(brand_name)
+        with self._lock:
+            if key in self._in_flight:
+                self._stats['deduplicated'] += 1
+                return 'in_progress'
+            if self._retry_at.get(key, 0) > time.monotonic():
+                self._stats['skipped_backoff'] += 1
+                return 'backoff'
+            last_success = self._last_success.get(key)
+            if last_success is not None and time.monotonic() - last_success < self.min_interval:
+                self._stats['skipped_recent'] += 1
+                return 'recent'
+            if len(self._in_flight) >= self.max_in_flight:
+                self._stats['rejected_full'] += 1
+                return 'full'
+            self._in_flight.add(key)
+            self._stats['queued'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='refresh'
+                )
+            executor = self._executor
+        
+        executor.submit(self._run, key, brand_name)
+        return 'queued'
+    
+    def _run(self, key: str, brand_name: str):
+        """Run one refresh job and record its outcome"""
+        succeeded = False
+        try:
+            with self.app.app_context():
+                try:
+                    result = self.refresh(brand_name)
+                finally:
+                    db.session.remove()
+            statuses = [s['status'] for s in result.get('sources', {}).values()]
+            # A refresh where every source failed counts as a failure
+            succeeded = not statuses or any(status == 'ok' for status in statuses)
+            if not succeeded:
+                print(f"[Refresh] All sources failed for {brand_name}")
+        except Exception as e:
+            print(f"[Refresh] Error refreshing {brand_name}: {e}")
+        
+        with self._lock:
+            self._in_flight.discard(key)
+            if succeeded:
+                self._stats['succeeded'] += 1
+                self._last_success[key] = time.monotonic()
+                self._failures.pop(key, None)
+                self._retry_at.pop(key, None)
+            else:
+                self._stats['failed'] += 1
+                failures = self._failures.get(key, 0) + 1
+                self._failures[key] = failures
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+                self._retry_at[key] = time.monotonic() + delay
+    
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def stats(self) -> Dict:
+        """Return a snapshot of scheduler counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._in_flight)
+            stats['backing_off'] = sum(
+                1 for retry_at in self._retry_at.values() if retry_at > time.monotonic()
+            )
+        return stats
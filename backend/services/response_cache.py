@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from config import Config
+from models.code import normalize_brand
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl_seconds: Default lifetime of an entry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so a value computed before a write
+        # can't be stored after that write's invalidation
+        self._version = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+    
+    def version(self) -> int:
+        """Return the invalidation counter; pass it to set() to avoid races"""
+        with self._lock:
+            return self._version
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: float = None, version: int = None):
+        """
+        Store value, evicting the least recently used entries if full
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Lifetime, capped at the cache's default TTL
+            version: Result of version() taken before computing value; the
+                value is dropped if an invalidation happened since
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+    
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every entry whose key satisfies predicate
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._version += 1
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidations'] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+# Serialized /api/codes/search responses keyed by (match mode, brand key),
+# followed by the page parameters for paginated or projected searches
+code_search_cache = ResponseCache(
+    max_entries=Config.CODE_SEARCH_CACHE_SIZE,
+    ttl_seconds=Config.CODE_CACHE_DURATION * 3600
+)
+
+def _search_matches(cache_key: tuple, brand_key: str) -> bool:
+    """Whether a search cached under cache_key would include brand_key"""
+    match, query_key = cache_key[:2]
+    if match == 'exact':
+        return brand_key == query_key
+    if match == 'prefix':
+        return brand_key.startswith(query_key)
+    return query_key in brand_key
+
+def invalidate_brands(brand_names) -> int:
+    """
+    Invalidate cached searches whose results include any of the given brands
+    
+    Args:
+        brand_names: Raw or normalized brand names that were written to
+    
+    Returns:
+        Number of cache entries removed
+    """
+    brand_keys = {normalize_brand(name) for name in brand_names}
+    brand_keys.discard('')
+    if not brand_keys:
+        return 0
+    return code_search_cache.invalidate_where(
+        lambda cache_key: any(_search_matches(cache_key, key) for key in brand_keys)
+    )
@@ -0,0 +1,165 @@
+from typing import Dict, Iterator, List, Set, Tuple
+from models.code import db
+from models.code_store import CodeStore
+from models.watermark import ScrapeWatermark
+from scrapers.youtube_scraper import YouTubeScraper
+from scrapers.coupon_scraper import CouponScraper
+from scrapers.orchestrator import ScrapeOrchestrator
+from services.response_cache import invalidate_brands
+
+# Codes written per transaction by streaming scrapes
+STREAM_BATCH_SIZE = 25
+
+def scrape_and_store(brand_name: str) -> Dict:
+    """
+    Scrape all sources for a brand and store the codes
+    
+    Shared by /api/scrape and the background refresh scheduler. Must run
+    inside an app context; commits on success. YouTube is scraped
+    incrementally from the brand's stored high-water mark.
+    
+    Args:
+        brand_name: Brand to scrape for
+        
+    Returns:
+        Dict with 'codes' (stored code dicts), 'sources' (per-source status),
+        'changes' (numbers of codes inserted, updated and unchanged) and
+        'api_usage' (YouTube quota use and per-coupon-site request stats)
+    """
+    # Scrape YouTube and coupon sites concurrently
+    youtube_scraper = _youtube_scraper(brand_name)
+    coupon_scraper = CouponScraper()
+    orchestrator = ScrapeOrchestrator([youtube_scraper, coupon_scraper])
+    scrape_result = orchestrator.scrape(brand_name)
+    
+    changes = {}
+    stored_codes, previous_brands = _store_codes(brand_name, scrape_result['codes'], changes)
+    
+    youtube_status = scrape_result['sources'].get(youtube_scraper.name, {}).get('status')
+    if _advance_watermark(youtube_scraper, brand_name, youtube_status):
+        # Only new videos were scraped: the brand's other codes are still
+        # current, and are returned alongside the new ones
+        stored_codes = CodeStore.codes_for_brand(brand_name)
+    
+    db.session.commit()
+    invalidate_brands(previous_brands | {brand_name})
+    
+    return {
+        'codes': stored_codes,
+        'sources': scrape_result['sources'],
+        'changes': changes,
+        'api_usage': {
+            'youtube': youtube_scraper.last_scrape_stats,
+            'coupons': coupon_scraper.last_scrape_stats
+        }
+    }
+
+def stream_scrape_and_store(brand_name: str) -> Iterator[Dict]:
+    """
+    Scrape all sources for a brand, storing and yielding codes as they arrive
+    
+    Codes are written in transactions of up to STREAM_BATCH_SIZE, so the
+    first results are stored and sent while slower sources are still running.
+    Must run inside an app context.
+    
+    Args:
+        brand_name: Brand to scrape for
+    
+    Yields:
+        ``{'type': 'codes', 'source', 'codes'}`` with stored code dicts,
+        ``{'type': 'source', ...}`` per-source status events as produced by
+        ScrapeOrchestrator.stream, and finally ``{'type': 'done', 'count',
+        'sources', 'changes', 'api_usage'}``
+    """
+    youtube_scraper = _youtube_scraper(brand_name)
+    coupon_scraper = CouponScraper()
+    orchestrator = ScrapeOrchestrator([youtube_scraper, coupon_scraper])
+    
+    sources = {}
+    changes = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    sent_ids = set()
+    for event in orchestrator.stream(brand_name):
+        if event['type'] != 'codes':
+            sources[event['source']] = {k: v for k, v in event.items() if k not in ('type', 'source')}
+            yield event
+            continue
+        
+        codes = event['codes']
+        for start in range(0, len(codes), STREAM_BATCH_SIZE):
+            stored_codes, previous_brands = _store_codes(
+                brand_name, codes[start:start + STREAM_BATCH_SIZE], changes
+            )
+            db.session.commit()
+            invalidate_brands(previous_brands | {brand_name})
+            sent_ids.update(code['id'] for code in stored_codes)
+            yield {'type': 'codes', 'source': event['source'], 'codes': stored_codes}
+    
+    youtube_status = sources.get(youtube_scraper.name, {}).get('status')
+    incremental = _advance_watermark(youtube_scraper, brand_name, youtube_status)
+    db.session.commit()
+    if incremental:
+        invalidate_brands({brand_name})
+        # Send the brand's codes from earlier scrapes too
+        existing_codes = [
+            code for code in CodeStore.codes_for_brand(brand_name)
+            if code['id'] not in sent_ids
+        ]
+        if existing_codes:
+            sent_ids.update(code['id'] for code in existing_codes)
+            yield {'type': 'codes', 'source': 'stored', 'codes': existing_codes}
+    
+    yield {
+        'type': 'done',
+        'count': len(sent_ids),
+        'sources': sources,
+        'changes': changes,
+        'api_usage': {
+            'youtube': youtube_scraper.last_scrape_stats,
+            'coupons': coupon_scraper.last_scrape_stats
+        }
+    }
+
+def _youtube_scraper(brand_name: str) -> YouTubeScraper:
+    """Create a YouTube scraper resuming from the brand's high-water mark"""
+    youtube_scraper = YouTubeScraper()
+    youtube_scraper.watermark = ScrapeWatermark.load(youtube_scraper.name, brand_name)
+    return youtube_scraper
+
+def _store_codes(brand_name: str, codes: List[Dict], changes: Dict) -> Tuple[List[Dict], Set[str]]:
+    """
+    Upsert scraped codes without committing
+    
+    Args:
+        brand_name: Brand the codes belong to
+        codes: Code dicts as returned by the scrapers
+        changes: Dict the inserted/updated/unchanged counts are added to
+    
+    Returns:
+        Tuple of (stored code dicts, brand keys the codes belonged to before)
+    """
+    # Store codes in database (bulk upsert keyed on code). Existing codes
+    # may move from another brand, whose cached searches change too.
+    previous_brands = CodeStore.brand_keys_for_codes([c['code'] for c in codes])
+    return CodeStore.upsert_codes(brand_name, codes, counts=changes), previous_brands
+
+def _advance_watermark(youtube_scraper: YouTubeScraper, brand_name: str, status: str) -> bool:
+    """
+    Save the YouTube scraper's new high-water mark after a complete scrape
+    
+    Nothing is saved if the source failed or the scraper left no new mark
+    (a request failed or paging stopped early), so the previous mark stays
+    and no video is skipped. After a complete incremental scrape the brand's
+    existing codes are marked as re-checked. Does not commit.
+    
+    Returns:
+        True if the scrape was incremental
+    """
+    if status != 'ok' or youtube_scraper.next_watermark is None:
+        return False
+    ScrapeWatermark.save(youtube_scraper.name, brand_name,
+                         youtube_scraper.next_watermark['published_at'],
+                         youtube_scraper.next_watermark['seen_ids'])
+    if not youtube_scraper.last_scrape_stats['incremental']:
+        return False
+    CodeStore.mark_brand_seen(brand_name)
+    return True
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from models.code import db
+from models.lock import GenerationLock
+
+class _Call:
+    """An in-flight computation that other threads can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same key
+    
+    Within a process, the first caller for a key runs the computation and
+    later callers wait for its result. Across processes, the running caller
+    holds a GenerationLock row; callers in other processes poll until it is
+    released and then read the stored result through ``check``.
+    """
+    
+    def __init__(self, name: str, lock_ttl: float = 120, wait_timeout: float = 60,
+                 poll_interval: float = 0.25):
+        """
+        Args:
+            name: Prefix for lock keys, so different users don't collide
+            lock_ttl: Seconds before a DB lock is considered abandoned
+            wait_timeout: Max seconds to wait for another caller's result
+            poll_interval: Seconds between DB lock checks
+        """
+        self.name = name
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'executions': 0,
+            'coalesced_local': 0,
+            'coalesced_remote': 0,
+            'lock_waits': 0,
+            'wait_timeouts': 0,
+            'claimed': 0,
+            'claim_conflicts': 0
+        }
+    
+    def do(self, key: str, compute: Callable[[], Any],
+           check: Callable[[], Optional[Any]]) -> Tuple[Any, bool]:
+        """
+        Run compute for key unless another caller already is
+        
+        Must be called inside an app context.
+        
+        Args:
+            key: Coalescing key (e.g. a normalized brand)
+            compute: Produces and stores the result
+            check: Returns the stored result, or a falsy value if there is none
+        
+        Returns:
+            Tuple of (result, coalesced) where coalesced is True if the result
+            was produced by another caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats['coalesced_local'] += 1
+        
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            # The leader is taking too long; compute independently
+            self._count('wait_timeouts')
+            self._count('executions')
+            return compute(), False
+        
+        try:
+            call.result, coalesced = self._do_exclusive(key, compute, check)
+            return call.result, coalesced
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    @contextmanager
+    def claim(self, keys: List[str]) -> Iterator[List[str]]:
+        """
+        Hold the cross-process locks of whichever keys are free
+        
+        For batch work covering many keys at once: keys another caller is
+        computing (in this process or another) are left out instead of
+        waited for, and callers of ``do`` for a claimed key wait for the
+        batch and then read its result through ``check``. Must be used
+        inside an app context.
+        
+        Args:
+            keys: Coalescing keys to claim
+        
+        Yields:
+            The keys whose locks were taken, released on exit
+        """
+        claimed = []
+        try:
+            for key in dict.fromkeys(keys):
+                with self._lock:
+                    busy = key in self._calls
+                if not busy and GenerationLock.acquire(f'{self.name}:{key}', self.owner, self.lock_ttl):
+                    claimed.append(key)
+                else:
+                    self._count('claim_conflicts')
+            with self._lock:
+                self._stats['claimed'] += len(claimed)
+            yield claimed
+        finally:
+            db.session.rollback()
+            for key in claimed:
+                GenerationLock.release(f'{self.name}:{key}', self.owner)
+    
+    def _do_exclusive(self, key: str, compute: Callable[[], Any],
+                      check: Callable[[], Optional[Any]]) -> Tuple[Any, bool]:
+        """Run compute while holding the cross-process lock for key"""
+        lock_key = f'{self.name}:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+        
+        while True:
+            if GenerationLock.acquire(lock_key, self.owner, self.lock_ttl):
+                try:
+                    # Another process may have finished just before we got the lock
+                    result = check()
+                    if result:
+                        self._count('coalesced_remote')
+                        return result, True
+                    self._count('executions')
+                    return compute(), False
+                finally:
+                    db.session.rollback()
+                    GenerationLock.release(lock_key, self.owner)
+            
+            self._count('lock_waits')
+            while GenerationLock.is_held(lock_key) and time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+            
+            result = check()
+            if result:
+                self._count('coalesced_remote')
+                return result, True
+            
+            if time.monotonic() >= deadline:
+                self._count('wait_timeouts')
+                self._count('executions')
+                return compute(), False
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the coalescing counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
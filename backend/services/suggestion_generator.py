@@ -0,0 +1,160 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from models.code import db, normalize_brand
+
+class GenerationJob:
+    """A background suggestion generation that requests can wait on"""
+    
+    def __init__(self, brand_name: str, batch: List[str] = None):
+        self.brand_name = brand_name
+        self.batch = batch  # Brands of a batch job, generated with one prompt
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False  # A waiting request gave up on the deadline
+        self._partial: List[Dict] = []
+        self._lock = threading.Lock()
+    
+    def add_partial(self, suggestion: Dict):
+        """Record a suggestion streamed before generation finished"""
+        with self._lock:
+            self._partial.append(suggestion)
+    
+    def partial(self) -> List[Dict]:
+        """Suggestions streamed so far"""
+        with self._lock:
+            return list(self._partial)
+    
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds; returns True if the job finished"""
+        return self.done.wait(timeout)
+
+class SuggestionGenerator:
+    """
+    Run AI suggestion generation off the request thread
+    
+    Requests submit a brand and wait for the job only up to their deadline;
+    a job keeps running after its requests have given up, and stores its
+    suggestions for the next request. Batch jobs generate several brands
+    with one prompt (for prefetching). Jobs are deduplicated per brand (or
+    set of brands) and the number of queued plus running jobs is capped.
+    """
+    
+    def __init__(self, app, generate: Callable[[str, Callable[[Dict], None]], Any],
+                 generate_batch: Callable[[List[str]], Any] = None,
+                 max_workers: int = 4, max_in_flight: int = 32):
+        """
+        Args:
+            app: Flask app, for the app context jobs run in
+            generate: Generates and stores suggestions for a brand, calling
+                its second argument with each suggestion as it streams in
+            generate_batch: Generates and stores suggestions for a list of
+                brands (required for submit_batch)
+            max_workers: Threads running generation
+            max_in_flight: Max queued plus running jobs
+        """
+        self.app = app
+        self.generate = generate
+        self.generate_batch = generate_batch
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._executor = None
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'batches_submitted': 0,
+            'joined': 0,
+            'rejected_full': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'deadline_fallbacks': 0,
+            'completed_after_deadline': 0
+        }
+    
+    def submit(self, brand_name: str) -> Optional[GenerationJob]:
+        """
+        Start generating suggestions for a brand, or join the running job
+        
+        Returns:
+            The brand's job, or None if too many jobs are in flight
+        """
+        return self._submit(normalize_brand(brand_name), GenerationJob(brand_name))
+    
+    def submit_batch(self, brand_names: List[str]) -> Optional[GenerationJob]:
+        """
+        Start generating suggestions for several brands with one prompt
+        
+        Returns:
+            The batch's job (the running one if the same brands were already
+            submitted), or None if too many jobs are in flight
+        """
+        key = 'batch:' + ','.join(sorted({normalize_brand(name) for name in brand_names}))
+        return self._submit(key, GenerationJob(', '.join(brand_names), list(brand_names)))
+    
+    def _submit(self, key: str, new_job: GenerationJob) -> Optional[GenerationJob]:
+        """Queue new_job under key unless a job for key is running or the queue is full"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._stats['joined'] += 1
+                return job
+            if len(self._jobs) >= self.max_in_flight:
+                self._stats['rejected_full'] += 1
+                return None
+            job = self._jobs[key] = new_job
+            self._stats['submitted'] += 1
+            if job.batch is not None:
+                self._stats['batches_submitted'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='suggestions'
+                )
+            executor = self._executor
+        
+        executor.submit(self._run, key, job)
+        return job
+    
+    def abandon(self, job: GenerationJob):
+        """Note that a request stopped waiting for job at its deadline"""
+        with self._lock:
+            job.abandoned = True
+            self._stats['deadline_fallbacks'] += 1
+    
+    def _run(self, key: str, job: GenerationJob):
+        """Run one generation job and wake up its waiters"""
+        try:
+            with self.app.app_context():
+                try:
+                    if job.batch is None:
+                        job.result = self.generate(job.brand_name, job.add_partial)
+                    else:
+                        job.result = self.generate_batch(job.batch)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            print(f"[Suggestions] Error generating suggestions for {job.brand_name}: {e}")
+            job.error = e
+        
+        with self._lock:
+            del self._jobs[key]
+            self._stats['failed' if job.error else 'succeeded'] += 1
+            if job.abandoned and not job.error:
+                self._stats['completed_after_deadline'] += 1
+        job.done.set()
+    
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def stats(self) -> Dict:
+        """Return a snapshot of generation counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._jobs)
+        return stats
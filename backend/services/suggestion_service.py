@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import select
+from ai.suggester import AISuggester
+from ai.validator import SuggestionValidator
+from config import Config
+from models.brand import BrandIndex
+from models.code import db, normalize_brand
+from models.suggestion import AISuggestion
+
+def store_suggestions(brand_name: str, raw_suggestions: List[Dict]) -> List[AISuggestion]:
+    """
+    Validate AI suggestions for a brand and add the safe ones to the session
+    
+    Does not commit.
+    
+    Args:
+        brand_name: Brand the suggestions are for
+        raw_suggestions: Suggestion dicts as returned by AISuggester
+    
+    Returns:
+        The new AISuggestion rows
+    """
+    validated_suggestions = SuggestionValidator.validate_suggestions(raw_suggestions)
+    
+    stored_suggestions = []
+    for suggestion_data in validated_suggestions:
+        new_suggestion = AISuggestion(**_suggestion_columns(brand_name, suggestion_data))
+        db.session.add(new_suggestion)
+        stored_suggestions.append(new_suggestion)
+    
+    BrandIndex.register([brand_name])
+    return stored_suggestions
+
+def preview_suggestions(brand_name: str, raw_suggestions: List[Dict]) -> List[Dict]:
+    """
+    Validate AI suggestions and shape the safe ones like stored suggestions
+    
+    For responses sent before suggestions are stored: 'id' and
+    'created_at' are None.
+    """
+    previews = []
+    for suggestion_data in SuggestionValidator.validate_suggestions(raw_suggestions):
+        columns = _suggestion_columns(brand_name, suggestion_data)
+        previews.append({name: columns.get(name) for name in AISuggestion.API_FIELDS})
+    return previews
+
+def _suggestion_columns(brand_name: str, suggestion_data: Dict) -> Dict:
+    """Map a validated AI suggestion onto AISuggestion column values"""
+    return {
+        'brand': brand_name,
+        'suggestion_type': suggestion_data.get('type', 'general'),
+        'title': suggestion_data.get('title', ''),
+        'description': suggestion_data.get('description', ''),
+        'estimated_savings': suggestion_data.get('estimated_savings', 0),
+        'estimated_savings_description': suggestion_data.get('estimated_savings_description', ''),
+        'conditions': suggestion_data.get('conditions', ''),
+        'pro_tip': suggestion_data.get('pro_tip', ''),
+        'confidence_score': 50.0,  # Start with neutral confidence
+        'verification_count': 0,
+        'risk_level': suggestion_data.get('risk', 'safe')
+    }
+
+def prefetch_suggestions(brand_names: List[str], batch_size: int = None,
+                         suggester: AISuggester = None) -> Dict:
+    """
+    Generate and store suggestions for many brands, several per AI prompt
+    
+    Runs every batch in the calling thread; the prefetch endpoint hands
+    the batches from plan_prefetch to the SuggestionGenerator instead.
+    Must run inside an app context.
+    
+    Args:
+        brand_names: Brands to warm
+        batch_size: Brands per prompt (defaults to Config.SUGGESTION_BATCH_SIZE)
+        suggester: AISuggester to use (e.g. one wrapping a local fake model)
+    
+    Returns:
+        Dict with 'stored' (brand -> number of suggestions stored),
+        'skipped_fresh', 'failed' (brands without a usable response) and
+        'api_calls'
+    """
+    batches, skipped_fresh = plan_prefetch(brand_names, batch_size)
+    report = {
+        'stored': {},
+        'skipped_fresh': skipped_fresh,
+        'failed': [],
+        'api_calls': 0
+    }
+    for batch in batches:
+        result = prefetch_batch(batch, suggester)
+        report['stored'].update(result['stored'])
+        report['skipped_fresh'].extend(result['skipped_fresh'])
+        report['failed'].extend(result['failed'])
+        report['api_calls'] += result['api_calls']
+    return report
+
+def plan_prefetch(brand_names: List[str], batch_size: int = None) -> Tuple[List[List[str]], List[str]]:
+    """
+    Split the brands that need suggestions into batches of one prompt each
+    
+    Duplicate brands (by key) are dropped and brands that already have
+    fresh suggestions are skipped.
+    
+    Args:
+        brand_names: Brands to warm
+        batch_size: Brands per prompt (defaults to Config.SUGGESTION_BATCH_SIZE)
+    
+    Returns:
+        Tuple of (batches of brand names, brands skipped as fresh)
+    """
+    batch_size = batch_size or Config.SUGGESTION_BATCH_SIZE
+    
+    fresh_keys = _fresh_brand_keys(brand_names)
+    pending = {}
+    skipped_fresh = []
+    for name in brand_names:
+        key = normalize_brand(name)
+        if not key or key in pending:
+            continue
+        if key in fresh_keys:
+            skipped_fresh.append(name)
+        else:
+            pending[key] = name
+    
+    names = list(pending.values())
+    batches = [names[start:start + batch_size] for start in range(0, len(names), batch_size)]
+    return batches, skipped_fresh
+
+def prefetch_batch(brand_names: List[str], suggester: AISuggester = None) -> Dict:
+    """
+    Generate and store suggestions for one batch of brands with one prompt
+    
+    Brands the response leaves out are retried by the suggester. Brands
+    that got fresh suggestions since the batch was planned are skipped.
+    Commits, so a long warm-up keeps each finished batch. Must run inside
+    an app context.
+    
+    Args:
+        brand_names: Brands for the prompt
+        suggester: AISuggester to use (e.g. one wrapping a local fake model)
+    
+    Returns:
+        Dict with 'stored' (brand -> number of suggestions stored),
+        'skipped_fresh', 'failed' and 'api_calls'
+    """
+    fresh_keys = _fresh_brand_keys(brand_names)
+    report = {
+        'stored': {},
+        'skipped_fresh': [name for name in brand_names if normalize_brand(name) in fresh_keys],
+        'failed': [],
+        'api_calls': 0
+    }
+    pending = [name for name in brand_names if normalize_brand(name) not in fresh_keys]
+    if not pending:
+        return report
+    
+    suggester = suggester or AISuggester()
+    results = suggester.get_suggestions_batch(pending)
+    report['api_calls'] = suggester.last_batch_stats.get('api_calls', 0)
+    report['failed'] = list(suggester.last_batch_stats.get('failed', []))
+    
+    for brand_name, raw_suggestions in results.items():
+        report['stored'][brand_name] = len(store_suggestions(brand_name, raw_suggestions))
+    db.session.commit()
+    return report
+
+def _fresh_brand_keys(brand_names: List[str]) -> set:
+    """Brand keys among brand_names that have suggestions newer than the cache duration"""
+    keys = {normalize_brand(name) for name in brand_names}
+    keys.discard('')
+    if not keys:
+        return set()
+    
+    cache_expiry = datetime.utcnow() - timedelta(hours=Config.SUGGESTION_CACHE_DURATION)
+    fresh = set()
+    keys = list(keys)
+    # Stay under SQLite's bound parameter limit
+    for start in range(0, len(keys), 500):
+        fresh.update(db.session.execute(
+            select(AISuggestion.brand_key).where(
+                AISuggestion.brand_key.in_(keys[start:start + 500]),
+                AISuggestion.created_at >= cache_expiry
+            ).distinct()
+        ).scalars())
+    return fresh
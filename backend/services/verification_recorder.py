@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update, bindparam, func, insert
+from models.code import db
+from models.suggestion import AISuggestion
+from models.verification import SuggestionVerification
+from services.write_behind import WriteBehindBuffer
+
+class VerificationRecorder(WriteBehindBuffer):
+    """
+    Write-behind buffer for suggestion verification votes
+    
+    Votes are buffered in memory and flushed periodically in one transaction
+    that appends them to the suggestion_verifications event table and applies
+    them to the suggestions with one atomic UPDATE per voted suggestion:
+    counters are incremented in SQL and the confidence score is recomputed
+    from the new counts in the same statement. Bursts of votes on a hot
+    suggestion therefore cost one row update per flush instead of a locked
+    read-modify-write per vote, and concurrent flushes (threads or processes)
+    can't lose votes. With a flush interval of 0 every vote is written
+    immediately (still atomically).
+    
+    Each flush is the periodic batch job: scores are recomputed there from
+    the suggestions' counters rather than by re-reading the event table,
+    which is an audit log of individual votes. Votes cast before the table
+    existed are only reflected in the counters.
+    """
+    
+    # Name of the background flusher thread
+    THREAD_NAME = 'verification-recorder'
+    
+    def __init__(self, app, flush_interval: float = 5.0):
+        """
+        Args:
+            app: Flask app, for the app context flushes run in
+            flush_interval: Seconds between flushes; 0 disables buffering
+        """
+        super().__init__(app, flush_interval, {'votes': 0, 'events_written': 0, 'suggestions_updated': 0})
+        self._pending: List[Tuple[int, bool, datetime]] = []  # (suggestion_id, worked, created_at)
+        self._totals: Dict[int, List[int]] = {}  # suggestion_id -> [worked, failed] in _pending
+    
+    def record(self, suggestion_id: int, worked: bool) -> Tuple[int, int]:
+        """
+        Count one vote on a suggestion
+        
+        Args:
+            suggestion_id: ID of the voted suggestion
+            worked: Whether the suggestion worked for the user
+        
+        Returns:
+            Tuple of (worked, failed) votes on this suggestion recorded since
+            the last flush, including this one (add them to counts read
+            before the call)
+        """
+        with self._lock:
+            self._stats['votes'] += 1
+            self._pending.append((suggestion_id, bool(worked), datetime.utcnow()))
+            counts = self._totals.setdefault(suggestion_id, [0, 0])
+            counts[0 if worked else 1] += 1
+            worked_votes, failed_votes = counts
+        
+        if self.flush_interval <= 0:
+            self.flush()
+        return worked_votes, failed_votes
+    
+    def _take(self) -> Optional[Tuple[List, Dict]]:
+        if not self._pending:
+            return None
+        batch = (self._pending, self._totals)
+        self._pending, self._totals = [], {}
+        return batch
+    
+    def _write(self, batch: Tuple[List, Dict]) -> int:
+        pending, totals = batch
+        events = [
+            {'suggestion_id': suggestion_id, 'worked': worked, 'created_at': created_at}
+            for suggestion_id, worked, created_at in pending
+        ]
+        params = [
+            {'suggestion_id': suggestion_id, 'worked': worked, 'failed': failed}
+            for suggestion_id, (worked, failed) in totals.items()
+        ]
+        table = AISuggestion.__table__
+        # SET expressions all see the row's old values, so the score is
+        # computed from the incremented counts within the same statement
+        worked_count = func.coalesce(table.c.verification_count, 0) + bindparam('worked')
+        failure_count = func.coalesce(table.c.failure_count, 0) + bindparam('failed')
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('suggestion_id'))
+            .values(
+                verification_count=worked_count,
+                failure_count=failure_count,
+                confidence_score=SuggestionVerification.confidence(worked_count, failure_count)
+            )
+        )
+        db.session.execute(insert(SuggestionVerification.__table__), events)
+        db.session.execute(stmt, params)
+        return len(params)
+    
+    def _restore(self, batch: Tuple[List, Dict]):
+        pending, totals = batch
+        self._pending[:0] = pending
+        for suggestion_id, (worked, failed) in totals.items():
+            counts = self._totals.setdefault(suggestion_id, [0, 0])
+            counts[0] += worked
+            counts[1] += failed
+    
+    def _count_flush(self, batch: Tuple[List, Dict], rows: int):
+        self._stats['events_written'] += len(batch[0])
+        self._stats['suggestions_updated'] += rows
+    
+    def _pending_stats(self) -> Dict:
+        return {'pending_votes': len(self._pending)}
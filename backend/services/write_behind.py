@@ -0,0 +1,132 @@
+import abc
+import atexit
+import threading
+from typing import Any, Dict
+from models.code import db
+
+class WriteBehindBuffer(abc.ABC):
+    """
+    Base for in-memory write buffers flushed by a background thread
+    
+    Subclasses buffer events in ``_pending`` state under ``_lock`` and
+    implement the hooks below; this class runs the flush loop, the
+    transaction and the retry. A failed flush puts its batch back so the
+    next flush retries it. With a flush interval of 0 subclasses flush on
+    every event instead of starting a thread.
+    
+    Hooks (``_take``, ``_restore``, ``_count_flush`` and ``_pending_stats``
+    run with ``_lock`` held):
+        _take(): Swap out and return the buffered batch, or None if empty
+        _write(batch): Execute the batch's statements in db.session (the
+            caller commits); returns the number of rows updated
+        _restore(batch): Merge a batch whose flush failed back into the buffer
+        _count_flush(batch, rows): Add a written batch to ``_stats``
+        _after_flush(batch): Runs after a successful flush, without locks
+        _pending_stats(): Counters describing what is still buffered
+    """
+    
+    # Name of the background flusher thread
+    THREAD_NAME = 'write-behind'
+    
+    def __init__(self, app, flush_interval: float, stats: Dict[str, int]):
+        """
+        Args:
+            app: Flask app, for the app context flushes run in
+            flush_interval: Seconds between flushes; 0 disables buffering
+            stats: Subclass counters; 'flushes' and 'flush_errors' are added
+        """
+        self.app = app
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = dict(stats, flushes=0, flush_errors=0)
+    
+    def start(self):
+        """Start the background flusher and flush on interpreter exit"""
+        if self.flush_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._flush_loop, name=self.THREAD_NAME, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+    
+    def stop(self):
+        """Stop the flusher and write out everything still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def flush(self) -> int:
+        """
+        Write everything buffered in one transaction
+        
+        Returns:
+            Number of rows updated (0 if nothing was buffered or the flush
+            failed)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self._take()
+            if batch is None:
+                return 0
+            
+            try:
+                with self.app.app_context():
+                    try:
+                        rows = self._write(batch)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        raise
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                    self._restore(batch)
+                print(f"[{type(self).__name__}] Flush failed, will retry: {e}")
+                return 0
+            
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._count_flush(batch, rows)
+        
+        self._after_flush(batch)
+        return rows
+    
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+    
+    def stats(self) -> Dict:
+        """Return a snapshot of buffer counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(self._pending_stats())
+        stats['flush_interval'] = self.flush_interval
+        return stats
+    
+    @abc.abstractmethod
+    def _take(self) -> Any:
+        """See the class docstring"""
+    
+    @abc.abstractmethod
+    def _write(self, batch: Any) -> int:
+        """See the class docstring"""
+    
+    @abc.abstractmethod
+    def _restore(self, batch: Any):
+        """See the class docstring"""
+    
+    def _count_flush(self, batch: Any, rows: int):
+        pass
+    
+    def _after_flush(self, batch: Any):
+        pass
+    
+    def _pending_stats(self) -> Dict:
+        return {}
+
@@ -0,0 +1,35 @@
+"""
+Shared fixtures: the Flask app on a throwaway SQLite database
+"""
+import os
+
+import pytest
+
+from app import create_app
+from models.code import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    App with an app context pushed, background flushing and sweeping off
+    and no YouTube response cache
+    """
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp_path, 'test.db'),
+        'YOUTUBE_CACHE_PATH': '',
+        'CODE_SWEEP_INTERVAL': 0,
+        'COPY_FLUSH_INTERVAL': 0,
+        'VERIFICATION_FLUSH_INTERVAL': 0,
+    })
+    try:
+        with app.app_context():
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        app.extensions['copy_counter'].stop()
+        app.extensions['verification_recorder'].stop()
+        app.extensions['code_sweeper'].stop()
+        app.extensions['refresh_scheduler'].shutdown(wait=True)
+        app.extensions['suggestion_generator'].shutdown(wait=True)
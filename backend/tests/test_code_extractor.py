@@ -0,0 +1,33 @@
+"""
+CodeExtractor batch extraction agrees with extracting each text on its own
+"""
+from scrapers.code_extractor import CodeExtractor
+
+TEXTS = [
+    'use code SAVE20 for 20% off',
+    '',
+    'Promo: DEAL99 and "GEAR10" at checkout',
+    # Non-ASCII texts are scanned on their own
+    'ſave 15% with STRASSE10 at checkout',
+    'use code',
+    # A code right at the end must not run into the next text
+    'coupon code',
+    'ABCD1 save 5%',
+]
+
+
+def test_batch_matches_per_text_extraction():
+    assert CodeExtractor.extract_code_info_many(TEXTS) == [
+        CodeExtractor.extract_code_info(text) for text in TEXTS
+    ]
+
+
+def test_batch_keeps_each_texts_codes_and_discount():
+    results = CodeExtractor.extract_code_info_many(TEXTS)
+
+    assert [[info['code'] for info in codes] for codes in results] == [
+        ['SAVE20'], [], ['DEAL99', 'GEAR10'], ['STRASSE10'], [], [], []
+    ]
+    assert results[0][0]['discount_percentage'] == 20.0
+    assert results[2][0]['discount_percentage'] is None
+    assert CodeExtractor.extract_code_info_many([]) == []
@@ -0,0 +1,91 @@
+"""
+CodeSweeper archiving and the codes table upgrade it depends on
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from models.archive import ArchivedCode
+from models.code import Code, db
+from models.lock import GenerationLock
+from models.schema import upgrade_codes_table
+from services.code_sweeper import CodeSweeper
+
+
+def _add_codes(count: int, **values):
+    for i in range(count):
+        db.session.add(Code(brand='NordVPN', code=f'SAVE{i:04d}', source='YouTube', **values))
+    db.session.commit()
+
+
+def _count(model) -> int:
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_upgrade_backfills_last_seen_with_upgrade_time(app):
+    long_ago = datetime.utcnow() - timedelta(days=365)
+    _add_codes(3, created_at=long_ago, date_found=long_ago)
+    # Simulate a database created before last_seen_at existed
+    db.session.execute(text('DROP INDEX ix_codes_last_seen_at'))
+    db.session.execute(text('ALTER TABLE codes DROP COLUMN last_seen_at'))
+    db.session.commit()
+
+    before = datetime.utcnow()
+    upgrade_codes_table()
+
+    assert db.session.execute(select(func.min(Code.last_seen_at))).scalar() >= before
+    result = CodeSweeper(app, interval=0, batch_size=2).sweep()
+    assert result['archived'] == 0
+    assert _count(Code) == 3
+
+
+def test_sweep_archives_unseen_and_expired_codes(app):
+    _add_codes(4)
+    db.session.execute(text("UPDATE codes SET last_seen_at = :old WHERE code = 'SAVE0000'"),
+                       {'old': datetime.utcnow() - timedelta(days=60)})
+    db.session.execute(text("UPDATE codes SET expiry_date = :past WHERE code = 'SAVE0001'"),
+                       {'past': (datetime.utcnow() - timedelta(days=1)).date()})
+    db.session.commit()
+
+    result = CodeSweeper(app, interval=0, batch_size=2).sweep()
+
+    assert result == {'archived': 2, 'scanned': 4, 'batches': 2}
+    assert sorted(db.session.execute(select(ArchivedCode.code)).scalars()) == ['SAVE0000', 'SAVE0001']
+    assert _count(Code) == 2
+
+
+def test_sweep_renews_its_lock_every_batch(app, monkeypatch):
+    _add_codes(6)
+    sweeper = CodeSweeper(app, interval=0, batch_size=2)
+    renew = GenerationLock.renew
+    leases = []
+
+    def recording_renew(key, owner, ttl_seconds):
+        held = renew(key, owner, ttl_seconds)
+        leases.append(db.session.execute(
+            select(GenerationLock.expires_at).where(GenerationLock.key == key)
+        ).scalar())
+        return held
+
+    monkeypatch.setattr(GenerationLock, 'renew', recording_renew)
+
+    assert sweeper.sweep()['batches'] == 3
+    assert len(leases) == 3
+    assert leases == sorted(leases)
+    assert leases[-1] > datetime.utcnow() + timedelta(seconds=CodeSweeper.LOCK_TTL - 60)
+
+
+def test_sweep_stops_when_its_lock_was_taken_over(app, monkeypatch):
+    _add_codes(6)
+    sweeper = CodeSweeper(app, interval=0, batch_size=2)
+    renew = GenerationLock.renew
+
+    def steal_after_first_batch(key, owner, ttl_seconds):
+        if sweeper.stats()['batches'] == 1:
+            db.session.execute(text("UPDATE generation_locks SET owner = 'other'"))
+        return renew(key, owner, ttl_seconds)
+
+    monkeypatch.setattr(GenerationLock, 'renew', steal_after_first_batch)
+
+    assert sweeper.sweep()['batches'] == 1
+    assert sweeper.stats()['lost_lock'] == 1
@@ -0,0 +1,192 @@
+"""
+Coupon site parsers and CouponScraper against fixture pages served over
+local HTTP
+"""
+import os
+import socket
+from datetime import date
+
+import pytest
+import requests
+
+from benchmarks.fixture_server import FIXTURES_DIR, serve_fixtures
+from config import Config
+from scrapers.base import ScrapeError
+from scrapers.coupon_scraper import CouponScraper
+from scrapers.coupon_sites import CouponDBSite, RetailMeNotSite
+from services import scrape_service
+
+BRAND = 'NordVPN'
+
+
+@pytest.fixture
+def server():
+    with serve_fixtures() as server:
+        yield server
+
+
+def _sites(base_url: str):
+    return [RetailMeNotSite(base_url + '/retailmenot'), CouponDBSite(base_url + '/coupondb')]
+
+
+def _scraper(base_url: str) -> CouponScraper:
+    return CouponScraper(sites=_sites(base_url), session=requests.Session())
+
+
+def _fixture(*path: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, *path), 'rb') as f:
+        return f.read()
+
+
+def _closed_port() -> int:
+    """A local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_retailmenot_parser_reads_offer_attributes():
+    site = RetailMeNotSite()
+    codes = site.parse(_fixture('retailmenot', 'view', 'nordvpn.com.html'), 'https://example/page')
+
+    # Sale offers, malformed codes and expired codes are left out
+    assert [code['code'] for code in codes] == ['CYBER70', 'SAVE15NOW']
+    cyber70, save15 = codes
+    assert cyber70['status'] == 'verified'
+    assert cyber70['uses_count'] == 3421
+    assert cyber70['discount_percentage'] == 70.0
+    assert cyber70['expiry_date'] == date(2099, 12, 31)
+    assert cyber70['source'] == 'RetailMeNot'
+    assert cyber70['source_url'] == 'https://example/page'
+    assert save15['status'] == 'unverified'
+    assert save15['expiry_date'] is None
+    assert site.url('Nord VPN') == 'https://www.retailmenot.com/view/nordvpn.com'
+
+
+def test_coupondb_parser_reads_table_rows():
+    site = CouponDBSite()
+    codes = site.parse(_fixture('coupondb', 'nordvpn.html'), 'https://example/page')
+
+    # The sponsored row has no code
+    assert [code['code'] for code in codes] == ['CYBER70', 'VPNDEAL25']
+    cyber70, deal25 = codes
+    assert cyber70['status'] == 'verified'
+    assert cyber70['uses_count'] == 3421
+    assert deal25['status'] == 'unverified'
+    assert deal25['discount_description'] == 'Get 25% off any annual plan'
+    assert deal25['discount_percentage'] == 25.0
+    # "Ongoing" has no datetime attribute
+    assert deal25['expiry_date'] is None
+    assert site.url('Nord VPN') == 'https://www.coupondb.com/nord-vpn'
+
+
+def test_scrape_merges_sites_in_priority_order(server):
+    scraper = _scraper(server.url)
+
+    codes = scraper.scrape_codes(BRAND)
+
+    assert [(code['code'], code['source']) for code in codes] == [
+        ('CYBER70', 'RetailMeNot'),
+        ('SAVE15NOW', 'RetailMeNot'),
+        ('VPNDEAL25', 'CouponDB'),
+    ]
+    for stats in scraper.last_scrape_stats.values():
+        assert (stats['status'], stats['http_status'], stats['count']) == ('ok', 200, 2)
+
+
+def test_unlisted_brand_is_not_an_error(server):
+    scraper = _scraper(server.url)
+
+    assert scraper.scrape_codes('No Such Brand') == []
+    assert {name: stats['status'] for name, stats in scraper.last_scrape_stats.items()} == {
+        'RetailMeNot': 'ok', 'CouponDB': 'ok'
+    }
+    assert scraper.last_scrape_stats['CouponDB']['http_status'] == 404
+
+
+def test_session_reuses_connections_across_scrapes(server):
+    scraper = _scraper(server.url)
+
+    for _ in range(4):
+        scraper.scrape_codes(BRAND)
+
+    # The sites are fetched concurrently, so at most one connection each
+    assert server.requests == 8
+    assert server.connections <= len(scraper.sites)
+
+
+def test_scrapers_share_one_pooled_session():
+    assert CouponScraper(sites=[]).session is CouponScraper(sites=[]).session
+    adapter = CouponScraper.shared_session().get_adapter('https://www.retailmenot.com')
+    assert adapter._pool_maxsize == Config.COUPON_POOL_SIZE
+
+
+def test_slow_site_times_out_without_losing_the_others(monkeypatch):
+    monkeypatch.setattr(Config, 'COUPON_REQUEST_TIMEOUT', 0.2)
+
+    with serve_fixtures(latency=1.0) as slow, serve_fixtures() as fast:
+        scraper = CouponScraper(
+            sites=[RetailMeNotSite(slow.url + '/retailmenot'), CouponDBSite(fast.url + '/coupondb')],
+            session=requests.Session()
+        )
+        with pytest.raises(ScrapeError) as error:
+            scraper.scrape_codes(BRAND)
+
+    # The error carries the codes of the site that answered
+    assert [code['code'] for code in error.value.codes] == ['CYBER70', 'VPNDEAL25']
+    assert 'RetailMeNot' in str(error.value)
+    assert scraper.last_scrape_stats['RetailMeNot']['status'] == 'error'
+    assert 'timed out' in scraper.last_scrape_stats['RetailMeNot']['error']
+    assert scraper.last_scrape_stats['CouponDB']['status'] == 'ok'
+
+
+def test_unreachable_site_and_bad_page_are_reported_as_errors(tmp_path):
+    (tmp_path / 'coupondb').mkdir()
+    (tmp_path / 'coupondb' / 'nordvpn.html').write_bytes(b'')
+
+    with serve_fixtures(root=str(tmp_path)) as server:
+        scraper = CouponScraper(
+            sites=[RetailMeNotSite(f'http://127.0.0.1:{_closed_port()}/retailmenot'),
+                   CouponDBSite(server.url + '/coupondb')],
+            session=requests.Session()
+        )
+        with pytest.raises(ScrapeError) as error:
+            scraper.scrape_codes(BRAND)
+
+    assert error.value.codes == []
+    stats = scraper.last_scrape_stats
+    # Connection refused: no response at all
+    assert stats['RetailMeNot']['status'] == 'error'
+    assert 'http_status' not in stats['RetailMeNot']
+    # An empty page can't be parsed
+    assert (stats['CouponDB']['status'], stats['CouponDB']['http_status']) == ('error', 200)
+    assert stats['CouponDB']['count'] == 0
+
+
+def test_streamed_scrape_raises_after_yielding_the_working_sites(server):
+    scraper = CouponScraper(
+        sites=[RetailMeNotSite(f'http://127.0.0.1:{_closed_port()}/retailmenot'),
+               CouponDBSite(server.url + '/coupondb')],
+        session=requests.Session()
+    )
+    batches = []
+
+    with pytest.raises(ScrapeError):
+        for batch in scraper.iter_codes(BRAND):
+            batches.append(batch)
+
+    assert [[code['code'] for code in batch] for batch in batches] == [['CYBER70', 'VPNDEAL25']]
+
+
+def test_failed_sites_are_reported_by_the_scrape_service(app, monkeypatch):
+    port = _closed_port()
+    monkeypatch.setattr(scrape_service, 'CouponScraper', lambda: CouponScraper(
+        sites=_sites(f'http://127.0.0.1:{port}'), session=requests.Session()
+    ))
+
+    result = scrape_service.scrape_and_store(BRAND)
+
+    assert result['sources']['coupons']['status'] == 'error'
+    assert {name: stats['status'] for name, stats in result['api_usage']['coupons'].items()} == {
+        'RetailMeNot': 'error', 'CouponDB': 'error'
+    }
@@ -0,0 +1,84 @@
+"""
+DiskCache: reads that don't write, and eviction driven by a running size
+estimate
+"""
+import pytest
+
+from services.disk_cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / 'cache.db'), max_bytes=10_000)
+
+
+def _statements(cache: DiskCache, func):
+    """Run func; returns the SQL statements it ran on this thread's connection"""
+    statements = []
+    conn = cache._connect()
+    conn.set_trace_callback(statements.append)
+    try:
+        func()
+    finally:
+        conn.set_trace_callback(None)
+    return statements
+
+
+def _count(statements, fragment: str) -> int:
+    return len([statement for statement in statements if fragment in statement])
+
+
+def _accessed_at(cache: DiskCache, key: str) -> float:
+    return cache._connect().execute(
+        'SELECT accessed_at FROM cache_entries WHERE key = ?', (key,)
+    ).fetchone()[0]
+
+
+def test_hits_update_access_times_in_batches(cache):
+    cache.set_many('video', {f'v{i}': i for i in range(3)}, 60)
+    written = _accessed_at(cache, 'v0')
+
+    reads = _statements(cache, lambda: [cache.get('video', 'v0') for _ in range(20)])
+
+    assert _count(reads, 'UPDATE') == 0
+    assert _accessed_at(cache, 'v0') == written
+
+    # The next write carries the buffered access times
+    writes = _statements(cache, lambda: cache.set('video', 'v3', 3, 60))
+    assert _count(writes, 'UPDATE') == 1
+    assert _accessed_at(cache, 'v0') > written
+
+
+def test_a_full_touch_buffer_is_written_from_the_read_path(cache, monkeypatch):
+    monkeypatch.setattr(DiskCache, 'TOUCH_BATCH', 3)
+    cache.set_many('video', {f'v{i}': i for i in range(3)}, 60)
+
+    assert _count(_statements(cache, lambda: cache.get_many('video', ['v0', 'v1'])), 'UPDATE') == 0
+    # One executemany over the three buffered keys
+    assert _count(_statements(cache, lambda: cache.get('video', 'v2')), 'UPDATE') == 3
+    assert cache._touched == {}
+
+
+def test_size_is_summed_only_when_the_estimate_needs_it(cache, monkeypatch):
+    monkeypatch.setattr(DiskCache, 'SIZE_SYNC_EVERY', 10)
+    value = 'x' * 100
+
+    statements = _statements(cache, lambda: [cache.set('video', f'v{i}', value, 60) for i in range(20)])
+
+    # The first write has no estimate yet; the 11th is 10 writes later
+    assert _count(statements, 'SUM(size)') == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    value = 'x' * 998  # 1000 bytes of JSON
+    for i in range(9):
+        cache.set('video', f'v{i}', value, 60)
+    cache.get('video', 'v0')
+
+    cache.set_many('video', {'v9': value, 'v10': value}, 60)
+
+    assert cache.stats()['size_bytes'] <= 10_000 * DiskCache.EVICT_TO
+    assert cache.stats()['evictions'] == 2
+    # v0 was read after v1 and v2 were written, so they go first
+    assert cache.get('video', 'v0') == value
+    assert cache.get_many('video', ['v1', 'v2']) == {}
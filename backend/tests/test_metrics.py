@@ -0,0 +1,40 @@
+"""
+Query timing in services.metrics
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models.code import db
+from services.metrics import metrics
+
+
+def _query_count(operation: str) -> int:
+    histogram = metrics._histograms.get('span_duration_seconds', {}).get(
+        (('span', 'db.query'), ('operation', operation))
+    )
+    return histogram.count if histogram else 0
+
+
+def test_failed_statements_leave_no_timer_state(app):
+    connection = db.session.connection()
+    selects = _query_count('SELECT')
+
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+    connection.execute(text('SELECT 1'))
+
+    # Only the statement that completed is recorded
+    assert _query_count('SELECT') == selects + 1
+    assert not any(key.startswith('metrics') for key in connection.info)
+
+
+def test_executemany_is_timed_as_one_query(app):
+    connection = db.session.connection()
+    connection.execute(text('CREATE TABLE numbers (n INTEGER)'))
+    inserts = _query_count('INSERT')
+
+    connection.execute(text('INSERT INTO numbers (n) VALUES (:n)'), [{'n': n} for n in range(5)])
+
+    assert _query_count('INSERT') == inserts + 1
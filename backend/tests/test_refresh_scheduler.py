@@ -0,0 +1,102 @@
+"""
+RefreshScheduler deduplication, backoff and minimum refresh interval
+"""
+import threading
+import time
+
+from services.refresh_scheduler import RefreshScheduler
+
+
+class _Refresh:
+    """Refresh function returning a fixed source status, optionally blocking"""
+
+    def __init__(self, status: str = 'ok'):
+        self.status = status
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, brand_name: str):
+        self.calls.append(brand_name)
+        self.release.wait(5)
+        return {'sources': {'youtube': {'status': self.status}}}
+
+
+def _scheduler(app, refresh, **kwargs) -> RefreshScheduler:
+    kwargs.setdefault('backoff_base', 60)
+    return RefreshScheduler(app, refresh, max_workers=1, **kwargs)
+
+
+def _run_once(scheduler: RefreshScheduler, brand_name: str) -> str:
+    status = scheduler.enqueue(brand_name)
+    scheduler.shutdown(wait=True)
+    return status
+
+
+def test_brand_is_not_refreshed_again_within_min_interval(app):
+    refresh = _Refresh('ok')
+    scheduler = _scheduler(app, refresh, min_interval=3600)
+
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    # Still stale after a successful refresh: no new scrape
+    assert _run_once(scheduler, 'nordvpn') == 'recent'
+    assert _run_once(scheduler, 'Spotify') == 'queued'
+    assert refresh.calls == ['NordVPN', 'Spotify']
+    assert scheduler.stats()['skipped_recent'] == 1
+
+
+def test_without_min_interval_successful_brands_refresh_again(app):
+    refresh = _Refresh('ok')
+    scheduler = _scheduler(app, refresh, min_interval=0)
+
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert len(refresh.calls) == 2
+
+
+def test_failed_refresh_backs_off(app):
+    refresh = _Refresh('error')
+    scheduler = _scheduler(app, refresh, min_interval=0)
+
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert _run_once(scheduler, 'NordVPN') == 'backoff'
+    assert scheduler.stats()['failed'] == 1
+
+
+def test_failed_refresh_is_retried_after_backoff_not_min_interval(app):
+    refresh = _Refresh('error')
+    scheduler = _scheduler(app, refresh, backoff_base=0.2, min_interval=2)
+
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert _run_once(scheduler, 'NordVPN') == 'backoff'
+    time.sleep(0.3)
+    refresh.status = 'ok'
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert _run_once(scheduler, 'NordVPN') == 'recent'
+
+
+def test_app_config_retries_failures_before_min_interval(app, monkeypatch):
+    """With the default config, a failed brand waits for its backoff only"""
+    refresh = _Refresh('error')
+    scheduler = app.extensions['refresh_scheduler']
+    monkeypatch.setattr(scheduler, 'refresh', refresh)
+    assert scheduler.backoff_max < scheduler.min_interval
+
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    # Jump past the longest backoff, but not past min_interval
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + scheduler.backoff_max + 1)
+    assert _run_once(scheduler, 'NordVPN') == 'queued'
+    assert refresh.calls == ['NordVPN', 'NordVPN']
+
+
+def test_concurrent_requests_share_one_refresh(app):
+    refresh = _Refresh('ok')
+    refresh.release.clear()
+    scheduler = _scheduler(app, refresh)
+
+    assert scheduler.enqueue('NordVPN') == 'queued'
+    assert scheduler.enqueue('NordVPN') == 'in_progress'
+    refresh.release.set()
+    scheduler.shutdown(wait=True)
+    assert refresh.calls == ['NordVPN']
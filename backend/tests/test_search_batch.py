@@ -0,0 +1,97 @@
+"""
+Multi-brand code search: one brand-key lookup, per-brand grouping and
+cached bodies reused byte for byte
+"""
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from models.brand import BrandIndex
+from models.code import db
+from models.code_store import CodeStore
+from services.response_cache import code_search_cache
+
+# Brand -> {code: discount percentage}
+BRANDS = {
+    'NordVPN': {'NORD10': 10.0, 'NORD20': 20.0},
+    'Nord Pass': {'PASS15': 15.0},
+    'Spotify': {'SPOT5': 5.0},
+}
+
+
+@pytest.fixture(autouse=True)
+def codes(app):
+    code_search_cache.clear()
+    for brand, codes in BRANDS.items():
+        CodeStore.upsert_codes(brand, [
+            {'code': code, 'source': 'YouTube', 'discount_percentage': discount,
+             'date_found': datetime.utcnow()}
+            for code, discount in codes.items()
+        ])
+    db.session.commit()
+    yield
+    code_search_cache.clear()
+
+
+def _batch(app, brands, match='substring'):
+    return app.test_client().post('/api/codes/search/batch', json={'brands': brands, 'match': match})
+
+
+def _single(app, brand, match='substring'):
+    return app.test_client().get('/api/codes/search', query_string={'brand': brand, 'match': match})
+
+
+def _batch_with_statements(app, brands):
+    """Run a batch search; returns the response and the SQL statements it ran"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = _batch(app, brands)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return response, statements
+
+
+def _count(statements, fragment: str) -> int:
+    return len([statement for statement in statements if fragment in statement])
+
+
+@pytest.mark.parametrize('match', BrandIndex.MATCH_MODES)
+def test_batch_results_match_single_searches(app, match):
+    terms = ['nord', 'NordVPN', 'spot', 'unknown']
+    results = _batch(app, terms, match).get_json()['results']
+
+    code_search_cache.clear()
+    for term in terms:
+        assert results[term] == _single(app, term, match).get_json()
+
+
+def test_brand_keys_are_resolved_in_one_query(app):
+    response, statements = _batch_with_statements(app, ['nord', 'vpn', 'spot', 'pass'])
+
+    assert response.status_code == 200
+    assert _count(statements, 'brand_search') == 1
+    assert _count(statements, 'FROM codes') == 1
+    results = response.get_json()['results']
+    assert [code['code'] for code in results['nord']['codes']] == ['NORD20', 'PASS15', 'NORD10']
+    assert [code['code'] for code in results['pass']['codes']] == ['PASS15']
+
+
+def test_cached_bodies_are_spliced_in_unchanged(app):
+    single = _single(app, 'nord')
+
+    response, statements = _batch_with_statements(app, ['Nord', 'nord', 'Spotify'])
+    body = response.get_data()
+
+    # 'nord' came from the cache; only Spotify was searched
+    assert _count(statements, 'FROM codes') == 1
+    assert _count(statements, 'brand_search') == 1
+    assert single.get_data() in body
+    assert list(json.loads(body)['results']) == ['Nord', 'Spotify']
+    assert json.loads(body)['results']['Nord'] == single.get_json()
@@ -0,0 +1,122 @@
+"""
+Batched suggestion prefetching: background batch jobs, partial batch
+failures and retries
+"""
+import pytest
+from sqlalchemy import func, select
+
+from ai.suggester import AISuggester
+from benchmarks.stubs import FakeGeminiModel
+from models.code import db, normalize_brand
+from models.lock import GenerationLock
+from models.suggestion import AISuggestion
+from routes.suggestions import prefetch_coalesced, suggestion_flight
+from services import suggestion_service
+
+BRANDS = [f'Brand {i:02d}' for i in range(25)]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeGeminiModel(suggestions_per_brand=2)
+    monkeypatch.setattr(suggestion_service, 'AISuggester', lambda: AISuggester(model=model))
+    return model
+
+
+def _stored_brands():
+    rows = db.session.execute(
+        select(AISuggestion.brand, func.count()).group_by(AISuggestion.brand)
+    ).all()
+    db.session.commit()
+    return dict(rows)
+
+
+def _prefetch(app, brands, **body):
+    return app.test_client().post('/api/suggestions/prefetch', json={'brands': brands, **body})
+
+
+def test_prefetch_queues_batches_and_answers_before_generating(app, model):
+    model.gate.clear()
+
+    response = _prefetch(app, BRANDS, batch_size=10)
+
+    assert response.status_code == 202
+    assert [len(batch) for batch in response.get_json()['queued']] == [10, 10, 5]
+    assert _stored_brands() == {}
+
+    model.gate.set()
+    generator = app.extensions['suggestion_generator']
+    generator.shutdown(wait=True)
+    assert sorted(map(sorted, model.batches)) == sorted(map(sorted, response.get_json()['queued']))
+    assert _stored_brands() == {brand: 2 for brand in BRANDS}
+    assert generator.stats()['batches_submitted'] == 3
+    assert generator.stats()['succeeded'] == 3
+
+
+def test_prefetch_skips_fresh_brands_and_rejects_when_full(app, model):
+    _prefetch(app, BRANDS[:2])
+    app.extensions['suggestion_generator'].shutdown(wait=True)
+    model.gate.clear()
+    app.extensions['suggestion_generator'].max_in_flight = 1
+
+    response = _prefetch(app, BRANDS[:6], batch_size=2)
+    model.gate.set()
+
+    assert response.status_code == 202
+    assert response.get_json() == {
+        'queued': [BRANDS[2:4]],
+        'skipped_fresh': BRANDS[:2],
+        'rejected': BRANDS[4:6]
+    }
+
+
+def test_prefetch_rejects_invalid_requests(app, model):
+    assert _prefetch(app, []).status_code == 400
+    assert _prefetch(app, BRANDS, batch_size=0).status_code == 400
+    assert _prefetch(app, [f'Brand {i}' for i in range(101)]).status_code == 400
+    assert model.batches == []
+
+
+def test_partial_batch_failure_stores_the_answered_brands(app, model):
+    model.missing = {'Brand 03'}
+
+    report = prefetch_coalesced(BRANDS[:5])
+
+    assert report['failed'] == ['Brand 03']
+    assert sorted(report['stored']) == ['Brand 00', 'Brand 01', 'Brand 02', 'Brand 04']
+    # The first prompt plus MAX_BATCH_RETRIES prompts for the missing brand
+    assert report['api_calls'] == 1 + AISuggester.MAX_BATCH_RETRIES
+    assert model.batches[1:] == [['Brand 03']] * AISuggester.MAX_BATCH_RETRIES
+    assert 'Brand 03' not in _stored_brands()
+
+
+def test_retry_asks_only_for_brands_missing_from_the_response(app, model):
+    model.drop_once = {'Brand 01', 'Brand 03'}
+
+    report = prefetch_coalesced(BRANDS[:5])
+
+    assert model.batches == [BRANDS[:5], ['Brand 01', 'Brand 03']]
+    assert report['failed'] == []
+    assert _stored_brands() == {brand: 2 for brand in BRANDS[:5]}
+
+
+def test_failed_model_call_is_retried(app, model):
+    model.fail_calls = 1
+
+    report = prefetch_coalesced(BRANDS[:3])
+
+    assert report['api_calls'] == 2
+    assert model.batches == [BRANDS[:3], BRANDS[:3]]
+    assert sorted(report['stored']) == BRANDS[:3]
+
+
+def test_brand_generated_by_another_worker_is_left_out(app, model):
+    lock_key = f"{suggestion_flight.name}:{normalize_brand('Brand 01')}"
+    assert GenerationLock.acquire(lock_key, 'other-worker', 60)
+
+    report = prefetch_coalesced(BRANDS[:3])
+
+    assert report['in_progress'] == ['Brand 01']
+    assert model.batches == [['Brand 00', 'Brand 02']]
+    # Only the other worker's lock is left
+    assert db.session.execute(select(GenerationLock.key)).scalars().all() == [lock_key]
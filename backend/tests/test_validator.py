@@ -0,0 +1,62 @@
+"""
+SuggestionValidator risky keyword screening
+"""
+import pytest
+
+from ai.validator import SuggestionValidator
+
+
+def _suggestion(text: str, suggestion_type: str = 'free_trial'):
+    return {'type': suggestion_type, 'title': 'Offer', 'description': text, 'pro_tip': None}
+
+
+@pytest.mark.parametrize('text', [
+    'Use this HACK!',
+    'Share a fake account',
+    'A known scam: avoid it',
+    'Bypass payment with a trick',
+    'Skip, payment is optional',
+    'Avoid\npaying for months',
+    'Totally illegal',
+])
+def test_whole_word_keywords_are_flagged(text):
+    assert SuggestionValidator.validate_suggestion(_suggestion(text))['risk'] == 'high'
+
+
+@pytest.mark.parametrize('text', [
+    'Exploited sellers get refunds',
+    'The cheater list is public',
+    'Stay in a beach shack',
+    'Join the hackathon for credits',
+    'Scampi night discount',
+    'Skip the payment page queue',
+])
+def test_longer_words_containing_keywords_are_not_flagged(text):
+    assert SuggestionValidator.validate_suggestion(_suggestion(text))['risk'] == 'safe'
+
+
+def test_batch_screening_matches_per_suggestion_screening():
+    texts = ['Student pricing', 'Use a fake account', 'Exploited sellers', 'cheat codes',
+             'bypass payment', 'fraud', 'Family plan']
+    suggestions = [_suggestion(text) for text in texts] + [_suggestion('Family plan', 'mystery')]
+
+    expected = [SuggestionValidator._assess_risk(dict(s)) for s in suggestions]
+    validated = SuggestionValidator.validate_suggestions(suggestions)
+
+    assert [s['risk'] for s in suggestions] == expected
+    assert expected == ['safe', 'high', 'safe', 'high', 'high', 'high', 'safe', 'medium']
+    assert validated == [s for s in suggestions if s['risk'] == 'safe']
+
+
+def test_match_never_spans_two_suggestions():
+    suggestions = [_suggestion('Ways to bypass'), _suggestion('payment plans')]
+
+    assert SuggestionValidator._find_risky(suggestions) == set()
+
+
+def test_long_keyword_lists_screen_the_same(monkeypatch):
+    keywords = SuggestionValidator.RISKY_KEYWORDS + [f'filler{i}' for i in range(100)]
+    monkeypatch.setattr(SuggestionValidator, 'RISKY_KEYWORDS', keywords)
+    suggestions = [_suggestion('Free trial'), _suggestion('Pirate it'), _suggestion('Uses filler42 code')]
+
+    assert SuggestionValidator._find_risky(suggestions) == {1, 2}
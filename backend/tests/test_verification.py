@@ -0,0 +1,116 @@
+"""
+Suggestion verification votes: event log, atomic counters and the
+failure_count upgrade
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select, text
+
+from models.code import db
+from models.schema import upgrade_suggestions_table
+from models.suggestion import AISuggestion
+from models.verification import SuggestionVerification
+from services.verification_recorder import VerificationRecorder
+
+
+def _add_suggestion(**values) -> int:
+    suggestion = AISuggestion(brand='NordVPN', suggestion_type='free_trial', title='Trial',
+                              description='Start a free trial', **values)
+    db.session.add(suggestion)
+    db.session.commit()
+    return suggestion.id
+
+
+def _counts(suggestion_id: int):
+    row = db.session.execute(
+        select(AISuggestion.verification_count, AISuggestion.failure_count,
+               AISuggestion.confidence_score).where(AISuggestion.id == suggestion_id)
+    ).one()
+    db.session.commit()
+    return tuple(row)
+
+
+@pytest.mark.parametrize('worked, score, failed', [
+    (10, 70.0, 0),   # Only "worked" votes: 50 + 2 * 10
+    (10, 60.0, 2),   # Two failures after the last "worked" vote
+    (0, 40.0, 2),    # Failures only
+    (30, 90.0, 2),   # Capped at 100 before failing
+    (1, 0.0, 11),    # Clamped at 0: at least 52 points lost
+])
+def test_upgrade_derives_failure_count_from_old_scores(app, worked, score, failed):
+    suggestion_id = _add_suggestion(verification_count=worked, confidence_score=score)
+    db.session.execute(text('DROP INDEX ix_ai_suggestions_brand_key_fresh'))
+    db.session.execute(text('ALTER TABLE ai_suggestions DROP COLUMN failure_count'))
+    db.session.commit()
+
+    upgrade_suggestions_table()
+
+    assert _counts(suggestion_id) == (
+        worked, failed, pytest.approx(SuggestionVerification.confidence(worked, failed))
+    )
+
+
+def test_upgrade_leaves_unvoted_suggestions_alone(app):
+    suggestion_id = _add_suggestion(verification_count=0, confidence_score=50.0)
+    db.session.execute(text('DROP INDEX ix_ai_suggestions_brand_key_fresh'))
+    db.session.execute(text('ALTER TABLE ai_suggestions DROP COLUMN failure_count'))
+    db.session.commit()
+
+    upgrade_suggestions_table()
+
+    assert _counts(suggestion_id) == (0, 0, 50.0)
+
+
+def test_buffered_votes_are_logged_and_counted_atomically(app):
+    suggestion_id = _add_suggestion(verification_count=0, failure_count=0, confidence_score=50.0)
+    recorder = VerificationRecorder(app, flush_interval=60)
+    votes = [i % 3 != 0 for i in range(300)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda worked: recorder.record(suggestion_id, worked), votes))
+    assert recorder.flush() == 1
+
+    worked, failed = votes.count(True), votes.count(False)
+    assert _counts(suggestion_id) == (
+        worked, failed, pytest.approx(SuggestionVerification.confidence(worked, failed))
+    )
+    assert db.session.execute(
+        select(func.count()).select_from(SuggestionVerification)
+        .where(SuggestionVerification.suggestion_id == suggestion_id)
+    ).scalar() == len(votes)
+    assert recorder.stats()['pending_votes'] == 0
+
+
+
+def test_failed_flush_keeps_the_votes_for_the_next_flush(app, monkeypatch):
+    suggestion_id = _add_suggestion(verification_count=0, failure_count=0, confidence_score=50.0)
+    recorder = VerificationRecorder(app, flush_interval=60)
+    recorder.record(suggestion_id, True)
+    recorder.record(suggestion_id, False)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(recorder, '_write', fail)
+        assert recorder.flush() == 0
+    recorder.record(suggestion_id, True)
+
+    assert recorder.stats()['flush_errors'] == 1
+    assert recorder.stats()['pending_votes'] == 3
+    assert recorder.flush() == 1
+    assert _counts(suggestion_id)[:2] == (2, 1)
+    assert recorder.stats()['events_written'] == 3
+
+def test_verify_endpoint_reports_counts_including_the_vote(app):
+    suggestion_id = _add_suggestion(verification_count=3, failure_count=1, confidence_score=50.0)
+
+    response = app.test_client().post('/api/suggestions/verify',
+                                      json={'suggestion_id': suggestion_id, 'worked': True})
+
+    assert response.status_code == 200
+    assert response.get_json()['verification_count'] == 4
+    assert response.get_json()['confidence_score'] == pytest.approx(SuggestionVerification.confidence(4, 1))
+    # The test app writes votes through immediately
+    assert _counts(suggestion_id)[:2] == (4, 1)
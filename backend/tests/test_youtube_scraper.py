@@ -0,0 +1,257 @@
+"""
+YouTubeScraper against a local stub of the YouTube Data API client
+"""
+import math
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from benchmarks.stubs import StubYouTubeClient
+from models.code import Code, db
+from models.code_store import CodeStore
+from models.watermark import ScrapeWatermark
+from scrapers.base import ScrapeError
+from scrapers.youtube_scraper import YouTubeScraper
+from services import scrape_service
+
+QUERIES = ['NordVPN discount code', 'NordVPN coupon code', 'NordVPN promo code']
+LONG_AGO = datetime(2020, 1, 1)
+
+
+def _plan(per_query: int, shared: int):
+    """Search results where every query also returns the same `shared` videos"""
+    return {
+        query: [f'q{i}v{k:02d}' for k in range(per_query - shared)] +
+               [f'shared{k:02d}' for k in range(shared)]
+        for i, query in enumerate(QUERIES)
+    }
+
+
+def _scrape(stub: StubYouTubeClient, max_results: int):
+    scraper = YouTubeScraper(client=stub, cache=False)
+    codes = scraper.scrape_codes('NordVPN', max_results=max_results)
+    return scraper, codes
+
+
+def _requested(stub: StubYouTubeClient):
+    return [video_id for call in stub.calls_to('videos.list') for video_id in call['id'].split(',')]
+
+
+def test_video_ids_are_deduplicated_across_queries():
+    stub = StubYouTubeClient(_plan(per_query=50, shared=15))
+    scraper, codes = _scrape(stub, max_results=150)
+
+    searched = [video_id for call in stub.calls_to('search.list') for video_id in call['returned']]
+    requested = _requested(stub)
+    assert len(requested) == len(set(requested))
+    assert set(requested) == set(searched)
+    # The queries share videos, so fewer are fetched than were found
+    assert len(requested) == len(searched) - 2 * 15
+    assert scraper.last_scrape_stats['videos'] == len(requested)
+    assert sorted(code['code'] for code in codes) == sorted(map(stub.code_for, requested))
+
+
+def test_video_details_are_fetched_in_full_batches():
+    stub = StubYouTubeClient(_plan(per_query=50, shared=15))
+    _scrape(stub, max_results=150)
+
+    unique = len(set(_requested(stub)))
+    assert unique > YouTubeScraper.VIDEOS_BATCH_SIZE
+    videos_calls = stub.calls_to('videos.list')
+    assert len(videos_calls) == math.ceil(unique / YouTubeScraper.VIDEOS_BATCH_SIZE)
+    for call in videos_calls:
+        assert len(call['id'].split(',')) <= YouTubeScraper.VIDEOS_BATCH_SIZE
+        assert call['maxResults'] == len(call['id'].split(','))
+
+
+def test_one_search_call_per_query_and_quota_is_reported():
+    stub = StubYouTubeClient(_plan(per_query=10, shared=5))
+    scraper, _ = _scrape(stub, max_results=30)
+
+    searches = stub.calls_to('search.list')
+    assert sorted(call['q'] for call in searches) == sorted(QUERIES)
+    assert all(call['maxResults'] == 10 for call in searches)
+    assert len(stub.calls_to('videos.list')) == 1
+    stats = scraper.last_scrape_stats
+    assert stats['api_calls'] == 4
+    assert stats['quota_units'] == (
+        3 * YouTubeScraper.SEARCH_QUOTA_COST + YouTubeScraper.VIDEOS_QUOTA_COST
+    )
+
+
+def test_scrape_without_client_returns_mock_data():
+    scraper = YouTubeScraper(api_key='', cache=False)
+    scraper.youtube = None
+
+    codes = scraper.scrape_codes('NordVPN')
+
+    assert [code['code'] for code in codes] == ['SAVE20']
+    assert scraper.last_scrape_stats['api_calls'] == 0
+
+
+def _catalog_stub():
+    """Ten videos per query on 2024-01-01, so a first scrape sees them all"""
+    results = {query: [f'q{i}v{k:02d}' for k in range(10)] for i, query in enumerate(QUERIES)}
+    published = {
+        video_id: f'2024-01-01T{i:02d}:{k:02d}:00Z'
+        for i, query in enumerate(QUERIES) for k, video_id in enumerate(results[query])
+    }
+    return StubYouTubeClient(results, published)
+
+
+def _upload(stub: StubYouTubeClient, per_query: int):
+    """Add per_query new videos to every query, interleaved in time; returns their IDs"""
+    new_ids = []
+    for i, query in enumerate(QUERIES):
+        for k in range(per_query):
+            video_id = f'q{i}n{k:02d}'
+            stub.results[query].append(video_id)
+            stub.published[video_id] = f'2024-01-02T{k:02d}:{i:02d}:00Z'
+            new_ids.append(video_id)
+    return new_ids
+
+
+def _incremental_scraper(stub: StubYouTubeClient) -> YouTubeScraper:
+    """A scraper whose watermark is set by a complete first scrape"""
+    scraper = YouTubeScraper(client=stub, cache=False)
+    scraper.scrape_codes('NordVPN', max_results=30)
+    assert scraper.last_scrape_stats['complete']
+    scraper.watermark = scraper.next_watermark
+    stub.calls.clear()
+    return scraper
+
+
+def _codes(stub: StubYouTubeClient, video_ids):
+    return sorted(map(stub.code_for, video_ids))
+
+
+def test_incremental_scrape_fetches_only_new_videos():
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    new_ids = _upload(stub, per_query=2)
+
+    codes = scraper.scrape_codes('NordVPN', max_results=30)
+
+    assert sorted(code['code'] for code in codes) == _codes(stub, new_ids)
+    assert all(call['order'] == 'date' for call in stub.calls_to('search.list'))
+    assert scraper.last_scrape_stats['incremental']
+    assert scraper.next_watermark['published_at'].isoformat() == '2024-01-02T01:02:00'
+    assert set(scraper.next_watermark['seen_ids'][:len(new_ids)]) == set(new_ids)
+
+
+def test_incremental_scrape_stops_at_seen_videos():
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    _upload(stub, per_query=1)
+    scraper.scrape_codes('NordVPN')
+    scraper.watermark = scraper.next_watermark
+    stub.calls.clear()
+
+    assert scraper.scrape_codes('NordVPN') == []
+    assert len(stub.calls_to('search.list')) == 3
+    assert stub.calls_to('videos.list') == []
+    assert scraper.next_watermark == scraper.watermark
+
+
+def test_watermark_is_kept_when_paging_stops_early(monkeypatch):
+    monkeypatch.setattr(YouTubeScraper, 'SEARCH_PAGE_SIZE', 2)
+    monkeypatch.setattr(YouTubeScraper, 'MAX_INCREMENTAL_PAGES', 2)
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    _upload(stub, per_query=5)
+
+    codes = scraper.scrape_codes('NordVPN', max_results=30)
+
+    # The newest 4 of each query's 5 new videos were reached
+    assert len(codes) == 12
+    assert len(stub.calls_to('search.list')) == 6
+    assert not scraper.last_scrape_stats['complete']
+    assert scraper.next_watermark is None
+
+
+def test_incremental_scrape_honours_max_results_oldest_first():
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    new_ids = _upload(stub, per_query=5)
+    oldest = sorted(new_ids, key=stub.published_at)
+
+    first = scraper.scrape_codes('NordVPN', max_results=6)
+    scraper.watermark = scraper.next_watermark
+    rest = scraper.scrape_codes('NordVPN', max_results=30)
+
+    assert sorted(code['code'] for code in first) == _codes(stub, oldest[:6])
+    assert sorted(code['code'] for code in rest) == _codes(stub, oldest[6:])
+    assert scraper.next_watermark['published_at'].isoformat() == '2024-01-02T04:02:00'
+
+
+def test_search_failure_raises_with_codes_and_keeps_watermark():
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    new_ids = _upload(stub, per_query=2)
+    stub.failing_queries.add(QUERIES[1])
+
+    with pytest.raises(ScrapeError) as error:
+        scraper.scrape_codes('NordVPN')
+
+    found = [video_id for video_id in new_ids if not video_id.startswith('q1')]
+    assert sorted(code['code'] for code in error.value.codes) == _codes(stub, found)
+    assert scraper.next_watermark is None
+
+
+def test_video_details_failure_raises_and_keeps_watermark():
+    stub = _catalog_stub()
+    scraper = _incremental_scraper(stub)
+    _upload(stub, per_query=2)
+    stub.fail_videos = True
+
+    with pytest.raises(ScrapeError) as error:
+        scraper.scrape_codes('NordVPN')
+
+    assert error.value.codes == []
+    assert scraper.next_watermark is None
+
+
+def _seed_brand(stub: StubYouTubeClient):
+    """Store a first scrape's watermark and codes, last seen long ago"""
+    scraper = YouTubeScraper(client=stub, cache=False)
+    codes = scraper.scrape_codes('NordVPN', max_results=30)
+    ScrapeWatermark.save(scraper.name, 'NordVPN', scraper.next_watermark['published_at'],
+                         scraper.next_watermark['seen_ids'])
+    CodeStore.upsert_codes('NordVPN', codes)
+    db.session.execute(update(Code).values(last_seen_at=LONG_AGO))
+    db.session.commit()
+    return ScrapeWatermark.load(scraper.name, 'NordVPN')
+
+
+def _last_seen(code: str):
+    return db.session.execute(select(Code.last_seen_at).where(Code.code == code)).scalar_one()
+
+
+def test_failed_incremental_scrape_keeps_watermark_and_last_seen(app, monkeypatch):
+    stub = _catalog_stub()
+    monkeypatch.setattr(scrape_service, 'YouTubeScraper', lambda: YouTubeScraper(client=stub, cache=False))
+    watermark = _seed_brand(stub)
+    _upload(stub, per_query=2)
+    stub.failing_queries.update(QUERIES)
+
+    result = scrape_service.scrape_and_store('NordVPN')
+
+    assert result['sources']['youtube']['status'] == 'error'
+    assert ScrapeWatermark.load('youtube', 'NordVPN') == watermark
+    assert _last_seen(stub.code_for('q0v00')) == LONG_AGO
+
+
+def test_complete_incremental_scrape_advances_watermark_and_last_seen(app, monkeypatch):
+    stub = _catalog_stub()
+    monkeypatch.setattr(scrape_service, 'YouTubeScraper', lambda: YouTubeScraper(client=stub, cache=False))
+    _seed_brand(stub)
+    new_ids = _upload(stub, per_query=2)
+
+    result = scrape_service.scrape_and_store('NordVPN')
+
+    assert result['sources']['youtube']['status'] == 'ok'
+    assert ScrapeWatermark.load('youtube', 'NordVPN')['published_at'].isoformat() == '2024-01-02T01:02:00'
+    assert _last_seen(stub.code_for('q0v00')) > LONG_AGO
+    stored = {code['code'] for code in result['codes']}
+    assert set(_codes(stub, new_ids)) | {stub.code_for('q0v00')} <= stored
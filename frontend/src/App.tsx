@@ -27,8 +27,8 @@ function App() {
       // Search for existing codes first
       const searchResponse = await searchCodes(brand);
       
-      // If no codes or stale, trigger scraping
-      if (searchResponse.codes.length === 0 || searchResponse.stale) {
+      // If no codes, or stale without a background refresh, trigger scraping
+      if (searchResponse.codes.length === 0 || (searchResponse.stale && !searchResponse.refreshing)) {
         // Scrape in parallel with getting AI suggestions
         const [scrapeResponse, suggestionsResponse] = await Promise.all([
           scrapeCodes(brand),
@@ -12,7 +12,8 @@ export default function AISuggestionsCard({ suggestions }: AISuggestionsCardProp
 
   const displayedSuggestions = showAll ? suggestions : suggestions.slice(0, 3);
 
-  const handleVerify = async (suggestionId: number, worked: boolean) => {
+  const handleVerify = async (suggestionId: number | null, worked: boolean) => {
+    if (suggestionId === null) return;
     try {
       await verifySuggestion(suggestionId, worked);
       if (worked) {
@@ -42,7 +43,7 @@ export default function AISuggestionsCard({ suggestions }: AISuggestionsCardProp
         <div className="space-y-4">
           {displayedSuggestions.map((suggestion) => (
             <div
-              key={suggestion.id}
+              key={suggestion.id ?? suggestion.title}
               className="bg-white rounded-lg p-5 shadow-card border border-neutral-200"
             >
               {/* Title and Type */}
@@ -112,8 +113,8 @@ export default function AISuggestionsCard({ suggestions }: AISuggestionsCardProp
                   )}
                 </div>
 
-                {/* Verify buttons */}
-                {!verifiedIds.has(suggestion.id) ? (
+                {/* Verify buttons (only for stored suggestions) */}
+                {suggestion.id === null ? null : !verifiedIds.has(suggestion.id) ? (
                   <div className="flex gap-2">
                     <button
                       onClick={() => handleVerify(suggestion.id, true)}
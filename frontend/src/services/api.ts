@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { SearchResponse, SuggestionsResponse, ScrapeResponse } from '../types';
+import type { SearchResponse, BatchSearchResponse, SuggestionsResponse, ScrapeResponse } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5001';
 
@@ -17,6 +17,11 @@ export const searchCodes = async (brand: string): Promise<SearchResponse> => {
   return response.data;
 };
 
+export const searchCodesBatch = async (brands: string[]): Promise<BatchSearchResponse> => {
+  const response = await api.post(`/api/codes/search/batch`, { brands });
+  return response.data;
+};
+
 export const scrapeCodes = async (brand: string): Promise<ScrapeResponse> => {
   const response = await api.get(`/api/scrape`, {
     params: { brand },
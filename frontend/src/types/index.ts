@@ -15,7 +15,7 @@ export interface Code {
 }
 
 export interface AISuggestion {
-  id: number;
+  id: number | null; // null until generated suggestions are stored
   brand: string;
   suggestion_type: string;
   title: string;
@@ -27,18 +27,26 @@ export interface AISuggestion {
   confidence_score: number;
   verification_count: number;
   risk_level: 'safe' | 'medium' | 'high';
-  created_at: string;
+  created_at: string | null;
 }
 
 export interface SearchResponse {
   codes: Code[];
   stale?: boolean;
+  refreshing?: boolean;
   message?: string;
 }
 
+export interface BatchSearchResponse {
+  results: Record<string, SearchResponse>;
+}
+
 export interface SuggestionsResponse {
   suggestions: AISuggestion[];
   cached: boolean;
+  coalesced?: boolean;
+  pending?: boolean; // AI generation still running; fetch again later
+  source?: 'partial' | 'stale' | 'fallback';
 }
 
 export interface ScrapeResponse {